@@ -1,20 +1,214 @@
+"""Compiled engine-code resolver shared by the API and the pipeline scripts.
+
+Raw engine codes (from vehicles.json, VIN decodes, seeds) resolve to the canonical
+codes used by the seeds:
+
+1) disambiguation rules (make / model / year context) from engine_disambiguation_map.json
+2) alias map (engine_alias_map.json, "engine_alias_map" section)
+3) passthrough
+
+Everything is compiled once: alias chains (A -> B -> C) are collapsed to their final
+target, cycles are detected and reported instead of followed, and disambiguation rules
+and aliases live in one dict keyed by raw code, so a lookup is a single probe.
+US-market only.
+"""
+from __future__ import annotations
+
 import json
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DATA = Path(__file__).resolve().parents[2] / "data" / "canonical"
+ALIAS_MAP_PATH = DATA / "engine_alias_map.json"
+DISAMBIGUATION_PATH = DATA / "engine_disambiguation_map.json"
+
+# (make, model, year_min, year_max, canonical code, score without the year bonus, year bonus)
+_Rule = Tuple[str, str, Optional[int], Optional[int], str, int, int]
+
+
+class AliasCycleError(ValueError):
+    pass
+
+
+def _norm(s: Any) -> str:
+    if s is None:
+        return ""
+    return " ".join(str(s).strip().split()).casefold()
+
+
+def _as_int(x: Any) -> Optional[int]:
+    try:
+        return int(x)
+    except Exception:
+        return None
+
+
+def _load(path: Optional[Path], section: str) -> Dict[str, Any]:
+    if path is None:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return (json.load(f) or {}).get(section, {}) or {}
+    except Exception:
+        return {}
+
 
 class EngineResolver:
-    def __init__(self, alias_map_path: Path):
-        with open(alias_map_path, "r") as f:
-            doc = json.load(f)
-
-        self.market_scope = doc.get("market_scope", "US_only")
-        self.alias_map = doc.get("engine_alias_map", {})
-
-    def resolve(self, engine_code_or_label: str) -> str:
-        """
-        Resolve an engine code or label to its canonical engine_code.
-        One-hop only. US-market only.
-        """
-        if not engine_code_or_label:
-            return engine_code_or_label
-
-        return self.alias_map.get(engine_code_or_label, engine_code_or_label)
+    def __init__(
+        self,
+        alias_map_path: Optional[Path] = ALIAS_MAP_PATH,
+        disambiguation_path: Optional[Path] = DISAMBIGUATION_PATH,
+        *,
+        strict: bool = False,
+    ):
+        self.compile(_load(alias_map_path, "engine_alias_map"), _load(disambiguation_path, "disambiguation"), strict=strict)
+
+    @classmethod
+    def from_maps(cls, alias_map: Dict[str, str], disambiguation: Dict[str, Any], *, strict: bool = False) -> "EngineResolver":
+        self = cls.__new__(cls)
+        self.compile(alias_map, disambiguation, strict=strict)
+        return self
+
+    def compile(self, alias_map: Dict[str, Any], disambiguation: Dict[str, Any], *, strict: bool = False) -> None:
+        aliases = {
+            str(k).strip(): str(v).strip()
+            for k, v in (alias_map or {}).items()
+            if isinstance(v, str) and v.strip() and str(v).strip() != str(k).strip()
+        }
+        self.cycles: List[Tuple[str, ...]] = []
+        self.aliases = self._collapse(aliases)
+        if strict and self.cycles:
+            raise AliasCycleError(f"engine alias cycles: {self.cycles}")
+
+        index: Dict[str, Tuple[Optional[str], Tuple[_Rule, ...]]] = {raw: (to, ()) for raw, to in self.aliases.items()}
+        for raw, rules in (disambiguation or {}).items():
+            if not isinstance(rules, list):
+                continue
+            compiled = []
+            for rule in rules:
+                if not isinstance(rule, dict):
+                    continue
+                to = rule.get("canonical_engine_code") or rule.get("engine_code_canonical")
+                if not to:
+                    continue
+                to = str(to).strip()
+                make, model = _norm(rule.get("make")), _norm(rule.get("model"))
+                y0, y1 = _as_int(rule.get("year_min")), _as_int(rule.get("year_max"))
+                # Score: prefer model-specific, then tighter year, then make match
+                base = (10 if model else 0) + (5 if make else 0)
+                year_bonus = max(0, 100 - max(0, y1 - y0)) if (y0 is not None and y1 is not None) else 0
+                compiled.append((make, model, y0, y1, self.aliases.get(to, to), base, year_bonus))
+            raw = str(raw).strip()
+            if compiled:
+                index[raw] = (index.get(raw, (None, ()))[0], tuple(compiled))
+        self._index = index
+
+    def _collapse(self, aliases: Dict[str, str]) -> Dict[str, str]:
+        """raw -> final target. Codes on (or leading into) a cycle are left unresolved."""
+        final: Dict[str, Optional[str]] = {}
+        for start in aliases:
+            if start in final:
+                continue
+            path: List[str] = []
+            on_path: Dict[str, int] = {}
+            node = start
+            while node in aliases and node not in final and node not in on_path:
+                on_path[node] = len(path)
+                path.append(node)
+                node = aliases[node]
+            if node in on_path:  # closed a loop
+                self.cycles.append(tuple(path[on_path[node]:]))
+                target: Optional[str] = None
+            else:
+                target = final[node] if node in final else node
+            for p in path:
+                final[p] = target
+        return {raw: to for raw, to in final.items() if to is not None and to != raw}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def resolve(
+        self,
+        raw: str,
+        engine_label: Optional[str] = None,
+        *,
+        year: Optional[int] = None,
+        make: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """Canonical engine_code for `raw`; raw (stripped) when nothing maps it."""
+        if not raw:
+            return raw
+        r = str(raw).strip()
+        entry = self._index.get(r)
+        if entry is None:
+            return r
+        alias, rules = entry
+        if rules:
+            picked = self._pick(rules, year, _norm(make) if make else "", _norm(model) if model else "")
+            if picked:
+                return picked
+        return alias or r
+
+    @staticmethod
+    def _pick(rules: Tuple[_Rule, ...], year: Optional[int], make_n: str, model_n: str) -> Optional[str]:
+        best, best_score = None, -1
+        for rule_make, rule_model, y0, y1, to, base, year_bonus in rules:
+            # Make (if specified in rule) must match; without a make it can't be validated
+            if rule_make and (not make_n or rule_make != make_n):
+                continue
+            if rule_model and (not model_n or rule_model != model_n):
+                continue
+            bounded = year is not None and y0 is not None and y1 is not None
+            if bounded and not (y0 <= year <= y1):
+                continue
+            score = base + (year_bonus if bounded else 0)
+            if score > best_score:
+                best, best_score = to, score
+        return best
+
+    def resolve_many(
+        self,
+        raws: Iterable[str],
+        *,
+        year: Optional[int] = None,
+        make: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> List[str]:
+        """resolve() for several codes sharing one vehicle context; empty codes are dropped."""
+        make_n = _norm(make) if make else ""
+        model_n = _norm(model) if model else ""
+        out: List[str] = []
+        for raw in raws:
+            if not raw:
+                continue
+            r = str(raw).strip()
+            entry = self._index.get(r)
+            if entry is None:
+                out.append(r)
+                continue
+            alias, rules = entry
+            picked = self._pick(rules, year, make_n, model_n) if rules else None
+            out.append(picked or alias or r)
+        return out
+
+    def resolve_vehicle(self, vehicle: Dict[str, Any], year: Optional[int] = None) -> List[str]:
+        """Canonical codes of a vehicles.json row; without `year`, the union over its year range."""
+        codes = vehicle.get("engine_codes") or []
+        make, model = vehicle.get("make"), vehicle.get("model")
+        if year is not None:
+            return self.resolve_many(codes, year=year, make=make, model=model)
+        y0, y1 = _as_int(vehicle.get("year_min")), _as_int(vehicle.get("year_max"))
+        years = range(y0, y1 + 1) if (y0 is not None and y1 is not None and y0 <= y1) else [None]
+        out: Dict[str, None] = {}
+        for y in years:
+            out.update(dict.fromkeys(self.resolve_many(codes, year=y, make=make, model=model)))
+        return list(out)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "aliases": len(self.aliases),
+            "disambiguated": sum(1 for _, rules in self._index.values() if rules),
+            "cycles": [list(c) for c in self.cycles],
+        }
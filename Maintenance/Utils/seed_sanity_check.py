@@ -14,9 +14,15 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from collections import Counter
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from Maintenance.Utils.engine_resolver import EngineResolver  # noqa: E402
+
 
 def _load_json(path: str) -> Any:
     with open(path, "r", encoding="utf-8") as f:
@@ -91,12 +97,12 @@ def _resolve_paths(repo_root: str) -> Dict[str, str]:
     return resolved  # type: ignore
 
 
-def _vehicle_engine_codes(vehicles_obj: Dict[str, Any]) -> List[str]:
+def _vehicle_engine_codes(vehicles_obj: Dict[str, Any], resolver: EngineResolver) -> List[str]:
+    """Canonical codes (as the API resolves them), so seed coverage matches what users see."""
     out: List[str] = []
     for v in vehicles_obj.get("vehicles", []):
-        for ec in (v.get("engine_codes") or []):
-            if isinstance(ec, str) and ec.strip():
-                out.append(ec.strip())
+        codes = [ec for ec in (v.get("engine_codes") or []) if isinstance(ec, str) and ec.strip()]
+        out.extend(resolver.resolve_vehicle({**v, "engine_codes": codes}))
     return out
 
 
@@ -208,7 +214,10 @@ def main() -> int:
         return 2
 
     # vehicle sets + counts
-    vehicle_codes = _vehicle_engine_codes(vehicles)
+    resolver = EngineResolver()
+    if resolver.cycles:
+        print(f"WARNING: engine alias cycles (left unresolved): {resolver.cycles}\n")
+    vehicle_codes = _vehicle_engine_codes(vehicles, resolver)
     vehicle_set = set(vehicle_codes)
     vehicle_counts = Counter(vehicle_codes)
 
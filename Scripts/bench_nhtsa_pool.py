@@ -0,0 +1,109 @@
+# Scripts/bench_nhtsa_pool.py
+# Run from project root:
+#   python Scripts/bench_nhtsa_pool.py [--requests 400] [--concurrency 16]
+#
+# Benchmarks VIN decode transport against a local keep-alive stub server:
+# 1) bare requests.get (new connection per call, today's behavior)
+# 2) the pooled session from api/core/nhtsa_client.py
+#
+# The stub counts accepted TCP connections, so connection reuse is visible
+# even though there is no TLS handshake on localhost.
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import requests  # noqa: E402
+
+from api.core import nhtsa_client  # noqa: E402
+
+STUB_BODY = json.dumps(
+    {
+        "Count": 1,
+        "Message": "Results returned successfully",
+        "Results": [{"ModelYear": "2016", "Make": "CHEVROLET", "Model": "Silverado", "DisplacementL": "5.3"}],
+    }
+).encode("utf-8")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_BODY)))
+        self.end_headers()
+        self.wfile.write(STUB_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    request_queue_size = 128  # default backlog of 5 turns bursts into SYN retries
+
+
+def _start_stub():
+    server = _StubServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run(label, server, fn, n, concurrency):
+    url = f"http://127.0.0.1:{server.server_port}/DecodeVinValuesExtended/1GCVKREC0GZ000000?format=json"
+    with server.lock:
+        server.connections = 0
+    lat = []
+
+    def one(_):
+        t0 = time.perf_counter()
+        fn(url)
+        lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, range(n)))
+    elapsed = time.perf_counter() - t0
+
+    lat.sort()
+    p50 = lat[len(lat) // 2] * 1000
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000
+    print(f"{label:<14} {n / elapsed:>8.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms   connections {server.connections}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+
+    server = _start_stub()
+    timeout = (nhtsa_client.CONNECT_TIMEOUT, nhtsa_client.READ_TIMEOUT)
+
+    print(f"\n=== NHTSA transport benchmark ({args.requests} requests, {args.concurrency} threads) ===\n")
+    _run("bare get", server, lambda u: requests.get(u, timeout=timeout).json(), args.requests, args.concurrency)
+    _run("pooled session", server, lambda u: nhtsa_client.get_json(u), args.requests, args.concurrency)
+    print(f"\nPool size: {nhtsa_client.POOL_SIZE} (NHTSA_POOL_SIZE)\n")
+
+    nhtsa_client.close_session()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,25 @@
 #   python Scripts/sanity_check_aliases.py
 #
 # What it checks:
-# 1) Alias targets exist in Oil_change_specs_seed.json
-# 2) Counts how many engine_codes in Engines/engines.json lack specs (after alias resolution)
+# 0) The alias map has no cycles
+# 1) Alias targets exist in oil_specs_seed.json
+# 2) Counts how many engine_codes in data/canonical/engines.json lack specs (after alias resolution)
 # 3) Lists top missing codes so you know what actually matters (US-only)
 
 import json
+import sys
 from pathlib import Path
 from collections import Counter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from Maintenance.Utils.engine_resolver import EngineResolver  # noqa: E402
+
 # --- Paths (adjust only if your filenames differ) ---
-ALIAS_PATH = Path("Maintenance/Contracts/Seeds/engine_alias_map.json")
-SPECS_PATH = Path("Maintenance/Contracts/Seeds/Oil_change_specs_seed.json")  # adjust if different
-ENGINES_PATH = Path("Engines/engines.json")  # adjust if different
+ALIAS_PATH = Path("data/canonical/engine_alias_map.json")
+DISAMBIGUATION_PATH = Path("data/canonical/engine_disambiguation_map.json")
+SPECS_PATH = Path("Maintenance/Seeds/oil_specs_seed.json")  # adjust if different
+ENGINES_PATH = Path("data/canonical/engines.json")  # adjust if different
 
 def load_json(path: Path):
     if not path.exists():
@@ -23,12 +30,12 @@ def load_json(path: Path):
         return json.load(f)
 
 def main():
-    alias_doc = load_json(ALIAS_PATH)
-    alias_map = alias_doc.get("engine_alias_map", {})
+    load_json(ALIAS_PATH)  # fail loudly if missing; the resolver itself tolerates it
+    resolver = EngineResolver(ALIAS_PATH, DISAMBIGUATION_PATH)
+    alias_map = resolver.aliases  # chains already collapsed to their final target
 
     specs_doc = load_json(SPECS_PATH)
-    specs_seed = specs_doc.get("oil_change_specs_seed", {})
-    specs_keys = set(specs_seed.keys())
+    specs_keys = {i.get("engine_code") for i in specs_doc.get("items", []) if isinstance(i, dict) and i.get("engine_code")}
 
     engines_doc = load_json(ENGINES_PATH)
     # engines.json is expected to be: { "ENGINE_CODE": {...meta...}, ... }
@@ -39,14 +46,9 @@ def main():
     missing_alias_targets = sorted({t for t in alias_targets if t not in specs_keys})
 
     # --- 2) Coverage check: after resolving each engine_code, do we have specs? ---
-    def resolve(code_or_label: str) -> str:
-        return alias_map.get(code_or_label, code_or_label)
-
-    missing_after_resolve = []
-    for code in engine_codes:
-        canonical = resolve(code)
-        if canonical not in specs_keys:
-            missing_after_resolve.append(code)
+    missing_after_resolve = [
+        code for code, canonical in zip(engine_codes, resolver.resolve_many(engine_codes)) if canonical not in specs_keys
+    ]
 
     # Frequency of missing (helps find common blockers)
     missing_counts = Counter(missing_after_resolve)
@@ -58,6 +60,15 @@ def main():
     print(f"Specs entries:      {len(specs_keys)}")
     print(f"Engines entries:    {len(engine_codes)}\n")
 
+    print("0) Alias cycles:")
+    if not resolver.cycles:
+        print("   ✅ None.\n")
+    else:
+        print(f"   ❌ {len(resolver.cycles)} cycles (codes on them stay unresolved):")
+        for cycle in resolver.cycles:
+            print(f"    - {' -> '.join(cycle + cycle[:1])}")
+        print()
+
     print("1) Alias targets missing from specs:")
     if not missing_alias_targets:
         print("   ✅ None. All alias targets exist in Oil_change_specs_seed.\n")
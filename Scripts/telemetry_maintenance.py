@@ -0,0 +1,62 @@
+# Scripts/telemetry_maintenance.py
+# Run from project root:
+#   python Scripts/telemetry_maintenance.py [--retention-months 13] [--vacuum-pages 0] [--convert] [--dry-run]
+#
+# Housekeeping for Maintenance/Data/vin_events.db (VIN resolution telemetry):
+# 1) retention: monthly partitions (vin_events_YYYYMM) older than --retention-months are
+#    rolled into vin_events_summary and dropped; rollups not seen since then are deleted
+# 2) PRAGMA incremental_vacuum (all free pages, or --vacuum-pages at most)
+# 3) ANALYZE + PRAGMA optimize, then a WAL checkpoint
+#
+# Safe to run while the API is up (WAL mode; retention is one short transaction).
+# Schedule it, e.g. nightly via cron:
+#   15 3 * * *  cd /srv/vehicle_data && python Scripts/telemetry_maintenance.py
+#
+# Databases created before auto_vacuum=INCREMENTAL need a one-time --convert (full VACUUM).
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.core.telemetry_store import TelemetryStore  # noqa: E402
+from api.data.paths import VIN_DB_PATH  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Retention + incremental VACUUM/ANALYZE for vin_events.db")
+    ap.add_argument("--db", default=str(VIN_DB_PATH))
+    ap.add_argument(
+        "--retention-months",
+        type=int,
+        default=int(os.getenv("TELEMETRY_RETENTION_MONTHS", "13")),
+        help="months of per-signature partitions to keep (current month included)",
+    )
+    ap.add_argument("--vacuum-pages", type=int, default=0, help="max free pages to release (0 = all)")
+    ap.add_argument("--convert", action="store_true", help="one-time full VACUUM to enable incremental vacuum")
+    ap.add_argument("--dry-run", action="store_true", help="only report which partitions would be rolled up")
+    args = ap.parse_args()
+
+    db = Path(args.db)
+    if not db.exists():
+        print(f"no database at {db}; nothing to do")
+        return 0
+
+    store = TelemetryStore(db)
+    try:
+        report = {"db": str(db), "retention": store.apply_retention(args.retention_months, dry_run=args.dry_run)}
+        if not args.dry_run:
+            report["maintenance"] = store.maintain(vacuum_pages=args.vacuum_pages, convert=args.convert)
+        report["partitions"] = store.partitions()
+    finally:
+        store.close()
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
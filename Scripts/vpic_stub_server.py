@@ -0,0 +1,258 @@
+# Scripts/vpic_stub_server.py
+# Run from project root:
+#   python Scripts/vpic_stub_server.py [--port 8090] [--mode replay|record]
+#                                      [--latency-ms 40] [--jitter-ms 20]
+#                                      [--slow-rate 0.01] [--slow-ms 1000]
+#                                      [--error-rate 0.0] [--seed 1]
+#
+# Local stand-in for the NHTSA vPIC API so VIN paths can be measured offline:
+#   GET  /api/vehicles/DecodeVinValuesExtended/<VIN>?format=json
+#   POST /api/vehicles/DecodeVINValuesBatch/      (form: format=json, data=VIN;VIN;...)
+#   GET  /__stats                                 (request / connection / error counters)
+#
+# Point the API at it with:
+#   NHTSA_BASE_URL=http://127.0.0.1:8090/api/vehicles
+#
+# replay: answers from Scripts/fixtures/vpic/<VIN>.json. Unknown VINs fall back to a
+#         fixture with the same VIN pattern (positions 1-8 + 10-11), then to vPIC's
+#         "no detailed data" row, so any serial number of a recorded vehicle works.
+# record: proxies to --upstream and writes each decoded VIN to the fixtures dir.
+#
+# Latency/errors are drawn from a seeded RNG so runs are repeatable.
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "vpic"
+UPSTREAM = "https://vpic.nhtsa.dot.gov/api/vehicles"
+
+SINGLE_PREFIX = "/api/vehicles/decodevinvaluesextended/"
+BATCH_PREFIX = "/api/vehicles/decodevinvaluesbatch"
+
+NO_DATA_ERROR = "8 - No detailed data available currently"
+
+
+def _pattern(vin: str) -> str:
+    # VDS (4-8) + model year (10) + plant (11); skips the check digit and serial.
+    return vin[:8] + vin[9:11]
+
+
+class FixtureStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+        self._by_vin: Dict[str, Dict[str, Any]] = {}
+        self._by_pattern: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.root.glob("*.json")):
+            try:
+                doc = json.loads(path.read_text(encoding="utf-8"))
+                row = (doc.get("Results") or [{}])[0]
+            except Exception as e:
+                print(f"skipping {path.name}: {e}", file=sys.stderr)
+                continue
+            self._index(path.stem.upper(), row)
+
+    def _index(self, vin: str, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._by_vin[vin] = row
+            self._by_pattern.setdefault(_pattern(vin), row)
+
+    def __len__(self) -> int:
+        return len(self._by_vin)
+
+    def row(self, vin: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._by_vin.get(vin) or self._by_pattern.get(_pattern(vin))
+        if row is None:
+            return {"VIN": vin, "ErrorCode": "8", "ErrorText": NO_DATA_ERROR,
+                    "Make": "", "Model": "", "ModelYear": "", "DisplacementL": "", "EngineModel": ""}
+        return {**row, "VIN": vin}
+
+    def save(self, vin: str, doc: Dict[str, Any]) -> None:
+        (self.root / f"{vin}.json").write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+        self._index(vin, (doc.get("Results") or [{}])[0])
+
+
+def _envelope(rows: List[Dict[str, Any]], criteria: str) -> Dict[str, Any]:
+    return {"Count": len(rows), "Message": "Results returned successfully", "SearchCriteria": criteria, "Results": rows}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    server: "VpicStubServer"
+
+    def setup(self):
+        super().setup()
+        self.server.bump("connections")
+
+    def log_message(self, fmt, *args):  # quiet
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _inject(self) -> bool:
+        """Sleep per the latency profile; return True when this request should fail."""
+        delay_s, fail = self.server.draw()
+        if delay_s > 0:
+            time.sleep(delay_s)
+        if fail:
+            self.server.bump("errors")
+            self._send(503, {"Message": "Service Unavailable (injected)"})
+        return fail
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path.lower()
+        if path == "/__stats":
+            return self._send(200, self.server.stats())
+        if not path.startswith(SINGLE_PREFIX):
+            return self._send(404, {"Message": "not found"})
+
+        self.server.bump("requests")
+        if self._inject():
+            return
+        vin = unquote(parts.path[len(SINGLE_PREFIX):]).strip("/").upper()
+        if self.server.mode == "record":
+            return self._record_single(vin, parts.query)
+        self._send(200, _envelope([self.server.fixtures.row(vin)], f"VIN:{vin}"))
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.lower().rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if path != BATCH_PREFIX:
+            return self._send(404, {"Message": "not found"})
+
+        self.server.bump("requests")
+        self.server.bump("batch_requests")
+        if self._inject():
+            return
+        raw = (parse_qs(body).get("data") or [""])[0]
+        vins = [v.strip().upper() for v in raw.split(";") if v.strip()]
+        if self.server.mode == "record":
+            return self._record_batch(vins, body)
+        self._send(200, _envelope([self.server.fixtures.row(v) for v in vins], ""))
+
+    def _record_single(self, vin: str, query: str) -> None:
+        url = f"{self.server.upstream}/DecodeVinValuesExtended/{vin}?{query or 'format=json'}"
+        try:
+            r = self.server.session.get(url, timeout=(3.05, 15))
+            doc = r.json()
+        except Exception as e:
+            return self._send(502, {"Message": f"upstream error: {e}"})
+        if r.ok and doc.get("Results"):
+            self.server.fixtures.save(vin, doc)
+            self.server.bump("recorded")
+        self._send(r.status_code, doc)
+
+    def _record_batch(self, vins: List[str], body: str) -> None:
+        try:
+            r = self.server.session.post(
+                f"{self.server.upstream}/DecodeVINValuesBatch/", data=body,
+                headers={"Content-Type": "application/x-www-form-urlencoded"}, timeout=(3.05, 30))
+            doc = r.json()
+        except Exception as e:
+            return self._send(502, {"Message": f"upstream error: {e}"})
+        if r.ok:
+            for row in doc.get("Results") or []:
+                vin = str(row.get("VIN") or "").upper()
+                if vin:
+                    self.server.fixtures.save(vin, _envelope([row], f"VIN:{vin}"))
+                    self.server.bump("recorded")
+        self._send(r.status_code, doc)
+
+
+class VpicStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # load tests open many connections at once
+
+    def __init__(self, addr, *, fixtures: FixtureStore, mode: str = "replay", upstream: str = UPSTREAM,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, slow_rate: float = 0.0,
+                 slow_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(addr, _Handler)
+        self.fixtures = fixtures
+        self.mode = mode
+        self.upstream = upstream.rstrip("/")
+        self.session = requests.Session()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counters = {"connections": 0, "requests": 0, "batch_requests": 0, "errors": 0, "recorded": 0}
+
+    def draw(self) -> tuple:
+        with self._lock:
+            delay_ms = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            if self.slow_rate and self._rng.random() < self.slow_rate:
+                delay_ms += self.slow_ms
+            fail = bool(self.error_rate) and self._rng.random() < self.error_rate
+        return delay_ms / 1000.0, fail
+
+    def bump(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "fixtures": len(self.fixtures), "mode": self.mode}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local vPIC stand-in with record/replay fixtures.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--mode", choices=("replay", "record"), default="replay")
+    ap.add_argument("--upstream", default=UPSTREAM, help="real vPIC base URL (record mode)")
+    ap.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="base latency added to every response")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="uniform extra latency in [0, jitter]")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="fraction of responses that get --slow-ms extra")
+    ap.add_argument("--slow-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    fixtures = FixtureStore(Path(args.fixtures))
+    srv = VpicStubServer(
+        (args.host, args.port), fixtures=fixtures, mode=args.mode, upstream=args.upstream,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms, error_rate=args.error_rate, seed=args.seed,
+    )
+    host, port = srv.server_address[:2]
+    print(f"vPIC stub ({args.mode}, {len(fixtures)} fixtures) on http://{host}:{port}/api/vehicles")
+    print(f"  NHTSA_BASE_URL=http://{host}:{port}/api/vehicles")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
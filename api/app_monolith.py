@@ -8,6 +8,20 @@ import math
 from appv6 import load_json
 from api.data.paths import ENGINE_AIR_FILTER_GROUPS_PATH
 from api.core.purchase_links import build_buy_links
+from api.core import nhtsa_client, paging
+from api.core.circuit_breaker import CircuitBreaker
+from api.core.singleflight import SingleFlight
+from api.core.telemetry_store import RollupWriter, TelemetryStore
+from api.core.ttl_cache import TTLCache
+from api.data.snapshot import Snapshot
+from api.data import sync_manifest
+from api.domain.deletion_index import DeletionIndex
+from api.domain.engine_features import NUMPY_AVAILABLE, EngineFeatureTable
+from api.domain.part_index import PartIndex, iter_parts
+from api.domain.prefix_trie import TopKTrie
+from api.domain.text_index import TokenIndex, tokenize
+from api.domain.vin_decoder import decode_vin_local, validate_vin
+from Maintenance.Utils.engine_resolver import EngineResolver
 
 
 
@@ -32,16 +46,23 @@ def _dedupe_candidates(cands, year=None):
         seen.add(key)
         out.append(c)
     return out
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_left
 from pathlib import Path
+import asyncio
+import copy
 import hashlib
 import json
+import os
 import re
-import sqlite3
+import threading
+import time
 from typing import Any, Dict, Optional
 
 from fastapi import Body, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 try:
     import requests
@@ -67,6 +88,9 @@ SEEDS = ROOT / "Maintenance" / "Seeds"
 VEHICLES_PATH = DATA / "vehicles.json"
 ENGINES_PATH = DATA / "engines.json"
 
+# Parsed catalog + anything derived from it; rebuilt when either file changes on disk.
+CATALOG = Snapshot({"vehicles": VEHICLES_PATH, "engines": ENGINES_PATH})
+
 print("ROOT =", ROOT)
 print("VEHICLES_PATH =", VEHICLES_PATH)
 print("VEHICLES_PATH exists =", VEHICLES_PATH.exists())
@@ -532,6 +556,14 @@ def maintenance_bundle(req: MaintenanceBundleRequest):
 
 # Absolute, stable DB path (prevents CWD-dependent failures when running uvicorn)
 VIN_DB_PATH = ROOT / "Maintenance" / "Data" / "vin_events.db"
+TELEMETRY = TelemetryStore(VIN_DB_PATH)
+# Rollups are write-behind: handlers enqueue, a background thread batches them into SQLite.
+ROLLUPS = RollupWriter(
+    TELEMETRY,
+    flush_ms=int(os.getenv("TELEMETRY_FLUSH_MS", "1000")),
+    flush_events=int(os.getenv("TELEMETRY_FLUSH_EVENTS", "500")),
+    max_pending=int(os.getenv("TELEMETRY_MAX_PENDING", "10000")),
+)
 
 
 
@@ -567,88 +599,8 @@ def norm(s: Any) -> str:
 ENGINE_ALIAS_PATH = DATA / "engine_alias_map.json"
 ENGINE_DISAMBIGUATION_PATH = DATA / "engine_disambiguation_map.json"
 
-
-def load_engine_alias_map() -> Dict[str, str]:
-    try:
-        with open(ENGINE_ALIAS_PATH, "r", encoding="utf-8") as f:
-            return (json.load(f) or {}).get("engine_alias_map", {}) or {}
-    except Exception:
-        return {}
-
-
-def load_engine_disambiguation() -> Dict[str, Any]:
-    try:
-        with open(ENGINE_DISAMBIGUATION_PATH, "r", encoding="utf-8") as f:
-            doc = json.load(f) or {}
-            return doc.get("disambiguation", {}) or {}
-    except Exception:
-        return {}
-
-
-ENGINE_ALIAS_MAP: Dict[str, str] = load_engine_alias_map()
-ENGINE_DISAMBIGUATION: Dict[str, Any] = load_engine_disambiguation()
-
-
-def _resolve_via_disambiguation(
-    raw: str,
-    *,
-    year: int | None = None,
-    make: str | None = None,
-    model: str | None = None,
-) -> Optional[str]:
-    rules = ENGINE_DISAMBIGUATION.get(raw)
-    if not rules or not isinstance(rules, list):
-        return None
-
-    make_n = norm(make) if make else ""
-    model_n = norm(model) if model else ""
-
-    best = None
-    best_score = -1
-
-    for rule in rules:
-        if not isinstance(rule, dict):
-            continue
-
-        # Make (if specified in rule) must match
-        rule_make = rule.get("make")
-        if rule_make and make_n and norm(rule_make) != make_n:
-            continue
-        if rule_make and not make_n:
-            # can't validate make, treat as non-match
-            continue
-
-        # Model (optional) must match if present in rule
-        rule_model = rule.get("model")
-        if rule_model:
-            if not model_n or norm(rule_model) != model_n:
-                continue
-
-        # Year range (optional) must contain year if year provided
-        y0 = as_int(rule.get("year_min"))
-        y1 = as_int(rule.get("year_max"))
-        if year is not None and y0 is not None and y1 is not None:
-            if not (y0 <= year <= y1):
-                continue
-
-        to = rule.get("canonical_engine_code") or rule.get("engine_code_canonical")
-        if not to:
-            continue
-
-        # Score: prefer model-specific, then tighter year, then make match
-        score = 0
-        if rule_model:
-            score += 10
-        if rule_make:
-            score += 5
-        if year is not None and y0 is not None and y1 is not None:
-            span = max(0, y1 - y0)
-            score += max(0, 100 - span)  # tighter range wins
-        if score > best_score:
-            best_score = score
-            best = str(to).strip()
-
-    return best
+# Alias chains collapsed + disambiguation rules, compiled once (shared with Maintenance scripts).
+ENGINE_RESOLVER = EngineResolver(ENGINE_ALIAS_PATH, ENGINE_DISAMBIGUATION_PATH)
 
 
 def resolve_engine_code(
@@ -663,25 +615,10 @@ def resolve_engine_code(
 
     Order:
     1) Disambiguation map (make/year/model context)
-    2) Alias map (simple raw -> canonical)
+    2) Alias map (simple raw -> canonical, chains followed to the end)
     3) Raw passthrough
     """
-    if not raw:
-        return raw
-
-    r = str(raw).strip()
-
-    # 1) Disambiguation map
-    resolved = _resolve_via_disambiguation(r, year=year, make=make, model=model)
-    if resolved:
-        return resolved
-
-    # 2) Alias map
-    if r in ENGINE_ALIAS_MAP:
-        return ENGINE_ALIAS_MAP[r]
-
-    return r
-
+    return ENGINE_RESOLVER.resolve(raw, engine_label, year=year, make=make, model=model)
 
 
 def engine_display_name(engine_code: str, *, vehicle_engine_label: str | None = None, engines_doc: dict | None = None) -> str:
@@ -920,17 +857,31 @@ def reload_all():
 
 
 
-@app.post("/vin/resolve_and_bundle")
-def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
+def vin_resolve_and_bundle(payload: Dict[str, Any]):
     """
     Convenience endpoint: resolve VIN and, when possible, return the full maintenance bundle in one call.
     Statuses:
       - READY: bundle present
       - NEEDS_ENGINE_CONFIRMATION: engine_choices present
       - NEEDS_VEHICLE_CONFIRMATION: vehicle_candidates present
+      - PARTIAL: NHTSA unavailable; locally decoded year/make + models present
       - passthrough: ERROR / UNSUPPORTED
     """
-    vin_result = vin_resolve(payload)
+    return _bundle_for_vin_result(vin_resolve(payload))
+
+
+@app.post("/vin/resolve_and_bundle")
+async def vin_resolve_and_bundle_async(payload: Dict[str, Any] = Body(...)):
+    vin_result = await vin_resolve_async(payload)
+    return await run_in_threadpool(_bundle_for_vin_result, vin_result)
+
+
+def _bundle_for_vin_result(vin_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a /vin/resolve result to a bundle response (statuses: see vin_resolve_and_bundle).
+
+    PARTIAL (vPIC down, year/make decoded from the VIN itself) keeps decoded/error/models
+    for the client's model picker, with "bundle": None.
+    """
     status = vin_result.get("status")
 
     if status == "RESOLVED":
@@ -966,6 +917,7 @@ def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
             return {
                 "status": "NEEDS_VEHICLE_CONFIRMATION",
                 "vin_hash": vin_result.get("vin_hash"),
+                "signature": vin_result.get("signature"),
                 "decoded": vin_result.get("decoded"),
                 "vehicle_candidates": vin_result.get("vehicle_candidates"),
             }
@@ -973,9 +925,22 @@ def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
         return {
             "status": "NEEDS_ENGINE_CONFIRMATION",
             "vin_hash": vin_result.get("vin_hash"),
+            "signature": vin_result.get("signature"),
             "decoded": vin_result.get("decoded"),
             "vehicle": vin_result.get("vehicle"),
             "engine_choices": vin_result.get("engine_choices"),
+            **({k: vin_result[k] for k in ("matched_via", "warning") if k in vin_result}),
+            "bundle": None,
+        }
+
+    if status == "PARTIAL":
+        # NHTSA down: year/make came from the VIN itself, client picks the model
+        return {
+            "status": "PARTIAL",
+            "vin_hash": vin_result.get("vin_hash"),
+            "decoded": vin_result.get("decoded"),
+            "error": vin_result.get("error"),
+            "models": vin_result.get("models"),
             "bundle": None,
         }
 
@@ -989,6 +954,22 @@ def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
     }
 
 
+@app.on_event("startup")
+def _init_telemetry():
+    # Schema + WAL once per process instead of CREATE TABLE on every rollup.
+    TELEMETRY.init_schema()
+    ROLLUPS.start()
+    _confirmed_mappings()  # warm, so the first /vin/resolve doesn't read SQLite
+
+
+@app.on_event("shutdown")
+async def _close_http_clients():
+    nhtsa_client.close_session()
+    await nhtsa_client.aclose_async_client()
+    ROLLUPS.stop()  # flush queued rollups
+    TELEMETRY.close()
+
+
 @app.get("/health")
 def health():
     return {
@@ -1004,15 +985,47 @@ def health():
             "/years",
             "/makes?year=YYYY",
             "/models?year=YYYY&make=MAKE",
+            "/autocomplete?field=make|model&prefix=PREFIX&year=YYYY&make=MAKE",
             "/vehicles/search?year=YYYY&make=MAKE&model=MODEL",
+            "/vehicles/search?q=2016+silverado+5.3",
+            "/vehicles/search?...&limit=N&cursor=NEXT_CURSOR&fields=vehicle_id,model&compat=false",
+            "/catalog/export?make=MAKE&year_from=YYYY&year_to=YYYY",
+            "/sync?since=VERSION",
             "/vin/resolve",
+            "/vin/resolve_batch",
+            "/vin/stats",
+            "/vin/confirm",
+            "/vin/decision_table?year=YYYY&make=MAKE&model=MODEL",
+            "/telemetry/top?status=UNSUPPORTED&limit=20",
+            "/telemetry/status_mix?days=30",
+            "/telemetry/versions",
+            "/telemetry/monthly",
+            "/engines/match?displacement_l=5.3&cylinders=8&fuel_type=gasoline&make=MAKE&year=YYYY",
+            "/engines/ENGINE_CODE",
+            "/parts/BRAND/PART_NUMBER/fitment",
             "/oil-change/by-engine?engine_code=ENGINE_CODE",
         ],
     }
 
 
+def _name_page(items: list, limit: Optional[int], cursor: Optional[str], scope: str):
+    """Plain sorted list as before, or {"items", "total", "count", "next_cursor"} once the
+    client pages with limit/cursor."""
+    if limit is None and not cursor:
+        return items
+    generation = CATALOG.get().generation
+    try:
+        offset = paging.decode_cursor(cursor, generation, scope)
+    except paging.PagingError as e:
+        return e.as_dict()
+    start, end, next_cursor = paging.page(
+        len(items), offset, min(int(limit or SEARCH_MAX_LIMIT), SEARCH_MAX_LIMIT), generation, scope
+    )
+    return {"items": items[start:end], "total": len(items), "count": end - start, "next_cursor": next_cursor}
+
+
 @app.get("/years")
-def get_years():
+def get_years(limit: Optional[int] = None, cursor: Optional[str] = None):
     vehicles_doc, *_ = reload_all()
     years = set()
     for v in vehicles_doc.get("vehicles", []):
@@ -1020,11 +1033,11 @@ def get_years():
         y1 = v.get("year_max")
         if isinstance(y0, int) and isinstance(y1, int):
             years.update(range(y0, y1 + 1))
-    return sorted(years)
+    return _name_page(sorted(years), limit, cursor, paging.scope_of("years"))
 
 
 @app.get("/makes")
-def get_makes(year: int):
+def get_makes(year: int, limit: Optional[int] = None, cursor: Optional[str] = None):
     vehicles_doc, *_ = reload_all()
 
     makes = set()
@@ -1040,12 +1053,12 @@ def get_makes(year: int):
             if m:
                 makes.add(m)
 
-    return sorted(makes)
+    return _name_page(sorted(makes), limit, cursor, paging.scope_of("makes", year))
 
 
 
 @app.get("/models")
-def get_models(year: int, make: str):
+def get_models(year: int, make: str, limit: Optional[int] = None, cursor: Optional[str] = None):
     vehicles_doc, *_ = reload_all()
     make_n = norm(make)
 
@@ -1061,37 +1074,175 @@ def get_models(year: int, make: str):
             if md:
                 models.add(md)
 
-    return sorted(models)
+    return _name_page(sorted(models), limit, cursor, paging.scope_of("models", year, make_n))
 
 
+# ---------------- Autocomplete (make / model pickers) ----------------
 
-def _search_impl(year, make, model):
-    vehicles_doc, *_ = reload_all()
+def _build_catalog_scopes(snap) -> Dict[tuple, tuple]:
+    """(year, make_n) -> catalog rows, for every scope with rows: each (year, make) pair plus
+    the year-only (year, None), make-only (None, make) and global (None, None) scopes.
+    Derived structures keyed by client-supplied year/make are only cached for these keys."""
+    scopes: Dict[tuple, Dict[int, dict]] = {}
+    for (y, mk), group in snap.cached("year_make_index", _build_year_make_index).items():
+        for key in ((y, mk), (y, None), (None, mk), (None, None)):
+            rows = scopes.setdefault(key, {})
+            for v in group.vehicles:
+                rows.setdefault(id(v), v)  # a row spans many years; count it once
+    return {key: tuple(rows.values()) for key, rows in scopes.items()}
 
-    make_n = norm(make)
-    model_n = norm(model)
 
-    out = []
+def _catalog_scope(snap, year: Optional[int], make_n: Optional[str]) -> Optional[tuple]:
+    """Rows of a (year, make) scope; None when the catalog has nothing there."""
+    return snap.cached("catalog_scopes", _build_catalog_scopes).get((year, make_n or None))
 
-    for v in vehicles_doc.get("vehicles", []):
+
+def _name_weights(snap, field: str, year: Optional[int], make_n: Optional[str]) -> Dict[str, int]:
+    """Catalog make/model names in a (year, make) scope -> number of rows (configurations) using them."""
+    weights: Dict[str, int] = {}
+    for v in _catalog_scope(snap, year, make_n) or ():
+        name = v.get(field)
+        if name:
+            weights[name] = weights.get(name, 0) + 1
+    return weights
+
+
+AUTOCOMPLETE_TOP_K = int(os.getenv("AUTOCOMPLETE_TOP_K", "10"))
+
+
+def _build_autocomplete(snap, field: str, year: Optional[int], make_n: Optional[str]) -> TopKTrie:
+    """One trie per (field, year, make) scope. Names are ranked by how many catalog rows
+    (configurations) they cover, then alphabetically; "F150" and "f-150" reach "F-150"."""
+    trie = TopKTrie(AUTOCOMPLETE_TOP_K)
+    for name, w in _name_weights(snap, field, year, make_n).items():
+        trie.add(norm(name), name, w)
+        trie.add(_key_alnum(name), name, w)
+    return trie.freeze()
+
+
+@app.get("/autocomplete")
+def autocomplete(field: str, prefix: str = "", year: Optional[int] = None, make: Optional[str] = None, limit: int = 10):
+    """Top completions for the make/model pickers, e.g. /autocomplete?field=model&year=2016&make=chevrolet&prefix=sil
+
+    Returns only the best `limit` names (<= AUTOCOMPLETE_TOP_K) instead of full /makes or /models lists.
+    """
+    field = str(field or "").strip().lower()
+    if field not in ("make", "model"):
+        return {"status": "ERROR", "error": "INVALID_FIELD", "allowed": ["make", "model"]}
+    make_n = norm(make) if (make and field == "model") else None
+
+    snap = CATALOG.get()
+    if _catalog_scope(snap, year, make_n) is None:
+        # unknown year/make: nothing to complete, and nothing cached for arbitrary input
+        return {"field": field, "prefix": prefix, "year": year, "make": make, "completions": []}
+    trie = snap.cached(
+        ("autocomplete", field, year, make_n),
+        lambda snap: _build_autocomplete(snap, field, year, make_n),
+    )
+    limit = max(1, min(int(limit), AUTOCOMPLETE_TOP_K))
+    p = norm(prefix)
+    completions = trie.complete(p, limit)
+    if not completions and p:
+        completions = trie.complete(_key_alnum(prefix), limit)
+    return {"field": field, "prefix": prefix, "year": year, "make": make, "completions": completions}
+
+
+
+class _YearMakeModels:
+    """Vehicles of one (year, make) in catalog order, with model names pre-normalized.
+
+    Exact lookups are dict probes; "starts with" goes through bisect over the sorted
+    keys, and "is a prefix of" probes each prefix of the wanted model.
+    """
+
+    def __init__(self, vehicles: list[dict]):
+        self.vehicles = vehicles
+        self.bonus = []
+        self.by_norm: Dict[str, list[int]] = {}
+        self.by_key: Dict[str, list[int]] = {}
+        norms, keys = [], []
+        for i, v in enumerate(vehicles):
+            cand_model = v.get("model") or ""
+            cand_norm, cand_key = norm(cand_model), _key_alnum(cand_model)
+            self.by_norm.setdefault(cand_norm, []).append(i)
+            self.by_key.setdefault(cand_key, []).append(i)
+            norms.append((cand_norm, i))
+            keys.append((cand_key, i))
+            # prefer tighter year ranges
+            span = max(0, as_int(v.get("year_max")) - as_int(v.get("year_min")))
+            self.bonus.append(max(0, 50 - min(50, span)))
+        self.sorted_norms = sorted(norms)
+        self.sorted_keys = sorted(keys)
+
+    def exact(self, model: Any) -> list[dict]:
+        return [self.vehicles[i] for i in self.by_norm.get(norm(model), [])]
+
+    @staticmethod
+    def _starting_with(sorted_pairs: list[tuple[str, int]], prefix: str) -> list[int]:
+        out = []
+        for k in range(bisect_left(sorted_pairs, (prefix,)), len(sorted_pairs)):
+            if not sorted_pairs[k][0].startswith(prefix):
+                break
+            out.append(sorted_pairs[k][1])
+        return out
+
+    @staticmethod
+    def _prefixes_of(index: Dict[str, list[int]], want: str) -> list[int]:
+        out = []
+        for n in range(1, len(want) + 1):
+            out.extend(index.get(want[:n], ()))
+        return out
+
+    def fuzzy(self, model: Any, limit: int = 8) -> list[dict]:
+        want_norm = norm(model)
+        want_key = _key_alnum(model)
+
+        # Highest applicable tier wins, as in the original if/elif chain.
+        base: Dict[int, int] = {}
+
+        def _tier(positions, score: int) -> None:
+            for i in positions:
+                if base.get(i, -1) < score:
+                    base[i] = score
+
+        _tier(self.by_norm.get(want_norm, ()), 1000)
+        if want_key:
+            _tier(self.by_key.get(want_key, ()), 900)
+        if want_norm:
+            _tier(self._starting_with(self.sorted_norms, want_norm), 800)
+        _tier(self._prefixes_of(self.by_norm, want_norm), 700)
+        if want_key:
+            _tier(self._starting_with(self.sorted_keys, want_key), 650)
+        _tier(self._prefixes_of(self.by_key, want_key), 600)
+
+        # score desc, ties in catalog order (same as the stable sort over a full scan)
+        ranked = sorted(base, key=lambda i: (-(base[i] + self.bonus[i]), i))
+        return [self.vehicles[i] for i in ranked[:limit]]
+
+
+def _build_year_make_index(snap) -> Dict[tuple, _YearMakeModels]:
+    groups: Dict[tuple, list[dict]] = {}
+    for v in (snap.docs.get("vehicles") or {}).get("vehicles", []):
+        if not isinstance(v, dict):
+            continue
         y0 = as_int(v.get("year_min"))
         y1 = as_int(v.get("year_max"))
-
         if y0 is None or y1 is None:
             continue
+        make_n = norm(v.get("make"))
+        for y in range(y0, y1 + 1):
+            groups.setdefault((y, make_n), []).append(v)
+    return {key: _YearMakeModels(vs) for key, vs in groups.items()}
 
-        if not (y0 <= year <= y1):
-            continue
-
-        if norm(v.get("make")) != make_n:
-            continue
 
-        if norm(v.get("model")) != model_n:
-            continue
+def _year_make_models(year: Any, make: Any) -> Optional[_YearMakeModels]:
+    """Catalog rows for (year, make), built once per catalog snapshot. Rows are shared: don't mutate."""
+    return CATALOG.get().cached("year_make_index", _build_year_make_index).get((as_int(year), norm(make)))
 
-        out.append(v)
 
-    return out
+def _search_impl(year, make, model):
+    group = _year_make_models(year, make)
+    return group.exact(model) if group else []
 
 def _key_alnum(s: Any) -> str:
     return re.sub(r"[^a-z0-9]+", "", norm(s))
@@ -1104,273 +1255,1761 @@ def _fuzzy_model_candidates(year: int, make: str, model: str, limit: int = 8) ->
     - Handles family names (Silverado -> Silverado 1500/2500HD/3500HD)
     - Returns sorted candidates with a simple score.
     """
-    vehicles_doc, *_ = reload_all()
+    group = _year_make_models(year, make)
+    return group.fuzzy(model, limit) if group else []
 
-    make_n = norm(make)
-    want_norm = norm(model)
-    want_key = _key_alnum(model)
 
-    scored: list[tuple[int, dict]] = []
+# ---------------- "Did you mean" (typos in make / model names) ----------------
 
-    for v in vehicles_doc.get("vehicles", []):
-        y0 = as_int(v.get("year_min"))
-        y1 = as_int(v.get("year_max"))
-        if y0 is None or y1 is None or not (y0 <= year <= y1):
-            continue
-        if norm(v.get("make")) != make_n:
-            continue
+SUGGEST_LIMIT = 5
 
-        cand_model = v.get("model") or ""
-        cand_norm = norm(cand_model)
-        cand_key = _key_alnum(cand_model)
-
-        score = -1
-        if cand_norm == want_norm:
-            score = 1000
-        elif cand_key == want_key and want_key:
-            score = 900
-        elif cand_norm.startswith(want_norm) and want_norm:
-            score = 800
-        elif want_norm.startswith(cand_norm) and cand_norm:
-            score = 700
-        elif want_key and cand_key.startswith(want_key):
-            score = 650
-        elif want_key and want_key.startswith(cand_key) and cand_key:
-            score = 600
-
-        if score < 0:
-            continue
 
-        # prefer tighter year ranges
-        span = max(0, (y1 - y0))
-        score += max(0, 50 - min(50, span))
+SUGGEST_MAX_DISTANCE = 2
+# Auto-correction (retrying the match with a corrected name) is far stricter than suggestions:
+# one edit, letters only, on names with enough letters that one edit can't turn one real
+# model code into another (GX/RX, TSX/TLX, Mazda6/Mazda3 are never corrected).
+CORRECT_MAX_DISTANCE = 1
+CORRECT_MIN_LETTERS = 4
+_NON_DIGITS_RE = re.compile(r"\D+")
 
-        scored.append((score, v))
 
-    scored.sort(key=lambda t: t[0], reverse=True)
-    return [v for _, v in scored[:limit]]
+def _suggest_max_distance(text: str) -> int:
+    return 1 if len(text) <= 4 else SUGGEST_MAX_DISTANCE
 
 
+class _NameSuggester:
+    """Edit-distance index over the make or model names of one (year, make) scope.
 
-@app.get("/vehicles/search")
-def vehicles_search(year: int, make: str, model: str):
-    matches = _search_impl(year, make, model)
+    Each name is indexed as normalized text, punctuation-free key and, for multi-word
+    names, its first word ("silverado" for Silverado 1500/2500HD), so "Silverdo" and
+    "Camery" are one edit away from something in the tree.
+    """
 
-    # Normalize engine codes to canonical codes so oil seeds can be queried reliably.
-    for v in matches:
-        if not isinstance(v, dict):
-            continue
-        lbl = v.get("engine_label")
-        v["engine_codes"] = [
-            resolve_engine_code(c, lbl, year=year, make=v.get("make"), model=v.get("model"))
-            for c in (v.get("engine_codes") or [])
-            if c
-        ]
+    def __init__(self, weights: Dict[str, int]):
+        self.tree = DeletionIndex(SUGGEST_MAX_DISTANCE)
+        self.names: Dict[str, list[str]] = {}  # key -> catalog names, most rows first
+        self.display: Dict[str, str] = {}  # key -> name to show when correcting to it
+        for name in sorted(weights, key=lambda n: (-weights[n], n)):
+            words = norm(name).split()
+            family = words[0] if len(words) > 1 and len(words[0]) >= 3 else None
+            for key, shown in ((norm(name), name), (_key_alnum(name), name), (family, str(name).split()[0])):
+                if not key:
+                    continue
+                if key not in self.names:
+                    self.names[key] = []
+                    self.display[key] = shown
+                    self.tree.add(key)
+                if name not in self.names[key]:
+                    self.names[key].append(name)
+
+    def _hits(self, text: Any) -> list[tuple[int, str]]:
+        want = norm(text)
+        if not want:
+            return []
+        hits = self.tree.search(want, _suggest_max_distance(want))
+        key = _key_alnum(text)
+        if key and key != want:
+            hits = sorted(set(hits) | set(self.tree.search(key, _suggest_max_distance(key))))
+        return hits
+
+    def suggest(self, text: Any, limit: int = SUGGEST_LIMIT) -> list[Dict[str, Any]]:
+        """Catalog names closest to `text`, by edit distance, then by rows using the name."""
+        out: list[Dict[str, Any]] = []
+        seen: set = set()
+        for dist, key in self._hits(text):
+            for name in self.names[key]:
+                if name not in seen:
+                    seen.add(name)
+                    out.append({"name": name, "distance": dist})
+        return out[:limit]
+
+    def correct(self, text: Any) -> Optional[tuple[str, str]]:
+        """(key, display name) of the single indexed name one letter edit away; None when
+        absent, tied, the digits differ or the name is too short to correct safely."""
+        want = norm(text)
+        hits = [(d, k) for d, k in self._hits(text) if d <= CORRECT_MAX_DISTANCE]
+        if not hits or hits[0][0] == 0:
+            return None
+        best = [key for dist, key in hits if dist == hits[0][0]]
+        # several keys for one name (e.g. "f 150" / "f150") are not a real tie
+        if len({tuple(self.names[k]) for k in best}) != 1:
+            return None
+        key = best[0]
+        if _NON_DIGITS_RE.sub("", key) != _NON_DIGITS_RE.sub("", want) or sum(c.isalpha() for c in key) < CORRECT_MIN_LETTERS:
+            return None
+        return key, self.display[key]
 
-    vehicle0 = matches[0] if matches else None
-    return {
-        "query": {"year": year, "make": make, "model": model},
-        "count": len(matches),
-        "results": matches,
-        "vehicles": matches,
-        "vehicle": vehicle0,
-    }
 
+def _name_suggester(field: str, year: Optional[int] = None, make: Optional[str] = None) -> _NameSuggester:
+    make_n = norm(make) if (make and field == "model") else None
+    snap = CATALOG.get()
+    if _catalog_scope(snap, year, make_n) is None:
+        return _NameSuggester({})  # unknown scope: nothing to suggest, nothing cached
+    return snap.cached(
+        ("suggest", field, year, make_n),
+        lambda snap: _NameSuggester(_name_weights(snap, field, year, make_n)),
+    )
 
-def _utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
 
+def _known_name(field: str, text: Any, make: Optional[str] = None) -> bool:
+    """True when `text` is a make (or a model of `make`) in any catalog year."""
+    names = _name_suggester(field, None, make).names
+    return norm(text) in names or _key_alnum(text) in names
 
-def _vin_hash(vin: str) -> str:
-    return hashlib.sha256(vin.encode("utf-8")).hexdigest()
 
+def _catalog_suggestions(year: Optional[int], make: Optional[str], model: Optional[str]) -> list[Dict[str, Any]]:
+    """Did-you-mean for a year/make/model the catalog doesn't have: the make when it is
+    unknown for that year, otherwise the model within (year, make)."""
+    if make and _year_make_models(year, make) is None:
+        return [{"field": "make", **s} for s in _name_suggester("make", year).suggest(make)]
+    if model:
+        return [{"field": "model", **s} for s in _name_suggester("model", year, make).suggest(model)]
+    return []
 
-def _nhtsa_decode_vin(vin: str) -> Dict[str, Any]:
-    if requests is None:
-        return {"ok": False, "error": "requests_not_installed"}
 
-    url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVinValuesExtended/{vin}?format=json"
-    try:
-        r = requests.get(url, timeout=8)
-        r.raise_for_status()
-        payload = r.json()
-    except Exception as e:
-        return {"ok": False, "error": f"nhtsa_request_failed:{type(e).__name__}"}
 
-    results = (payload or {}).get("Results") or []
-    row = results[0] if results else {}
+# ---------------- VIN auto-pick decision table ----------------
 
-    year = row.get("ModelYear") or row.get("Model Year") or row.get("modelyear")
-    make = row.get("Make")
-    model = row.get("Model")
-    trim = row.get("Trim") or row.get("Series") or row.get("Series2")
+AUTOPICK_MEMO_MAX = int(os.getenv("AUTOPICK_MEMO_MAX", "4096"))  # memoized hint tuples per table
+_LABEL_DISP_RE = re.compile(r"(\d+\.\d+)\s*L", re.IGNORECASE)
 
-    # Engine-related fields (best-effort; varies by VIN / manufacturer)
-    displacement_l = row.get("DisplacementL") or row.get("Displacement (L)")
-    cylinders = row.get("EngineCylinders") or row.get("Engine Cylinders")
-    fuel = row.get("FuelTypePrimary") or row.get("Fuel Type - Primary") or row.get("FuelType")
-    eng_model = row.get("EngineModel")
-    eng_conf = row.get("EngineConfiguration") or row.get("Engine Configuration")
 
-    def _as_float(x):
+class _AutoPickTable:
+    """Vehicle/engine auto-pick for one (year, make, model), compiled once per catalog snapshot.
+
+    Hints are (engine model, displacement, cylinders, fuel). decide() maps a hint tuple to
+    an outcome and memoizes it, so repeat decodes are a dict probe; outcomes() enumerates
+    every hint combination the catalog can distinguish, for testing ahead of time.
+    Outcomes: None (no catalog match), {"kind": "vehicles"} (vehicle shortlist),
+    {"kind": "engines"} (one vehicle, engine choices) or {"kind": "resolved"}; tables
+    matched through a corrected make/model only ever yield {"kind": "vehicles"}.
+    """
+
+    def __init__(self, year: int, make: str, model: str, engines_doc: Dict[str, Any]):
+        self.year = year
+        self.make = make
+        self.model = model
+        self.engines_doc = engines_doc
+
+        # 1) Exact match, 2) fuzzy match (punctuation + family models)
+        matches = _search_impl(year, make, model) or _fuzzy_model_candidates(year, make, model)
+
+        # 3) Typo in the make or model ("Silverdo", "Camery"): retry with the single closest
+        # catalog name before giving up as UNSUPPORTED. A corrected match is never
+        # auto-resolved (see _decide): the user confirms the vehicle.
+        self.corrected: Dict[str, str] = {}
+        if not matches:
+            # a name the catalog uses in other years is not a typo (Seville is not DeVille)
+            if _year_make_models(year, make) is None and not _known_name("make", make):
+                fixed = _name_suggester("make", year).correct(make)
+                if fixed:
+                    make = fixed[0]
+                    self.corrected["make"] = fixed[1]
+            fixed = None if _known_name("model", model, make) else _name_suggester("model", year, make).correct(model)
+            if fixed:
+                model = fixed[0]
+                self.corrected["model"] = fixed[1]
+            if self.corrected:
+                matches = _search_impl(year, make, model) or _fuzzy_model_candidates(year, make, model)
+            if matches:
+                self.make, self.model = make, model
+            else:
+                self.corrected = {}
+        self.vehicles = [v for v in matches if isinstance(v, dict)]
+
+        # Normalize engine codes to canonical codes so seeds can be queried reliably.
+        self.codes = [
+            [
+                resolve_engine_code(c, v.get("engine_label"), year=year, make=v.get("make"), model=v.get("model"))
+                for c in (v.get("engine_codes") or [])
+                if c
+            ]
+            for v in self.vehicles
+        ]
+        self._memo: Dict[tuple, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hints(decoded: Dict[str, Any]) -> tuple:
+        return (
+            decoded.get("engine"),
+            decoded.get("engine_displacement_l"),
+            decoded.get("engine_cylinders"),
+            norm(decoded.get("fuel_type")),
+        )
+
+    def decide(self, decoded: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.probe(self.hints(decoded))
+
+    def probe(self, hints: tuple) -> Optional[Dict[str, Any]]:
         try:
-            return float(str(x).strip())
-        except Exception:
+            return self._memo[hints]
+        except KeyError:
+            pass
+        outcome = self._decide(*hints)
+        with self._lock:
+            if len(self._memo) >= AUTOPICK_MEMO_MAX:
+                return outcome  # free-form engine strings; don't grow without bound
+            return self._memo.setdefault(hints, outcome)
+
+    def _decide(self, engine_model: Any, hint_disp: Any, hint_cyl: Any, hint_fuel: str) -> Optional[Dict[str, Any]]:
+        if not self.vehicles:
             return None
+        idx = list(range(len(self.vehicles)))
+
+        # If multiple possible canonical vehicles, try to auto-pick using VIN engine hints.
+        if len(idx) > 1:
+            # 1) VIN engine model -> canonical engine code -> the one vehicle that has it
+            if engine_model:
+                hint_code = resolve_engine_code(engine_model, None, year=self.year, make=self.make, model=self.model)
+                if hint_code:
+                    by_engine_code = [i for i in idx if hint_code in self.codes[i]]
+                    if len(by_engine_code) == 1:
+                        idx = by_engine_code
+
+            # 2) displacement vs engine_label (e.g., 5.3 matches "5.3L V8")
+            if len(idx) > 1 and hint_disp:
+                disp_str = str(hint_disp)
+                by_disp = [i for i in idx if disp_str in str(self.vehicles[i].get("engine_label", ""))]
+                if len(by_disp) == 1:
+                    idx = by_disp
+
+        # a match found through a corrected name is only ever offered for confirmation
+        if len(idx) > 1 or self.corrected:
+            return {"kind": "vehicles", "candidates": [self._candidate(i) for i in idx[:8]]}
+
+        i = idx[0]
+        vehicle = self.vehicles[i]
+        engine_codes = self.codes[i]
+
+        # Prefer explicit VIN EngineModel (e.g., "L59") when it maps to a canonical code we support
+        engine_code: Optional[str] = None
+        if engine_model:
+            model_hint = resolve_engine_code(
+                engine_model, vehicle.get("engine_label"), year=self.year, make=vehicle.get("make"), model=vehicle.get("model")
+            )
+            if model_hint in engine_codes:
+                engine_code = model_hint
+
+        if engine_code is None:
+            if len(engine_codes) == 1:
+                engine_code = engine_codes[0]
+            elif len(engine_codes) > 1:
+                scored = [(self._engine_score(c, hint_disp, hint_cyl, hint_fuel), c) for c in engine_codes]
+                scored.sort(reverse=True)
+                # Only auto-pick if it's clearly better than the rest
+                if scored and scored[0][0] >= 10 and (len(scored) == 1 or scored[0][0] >= scored[1][0] + 5):
+                    engine_code = scored[0][1]
+
+        if len(engine_codes) > 1 and engine_code is None:
+            return {"kind": "engines", "vehicle": self._vehicle_out(i), "engine_choices": self._engine_choices(i)}
+        return {"kind": "resolved", "vehicle": self._vehicle_out(i), "engine_code": engine_code}
+
+    def _engine_score(self, code: str, hint_disp: Any, hint_cyl: Any, hint_fuel: str) -> int:
+        e = self.engines_doc.get(code) or {}
+        score = 0
+        if hint_disp is not None and isinstance(e.get("displacement_l"), (int, float)):
+            if abs(float(e["displacement_l"]) - float(hint_disp)) <= 0.15:
+                score += 10
+        if hint_cyl is not None and as_int(e.get("cylinders")) == hint_cyl:
+            score += 7
+        if hint_fuel and norm(e.get("fuel_type")) == hint_fuel:
+            score += 4
+        return score
+
+    def _vehicle_out(self, i: int) -> Dict[str, Any]:
+        v = self.vehicles[i]
+        return {
+            "vehicle_id": v.get("vehicle_id"),
+            "make": v.get("make"),
+            "model": v.get("model"),
+            "year_min": v.get("year_min"),
+            "year_max": v.get("year_max"),
+            "engine_label": v.get("engine_label"),
+            "engine_codes": list(self.codes[i]),
+        }
 
-    return {
-        "ok": True,
-        "year": int(year) if str(year).isdigit() else None,
-        "make": make.strip() if isinstance(make, str) and make.strip() else None,
-        "model": model.strip() if isinstance(model, str) and model.strip() else None,
-        "trim": trim.strip() if isinstance(trim, str) and trim.strip() else None,
+    def _candidate(self, i: int) -> Dict[str, Any]:
+        out = self._vehicle_out(i)
+        out["engine_names"] = [
+            engine_display_name(ec, vehicle_engine_label=out["engine_label"], engines_doc=self.engines_doc)
+            for ec in out["engine_codes"]
+        ]
+        return out
 
-        # Raw-ish strings for display / debugging
-        "engine": (str(eng_model).strip() if eng_model is not None and str(eng_model).strip() else None),
+    def _engine_choices(self, i: int) -> list[Dict[str, Any]]:
+        label = self.vehicles[i].get("engine_label")
+        choices = []
+        for c in self.codes[i]:
+            e = self.engines_doc.get(c) or {}
+            choices.append(
+                {
+                    "engine_code": c,
+                    "engine_name": engine_display_name(c, vehicle_engine_label=label, engines_doc=self.engines_doc),
+                    "displacement_l": e.get("displacement_l"),
+                    "cylinders": e.get("cylinders"),
+                    "fuel_type": e.get("fuel_type"),
+                }
+            )
+        return choices
+
+    def outcomes(self) -> list[tuple[tuple, Optional[Dict[str, Any]]]]:
+        """Every distinguishable hint tuple with its outcome (None = hint not given)."""
+        engine_models: set = {None}
+        disps: set = {None}
+        cyls: set = {None}
+        fuels: set = {""}
+        for v, codes in zip(self.vehicles, self.codes):
+            engine_models.update(c for c in (v.get("engine_codes") or []) if c)
+            engine_models.update(codes)
+            m = _LABEL_DISP_RE.search(str(v.get("engine_label") or ""))
+            if m:
+                disps.add(float(m.group(1)))
+            for c in codes:
+                e = self.engines_doc.get(c) or {}
+                if isinstance(e.get("displacement_l"), (int, float)):
+                    disps.add(float(e["displacement_l"]))
+                if as_int(e.get("cylinders")) is not None:
+                    cyls.add(as_int(e.get("cylinders")))
+                if norm(e.get("fuel_type")):
+                    fuels.add(norm(e.get("fuel_type")))
+
+        def _order(values: set) -> list:
+            return sorted(values, key=lambda x: (x is not None and x != "", str(x)))
+
+        return [
+            ((em, d, c, f), self.probe((em, d, c, f)))
+            for em in _order(engine_models)
+            for d in _order(disps)
+            for c in _order(cyls)
+            for f in _order(fuels)
+        ]
 
-        # Structured engine hints for matching
-        "engine_displacement_l": _as_float(displacement_l),
-        "engine_cylinders": int(cylinders) if str(cylinders).isdigit() else None,
-        "fuel_type": fuel.strip() if isinstance(fuel, str) and fuel.strip() else None,
-        "engine_configuration": eng_conf.strip() if isinstance(eng_conf, str) and eng_conf.strip() else None,
 
-        "raw": row,
-    }
+# Tables for decoded models the catalog doesn't list verbatim (fuzzy, misspelled or
+# unsupported) live in a bounded LRU keyed by catalog generation, not on the snapshot,
+# so arbitrary decodes and /vin/decision_table queries can't grow memory without bound.
+AUTOPICK_LRU_MAX = int(os.getenv("AUTOPICK_LRU_MAX", "1024"))
+AUTOPICK_LRU = TTLCache(maxsize=AUTOPICK_LRU_MAX, ttl=float(os.getenv("AUTOPICK_LRU_TTL", "3600")))
 
 
-def _sqlite_upsert_rollup(signature: str, decoded: Dict[str, Any], status: str, seed_version: Optional[str], app_version: Optional[str]):
-    # IMPORTANT: We do NOT store the VIN (raw or hash) in SQLite.
-    now = _utc_now_iso()
+def _autopick_table(year: int, make: str, model: str) -> _AutoPickTable:
+    make_n, model_n = norm(make), norm(model)
+    snap = CATALOG.get()
 
-    # Ensure folder exists (prevents "unable to open database file")
-    VIN_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    def build(s) -> _AutoPickTable:
+        return _AutoPickTable(year, make_n, model_n, s.docs.get("engines") or {})
 
-    conn = sqlite3.connect(str(VIN_DB_PATH))
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """CREATE TABLE IF NOT EXISTS vin_resolution_events (
-                signature TEXT PRIMARY KEY,
-                year INTEGER,
-                make TEXT,
-                model TEXT,
-                trim TEXT,
-                engine TEXT,
-                resolution_status TEXT,
-                count INTEGER,
-                first_seen_at TEXT,
-                last_seen_at TEXT,
-                seed_version TEXT,
-                app_version TEXT
-            )"""
-        )
-        cur.execute(
-            """CREATE TABLE IF NOT EXISTS vin_confirmed_mappings (
-                signature TEXT PRIMARY KEY,
-                confirmed_vehicle_id TEXT,
-                confirmed_engine_code TEXT,
-                count INTEGER,
-                last_seen_at TEXT
-            )"""
-        )
+    group = snap.cached("year_make_index", _build_year_make_index).get((as_int(year), make_n))
+    if group is not None and model_n in group.by_norm:
+        return snap.cached(("autopick", as_int(year), make_n, model_n), build)
+    key = (snap.generation, as_int(year), make_n, model_n)
+    table = AUTOPICK_LRU.get(key)
+    if table is None:
+        table = build(snap)
+        AUTOPICK_LRU.set(key, table)
+    return table
 
-        cur.execute(
-            """UPDATE vin_resolution_events
-               SET count = COALESCE(count, 0) + 1,
-                   last_seen_at = ?,
-                   resolution_status = ?,
-                   seed_version = COALESCE(?, seed_version),
-                   app_version = COALESCE(?, app_version)
-               WHERE signature = ?""",
-            (now, status, seed_version, app_version, signature),
-        )
-        if cur.rowcount == 0:
-            cur.execute(
-                """INSERT INTO vin_resolution_events
-                   (signature, year, make, model, trim, engine, resolution_status, count, first_seen_at, last_seen_at, seed_version, app_version)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)""",
-                (
-                    signature,
-                    decoded.get("year"),
-                    decoded.get("make"),
-                    decoded.get("model"),
-                    decoded.get("trim"),
-                    decoded.get("engine"),
-                    status,
-                    now,
-                    now,
-                    seed_version,
-                    app_version,
-                ),
-            )
-        conn.commit()
-    finally:
-        conn.close()
 
+# ---------------- Engine spec matching (displacement / cylinders / fuel -> engine codes) ----------------
 
-def _signature_for(decoded: Dict[str, Any]) -> str:
-    return f"{decoded.get('year')}|{decoded.get('make')}|{decoded.get('model')}|{decoded.get('trim')}|{decoded.get('engine')}"
+ENGINE_MATCH_MAX_LIMIT = 20
+# vin_resolve: offer spec-matched engines instead of UNSUPPORTED when the model isn't in the catalog
+VIN_ENGINE_MATCH_FALLBACK = os.getenv("VIN_ENGINE_MATCH_FALLBACK", "1") == "1"
+VIN_ENGINE_MATCH_MAX_DISTANCE = float(os.getenv("VIN_ENGINE_MATCH_MAX_DISTANCE", "2"))
 
-def _body_style_from_raw(raw):
-    v = " ".join([
-        str(raw.get("BodyCabType") or ""),
-        str(raw.get("BodyClass") or "")
-    ]).lower()
-    
-    # trucks
-    if any(k in v for k in ["crew", "double"]):
-        return "crew_cab"
-    if any(k in v for k in ["extended", "quad", "king", "access", "super"]):
-        return "extended_cab"
-    if any(k in v for k in ["regular", "standard"]):
-        return "regular_cab"
 
-    # suvs / crossovers
-    if any(k in v for k in ["suv", "sport utility"]):
-        return "suv"
-    if "crossover" in v:
-        return "crossover"
-    
-    # cars
-    if "sedan" in v:
-        return "sedan"
-    if "coupe" in v:
-        return "coupe"
-    if "hatchback" in v:
-        return "hatchback"
-    if "wagon" in v:
-        return "wagon"
-    
-    # vans
-    if any(k in v for k in ["minivan", "van"]):
-        return "minivan"
+def _engine_feature_table(snap) -> EngineFeatureTable:
+    return snap.cached("engine_features", lambda s: EngineFeatureTable(s.docs.get("engines") or {}))
 
-    return None
 
+def _build_engine_scope(snap, year: Optional[int], make_n: str) -> tuple:
+    """(rows, scope): engines fitted to the make's catalog vehicles (in `year`, when given),
+    else engines.json entries of that make/family, else everything when no make."""
+    table = _engine_feature_table(snap)
+    if not make_n:
+        return table.all_rows(), "all"
+    codes: set = set()
+    for (y, mk), group in snap.cached("year_make_index", _build_year_make_index).items():
+        if mk == make_n and (year is None or y == year):
+            for v in group.vehicles:
+                codes.update(_canonical_engine_codes(v, y))
+    rows = table.rows_for(codes)
+    if len(rows):
+        return rows, "catalog"
+    rows = table.rows_for_make(make_n)
+    return rows, ("engines_make" if len(rows) else "none")
 
-@app.post("/vin/resolve")
-def vin_resolve(payload: Dict[str, Any] = Body(...)):
-    vin = str(payload.get("vin", "")).strip().upper()
-    seed_version = payload.get("seed_version")
-    app_version = payload.get("app_version")
 
-    if not vin:
-        return {"status": "ERROR", "error": "VIN_REQUIRED"}
+def _engine_matches(year: Optional[int], make: Optional[str], limit: int, max_distance: Optional[float] = None, **hints: Any) -> tuple:
+    """(scope, [match dicts with engine specs]) for the hint tuple."""
+    snap = CATALOG.get()
+    table = _engine_feature_table(snap)
+    make_n = norm(make) if make else ""
+    if not make_n:
+        year = None  # the unscoped table doesn't depend on the year
+    if make_n and _catalog_scope(snap, year, make_n) is None:
+        # no catalog rows for this year/make: engines.json make/family only, not cached
+        # (the key is client input)
+        rows = table.rows_for_make(make_n)
+        scope = "engines_make" if len(rows) else "none"
+    else:
+        rows, scope = snap.cached(("engine_scope", year, make_n), lambda s: _build_engine_scope(s, year, make_n))
+    engines_doc = snap.docs.get("engines") or {}
+    out = []
+    for m in table.match(rows, limit=limit, max_distance=max_distance, **hints):
+        e = engines_doc.get(m["engine_code"]) or {}
+        out.append(
+            {
+                **m,
+                "engine_name": engine_display_name(m["engine_code"], engines_doc=engines_doc),
+                "displacement_l": e.get("displacement_l"),
+                "cylinders": e.get("cylinders"),
+                "fuel_type": e.get("fuel_type"),
+                "aspiration": e.get("aspiration"),
+                "configuration": e.get("configuration"),
+            }
+        )
+    return scope, out
+
+
+@app.get("/engines/match")
+def engines_match(
+    displacement_l: Optional[float] = None,
+    cylinders: Optional[int] = None,
+    fuel_type: Optional[str] = None,
+    aspiration: Optional[str] = None,
+    configuration: Optional[str] = None,
+    make: Optional[str] = None,
+    year: Optional[int] = None,
+    limit: int = 5,
+):
+    """Nearest canonical engine codes for decoded specs, e.g.
+    /engines/match?displacement_l=5.3&cylinders=8&fuel_type=gasoline&make=chevrolet&year=2016"""
+    if not NUMPY_AVAILABLE:
+        return {"status": "ERROR", "error": "NUMPY_NOT_INSTALLED"}
+    if displacement_l is None and cylinders is None:
+        return {"status": "ERROR", "error": "DISPLACEMENT_OR_CYLINDERS_REQUIRED"}
+    scope, matches = _engine_matches(
+        year,
+        make,
+        max(1, min(int(limit), ENGINE_MATCH_MAX_LIMIT)),
+        displacement_l=displacement_l,
+        cylinders=cylinders,
+        fuel_type=fuel_type,
+        aspiration=aspiration,
+        configuration=configuration,
+    )
+    return {
+        "query": {
+            "displacement_l": displacement_l,
+            "cylinders": cylinders,
+            "fuel_type": fuel_type,
+            "aspiration": aspiration,
+            "configuration": configuration,
+            "make": make,
+            "year": year,
+        },
+        "scope": scope,
+        "count": len(matches),
+        "matches": matches,
+    }
 
-    vin_hash = _vin_hash(vin)
 
-    decoded = _nhtsa_decode_vin(vin)
+ENGINE_SPEC_ONLY_WARNING = (
+    "Vehicle not in catalog. Engines matched on the decoded specs only (any model of this make); "
+    "not verified fitment for this vehicle."
+)
 
-    vin_attrs = {
-    "body_style": _body_style_from_raw(decoded.get("raw", {}))
-}
-    
-    if not decoded.get("ok"):
+
+def _engine_match_fallback(year: Any, make: Any, decoded: Dict[str, Any]) -> tuple:
+    """(scope, engine choices) for a decode whose vehicle isn't in the catalog; choices are
+    [] when not applicable. Each choice is labelled fitment="engine_spec_only"."""
+    if not (VIN_ENGINE_MATCH_FALLBACK and NUMPY_AVAILABLE) or decoded.get("engine_displacement_l") is None:
+        return None, []
+    raw = decoded.get("raw") or {}
+    scope, matches = _engine_matches(
+        as_int(year),
+        make,
+        SUGGEST_LIMIT,
+        max_distance=VIN_ENGINE_MATCH_MAX_DISTANCE,
+        displacement_l=decoded.get("engine_displacement_l"),
+        cylinders=decoded.get("engine_cylinders"),
+        fuel_type=decoded.get("fuel_type"),
+        aspiration="turbo" if str(raw.get("Turbo") or "").strip().lower() == "yes" else None,
+        configuration=raw.get("EngineConfiguration"),
+    )
+    return scope, [{**m, "fitment": "engine_spec_only"} for m in matches]
+
+
+# ---------------- Free-text vehicle search ----------------
+
+# Field weights: a model hit says more than a make hit, which says more than an engine hit.
+_SEARCH_WEIGHTS = {"model": 3.0, "make": 2.0, "engine_label": 1.5, "engine": 1.0}
+_SEARCH_YEAR_RE = re.compile(r"^(19[5-9]\d|20\d\d)$")
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+def _build_search_index(snap) -> Dict[str, Any]:
+    vehicles = [v for v in (snap.docs.get("vehicles") or {}).get("vehicles", []) if isinstance(v, dict)]
+    engines_doc = snap.docs.get("engines") or {}
+    index = TokenIndex()
+    for i, v in enumerate(vehicles):
+        index.add(i, v.get("make"), _SEARCH_WEIGHTS["make"])
+        index.add(i, v.get("model"), _SEARCH_WEIGHTS["model"])
+        index.add(i, v.get("engine_label"), _SEARCH_WEIGHTS["engine_label"])
+        for c in v.get("engine_codes") or []:
+            if not c:
+                continue
+            code = resolve_engine_code(c, v.get("engine_label"), make=v.get("make"), model=v.get("model"))
+            index.add(i, code, _SEARCH_WEIGHTS["engine"])
+            name = (engines_doc.get(code) or {}).get("engine_name")
+            index.add(i, name, _SEARCH_WEIGHTS["engine"])
+    return {"vehicles": vehicles, "positions": {id(v): i for i, v in enumerate(vehicles)}, "index": index.freeze()}
+
+
+def _free_text_search(q: str, *, year: Optional[int], make: Optional[str], model: Optional[str]) -> Dict[str, Any]:
+    """Every match, best first: {"year": effective year, "tokens", "rows", "scores" (id(row) -> score)}."""
+    snap = CATALOG.get()
+    built = snap.cached("search_index", _build_search_index)
+    vehicles = built["vehicles"]
+
+    tokens = []
+    for tok in tokenize(q):
+        if year is None and _SEARCH_YEAR_RE.match(tok):
+            year = int(tok)  # "2016 silverado" -> year filter, not a text token
+        else:
+            tokens.append(tok)
+
+    make_n = norm(make) if make else None
+    model_n = norm(model) if model else None
+
+    def keep(v: dict) -> bool:
+        y0, y1 = as_int(v.get("year_min")), as_int(v.get("year_max"))
+        if year is not None and (y0 is None or y1 is None or not (y0 <= year <= y1)):
+            return False
+        if make_n and norm(v.get("make")) != make_n:
+            return False
+        return not (model_n and norm(v.get("model")) != model_n)
+
+    if tokens:
+        # filter first, then keep the rows matching the most tokens (every token, when
+        # any row in the filtered set manages that)
+        hits = [h for h in built["index"].search(tokens) if keep(vehicles[h[0]])]
+        if hits:
+            best = max(h[1] for h in hits)
+            hits = [h for h in hits if h[1] == best]
+    elif year is not None or make_n:
+        # year / make only ("2016"): that scope's rows from the year/make index
+        pos = built["positions"]
+        hits = [(pos[id(v)], 0, 0.0) for v in _catalog_scope(snap, year, make_n) or () if keep(v)]
+    else:
+        hits = [(i, 0, 0.0) for i, v in enumerate(vehicles) if keep(v)]
+
+    ranked = []
+    for i, n_matched, score in hits:
+        v = vehicles[i]
+        y0, y1 = as_int(v.get("year_min")), as_int(v.get("year_max"))
+        span = (y1 - y0) if (y0 is not None and y1 is not None) else 999
+        ranked.append((-score, span, i))
+    ranked.sort()
+
+    rows = [vehicles[i] for _, _, i in ranked]
+    scores = {id(vehicles[i]): round(-neg_score, 3) for neg_score, _, i in ranked}
+    return {"year": year, "tokens": tokens, "rows": rows, "scores": scores}
+
+
+def _text_suggestions(tokens: list[str], year: Optional[int]) -> list[Dict[str, Any]]:
+    """Closest make/model names for the words of a query that found nothing."""
+    found: list[tuple[int, int, str, str]] = []
+    for tok in tokens:
+        if len(tok) < 3 or tok[0].isdigit():
+            continue
+        for rank, field in enumerate(("model", "make")):
+            for s in _name_suggester(field, year).suggest(tok):
+                found.append((s["distance"], rank, field, s["name"]))
+    out, seen = [], set()
+    for dist, _, field, name in sorted(found, key=lambda f: (f[0], f[1])):
+        if (field, name) not in seen:
+            seen.add((field, name))
+            out.append({"field": field, "name": name, "distance": dist})
+    return out[:SUGGEST_LIMIT]
+
+
+# ---------------- Paging / sparse fieldsets for list responses ----------------
+
+VEHICLE_FIELDS = ("vehicle_id", "make", "model", "year_min", "year_max", "engine_label", "engine_codes")
+# Also emit the legacy duplicates of `results` ("vehicles" array, "vehicle" = first item).
+# Per request: ?compat=true|false; this is the default for clients that don't say.
+CATALOG_COMPAT_ARRAYS = os.getenv("CATALOG_COMPAT_ARRAYS", "1") == "1"
+
+
+def _compat_arrays(compat: Optional[bool]) -> bool:
+    return CATALOG_COMPAT_ARRAYS if compat is None else compat
+
+
+def _vehicle_page(
+    envelope: Dict[str, Any],
+    rows: list[dict],
+    *,
+    year: Optional[int],
+    fields: Optional[tuple],
+    limit: Optional[int],
+    cursor: Optional[str],
+    scope: str,
+    compat: Optional[bool],
+    scores: Optional[Dict[int, float]] = None,
+):
+    """One page of catalog rows, serialized straight from the shared rows. limit=None
+    (legacy unpaged response) writes every row and no total/next_cursor.
+
+    engine_codes are canonicalized (so oil seeds can be queried reliably) only for the
+    rows on the page and only when the field is requested.
+    """
+    if limit is None:
+        start, end = 0, len(rows)
+    else:
+        generation = CATALOG.get().generation
+        start, end, next_cursor = paging.page(
+            len(rows), paging.decode_cursor(cursor, generation, scope), limit, generation, scope
+        )
+        envelope.update({"total": len(rows), "next_cursor": next_cursor})
+    getters = {"engine_codes": lambda v: _canonical_engine_codes(v, year)}
+    if scores is not None:
+        getters["score"] = lambda v: scores.get(id(v))
+    encoder = paging.RecordEncoder(fields, getters, extra=("score",) if scores is not None else ())
+    results, first = encoder.encode_list(rows[start:end])
+
+    envelope["count"] = end - start
+    fragments = {"results": results}
+    if _compat_arrays(compat):
+        fragments.update({"vehicles": results, "vehicle": first})
+    return paging.json_response(envelope, fragments)
+
+
+@app.get("/vehicles/search")
+def vehicles_search(
+    year: Optional[int] = None,
+    make: Optional[str] = None,
+    model: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    compat: Optional[bool] = None,
+):
+    """Exact year/make/model lookup, or ranked free-text search when `q` is given
+    (e.g. q="2016 silverado 5.3"; any of year/make/model then act as filters).
+
+    Paged (SEARCH_DEFAULT_LIMIT per page): pass `next_cursor` back as `cursor`.
+    `fields=vehicle_id,model` trims each result. An exact lookup in compat mode without
+    limit/cursor returns every match unpaged, as it always has; free-text results are
+    always paged.
+    """
+    free_text = q is not None and bool(q.strip())
+    if limit is None and not cursor and not free_text and _compat_arrays(compat):
+        page_limit = None
+    else:
+        page_limit = max(1, min(int(limit or SEARCH_DEFAULT_LIMIT), SEARCH_MAX_LIMIT))
+    if not free_text and (year is None or not make or not model):
+        return {"status": "ERROR", "error": "YEAR_MAKE_MODEL_OR_Q_REQUIRED"}
+    scope = paging.scope_of("vehicles/search", year, norm(make), norm(model), q if free_text else None)
+    try:
+        wanted = paging.parse_fields(fields, VEHICLE_FIELDS + (("score",) if free_text else ()))
+        if free_text:
+            found = _free_text_search(q, year=year, make=make, model=model)
+            envelope = {"query": {"year": found["year"], "make": make, "model": model, "q": q}, "tokens": found["tokens"]}
+            if not found["rows"] and found["tokens"]:
+                envelope["suggestions"] = _text_suggestions(found["tokens"], found["year"])
+            return _vehicle_page(
+                envelope, found["rows"], year=found["year"], fields=wanted, limit=page_limit, cursor=cursor,
+                scope=scope, compat=compat, scores=found["scores"],
+            )
+
+        matches = [v for v in _search_impl(year, make, model) if isinstance(v, dict)]
+        envelope = {"query": {"year": year, "make": make, "model": model}}
+        if not matches:
+            envelope["suggestions"] = _catalog_suggestions(year, make, model)
+        return _vehicle_page(
+            envelope, matches, year=year, fields=wanted, limit=page_limit, cursor=cursor, scope=scope, compat=compat
+        )
+    except paging.PagingError as e:
+        return e.as_dict()
+
+
+# ---------------- Catalog export (offline clients) ----------------
+
+EXPORT_FIELDS = VEHICLE_FIELDS + ("engine_names",)
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+
+
+def _export_lines(rows: list[dict], encoder: paging.RecordEncoder, make_n: Optional[str], year_from: Optional[int], year_to: Optional[int]):
+    """NDJSON lines, encoded one row at a time and flushed in ~EXPORT_CHUNK_BYTES chunks."""
+    buf: list[str] = []
+    size = 0
+    for v in rows:
+        if make_n and norm(v.get("make")) != make_n:
+            continue
+        y0, y1 = as_int(v.get("year_min")), as_int(v.get("year_max"))
+        if (year_from is not None or year_to is not None) and (y0 is None or y1 is None):
+            continue
+        if (year_from is not None and y1 < year_from) or (year_to is not None and y0 > year_to):
+            continue
+        line = encoder.encode(v) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+@app.get("/catalog/export")
+def catalog_export(
+    make: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    """Whole catalog (or one make / year range) as NDJSON, one vehicle per line, with
+    canonical engine codes and display names. Rows overlapping [year_from, year_to] match."""
+    try:
+        wanted = paging.parse_fields(fields, EXPORT_FIELDS)
+    except paging.PagingError as e:
+        return e.as_dict()
+    snap = CATALOG.get()
+    engines_doc = snap.docs.get("engines") or {}
+    rows = [v for v in (snap.docs.get("vehicles") or {}).get("vehicles", []) if isinstance(v, dict)]
+
+    def _names(v: Dict[str, Any]) -> list[str]:
+        label = v.get("engine_label")
+        return [engine_display_name(c, vehicle_engine_label=label, engines_doc=engines_doc) for c in _canonical_engine_codes(v, None)]
+
+    encoder = paging.RecordEncoder(
+        wanted,
+        {"engine_codes": lambda v: _canonical_engine_codes(v, None), "engine_names": _names},
+        extra=("engine_names",),
+    )
+    return StreamingResponse(
+        _export_lines(rows, encoder, norm(make) if make else None, year_from, year_to),
+        media_type="application/x-ndjson",
+        headers={"X-Catalog-Generation": str(snap.generation)},
+    )
+
+
+# ---------------- Delta sync (offline clients) ----------------
+
+# collection -> (file, container key or None for the whole doc, key fields or None for dict collections)
+SYNC_COLLECTIONS: Dict[str, tuple] = {
+    "vehicles": (VEHICLES_PATH, "vehicles", ("vehicle_id",)),
+    "engines": (ENGINES_PATH, None, None),
+    "oil_specs": (OIL_SPECS_PATH, "items", ("engine_code",)),
+    "oil_spec_defs": (OIL_SPECS_PATH, "oil_specs", None),
+    "oil_capacity": (OIL_CAPACITY_PATH, "items", ("engine_code",)),
+    "oil_parts": (OIL_PARTS_PATH, "items", ("engine_code",)),
+    "oil_filter_groups": (OIL_FILTER_GROUPS_PATH, None, None),
+    "oil_product_groups": (OIL_PRODUCT_GROUPS_PATH, "items", None),
+    "engine_air_filter": (ENGINE_AIR_FILTER_PATH, "items", ("engine_code",)),
+    "engine_air_filter_groups": (ENGINE_AIR_FILTER_GROUPS_PATH, "groups", None),
+    "cabin_air_filter": (CABIN_AIR_FILTER_PATH, "items", ("vehicle_key",)),
+    "cabin_air_filter_groups": (CABIN_AIR_FILTER_GROUPS_PATH, "groups", None),
+    "spark_plugs": (SPARK_PLUG_SEED_PATH, "items", ("engine_code",)),
+    "spark_plug_groups": (SPARK_PLUG_GROUPS_PATH, "groups", None),
+    "wipers": (WIPER_SEED_PATH, "items", ("vehicle_key", "years", "body_style")),
+    "wiper_groups": (WIPER_GROUP_PATH, "groups", None),
+    "wiper_matrix": (WIPER_MATRIX_PATH, "items", None),
+    "headlight_bulbs": (HEADLIGHT_BULBS_PATH, "items", ("vehicle_key",)),
+    "battery": (BATTERY_PARTS_PATH, "items", ("vehicle_key",)),
+}
+
+# Every synced file; a change to any of them yields a new manifest (and version).
+# Seed-derived lookups (oil coverage, part fitment) hang off this snapshot too.
+SYNC_SOURCES = Snapshot({str(path.name): path for path, _, _ in SYNC_COLLECTIONS.values()})
+SYNC_HISTORY = sync_manifest.ManifestHistory(
+    ROOT / "Maintenance" / "Data" / "sync_manifests",
+    keep=int(os.getenv("SYNC_KEEP_VERSIONS", "20")),
+)
+
+
+def _build_sync_state(snap) -> Dict[str, Any]:
+    records: Dict[str, Dict[str, Any]] = {}
+    seed_versions: Dict[str, Any] = {}
+    for name, (path, container, key_fields) in SYNC_COLLECTIONS.items():
+        doc = snap.docs.get(path.name) or {}
+        records[name] = sync_manifest.keyed_records(doc, container, key_fields)
+        meta = doc.get("_meta") if isinstance(doc, dict) else None
+        seed_versions[name] = (doc.get("version") if isinstance(doc, dict) else None) or (
+            meta.get("version") if isinstance(meta, dict) else None
+        )
+    hashes = {name: {k: sync_manifest.record_hash(r) for k, r in recs.items()} for name, recs in records.items()}
+    return {
+        "version": sync_manifest.manifest_version(hashes),
+        "hashes": hashes,
+        "records": records,
+        "seed_versions": seed_versions,
+    }
+
+
+def _sync_state() -> Dict[str, Any]:
+    state = SYNC_SOURCES.get().cached("sync_state", _build_sync_state)
+    SYNC_HISTORY.remember(state["version"], state["hashes"])
+    return state
+
+
+@app.get("/sync")
+def sync(since: Optional[str] = None, collections: Optional[str] = None):
+    """Records added/changed/removed since the `version` a client last synced.
+
+    Without `since`, or when that version is no longer remembered, returns a full dump
+    (mode "full"); clients then replace their local copy. `collections=` limits the
+    response to some collections (see SYNC_COLLECTIONS).
+    """
+    try:
+        wanted = paging.parse_fields(collections, tuple(SYNC_COLLECTIONS)) or tuple(SYNC_COLLECTIONS)
+    except paging.PagingError as e:
+        return {"status": "ERROR", "error": "UNKNOWN_COLLECTIONS", **e.detail}
+    state = _sync_state()
+    records = state["records"]
+    envelope: Dict[str, Any] = {
+        "version": state["version"],
+        "since": since,
+        "seed_versions": {n: state["seed_versions"][n] for n in wanted},
+    }
+
+    old = SYNC_HISTORY.get(since) if since else None
+    if old is None:
+        envelope.update({"mode": "full", "reason": "UNKNOWN_VERSION" if since else "NO_SINCE"})
+        envelope["collections"] = {n: records[n] for n in wanted}
+        envelope["counts"] = {n: len(records[n]) for n in wanted}
+        return paging.json_response(envelope)
+
+    changes = {}
+    for name, keys in sync_manifest.diff({n: old.get(n, {}) for n in wanted}, {n: state["hashes"][n] for n in wanted}).items():
+        recs = records[name]
+        changes[name] = {
+            "added": {k: recs[k] for k in keys["added"]},
+            "changed": {k: recs[k] for k in keys["changed"]},
+            "removed": keys["removed"],
+        }
+    envelope.update({"mode": "delta", "up_to_date": not changes, "changes": changes})
+    return paging.json_response(envelope)
+
+
+# ---------------- Engine detail (reverse fitment: canonical engine code -> vehicles) ----------------
+
+def _year_runs(years: list) -> list:
+    """Sorted years -> [(first, last), ...] of consecutive runs."""
+    runs: list = []
+    for y in years:
+        if runs and runs[-1][1] == y - 1:
+            runs[-1] = (runs[-1][0], y)
+        else:
+            runs.append((y, y))
+    return runs
+
+
+def _build_engine_fitment(snap) -> Dict[str, list]:
+    """canonical engine code -> [vehicle/year-range dicts], make/model/year_min order.
+
+    Codes are resolved per model year with the vehicle's make/model, so a disambiguation
+    rule that splits a raw code mid-range yields one entry per year run.
+    """
+    years_by_code: Dict[str, Dict[int, list]] = {}
+    vehicles = [v for v in (snap.docs.get("vehicles") or {}).get("vehicles", []) if isinstance(v, dict)]
+    for i, v in enumerate(vehicles):
+        codes = v.get("engine_codes") or []
+        if not codes:
+            continue
+        y0, y1 = as_int(v.get("year_min")), as_int(v.get("year_max"))
+        if y0 is None or y1 is None or y0 > y1:
+            continue
+        for y in range(y0, y1 + 1):
+            for code in ENGINE_RESOLVER.resolve_many(codes, year=y, make=v.get("make"), model=v.get("model")):
+                years = years_by_code.setdefault(code, {}).setdefault(i, [])
+                if not years or years[-1] != y:
+                    years.append(y)
+
+    index: Dict[str, list] = {}
+    for code, per_vehicle in years_by_code.items():
+        entries = []
+        for i, years in per_vehicle.items():
+            v = vehicles[i]
+            for first, last in _year_runs(years):
+                entries.append(
+                    {
+                        "vehicle_id": v.get("vehicle_id"),
+                        "make": v.get("make"),
+                        "model": v.get("model"),
+                        "year_min": first,
+                        "year_max": last,
+                        "engine_label": v.get("engine_label"),
+                    }
+                )
+        entries.sort(key=lambda e: (norm(e["make"]), norm(e["model"]), e["year_min"]))
+        index[code] = entries
+    return index
+
+
+def _build_oil_seed_codes(snap) -> Dict[str, frozenset]:
+    """seed -> normalized engine codes it covers (prefixed and raw), as _find_seed_item matches them."""
+    out = {}
+    for name, path in (("oil_spec", OIL_SPECS_PATH), ("oil_capacity", OIL_CAPACITY_PATH), ("oil_parts", OIL_PARTS_PATH)):
+        codes = set()
+        for it in (snap.docs.get(path.name) or {}).get("items", []) or []:
+            ec = it.get("engine_code") if isinstance(it, dict) else None
+            if ec:
+                codes.add(norm(ec))
+                codes.add(norm(seed_to_raw(ec)))
+        out[name] = frozenset(codes)
+    return out
+
+
+@app.get("/engines/{code}")
+def engine_detail(code: str):
+    """engines.json metadata, oil seed coverage and every catalog vehicle/year range fitted
+    with the engine. `code` may be raw or canonical (EB35, LINCOLN_EB35)."""
+    snap = CATALOG.get()
+    fitment = snap.cached("engine_fitment", _build_engine_fitment)
+    engines_doc = snap.docs.get("engines") or {}
+
+    raw = (code or "").strip()
+    resolved = resolve_engine_code(raw)
+    canonical = next((c for c in (resolved, raw) if c in fitment), None) or next(
+        (c for c in (resolved, raw) if c in engines_doc), None
+    )
+    if canonical is None:
+        return {"status": "ERROR", "error": "UNKNOWN_ENGINE_CODE", "engine_code": raw}
+
+    meta_key = next((k for k in (canonical, seed_to_raw(canonical), raw) if k in engines_doc), None)
+    covered = SYNC_SOURCES.get().cached("oil_seed_codes", _build_oil_seed_codes)
+    code_n = norm(canonical)
+    oil = {name: code_n in codes for name, codes in covered.items()}
+    vehicles = fitment.get(canonical, [])
+    return {
+        "engine_code": raw,
+        "resolved_engine_code": canonical,
+        "engine_name": engine_display_name(meta_key or canonical, engines_doc=engines_doc),
+        "engine": engines_doc.get(meta_key) if meta_key else None,
+        "oil_coverage": {**oil, "complete": all(oil.values())},
+        "vehicle_count": len({e["vehicle_id"] for e in vehicles}),
+        "vehicles": vehicles,
+    }
+
+
+# ---------------- Part fitment (brand + part number -> engines / vehicles) ----------------
+
+# category, groups file, groups container (None = whole doc), seed file, seed -> group key fields,
+# inline blob field on seed items, and whether seed items are keyed by engine or by vehicle
+PART_SOURCES = (
+    ("oil_filter", OIL_FILTER_GROUPS_PATH, None, OIL_PARTS_PATH, ("oil_filter_group",), "oil_filter", "engine"),
+    ("engine_air_filter", ENGINE_AIR_FILTER_GROUPS_PATH, "groups", ENGINE_AIR_FILTER_PATH, ("engine_air_filter_group", "group_key"), "air_filter", "engine"),
+    ("spark_plug", SPARK_PLUG_GROUPS_PATH, "groups", SPARK_PLUG_SEED_PATH, ("plug_group", "group_key"), None, "engine"),
+    ("cabin_air_filter", CABIN_AIR_FILTER_GROUPS_PATH, "groups", CABIN_AIR_FILTER_PATH, ("cabin_filter_group_key", "group_key"), "cabin_filter", "vehicle"),
+    ("wiper", WIPER_GROUP_PATH, "groups", WIPER_SEED_PATH, ("wiper_group_key",), None, "vehicle"),
+    ("headlight_bulb", None, None, HEADLIGHT_BULBS_PATH, (), "headlight_bulbs", "vehicle"),
+    ("battery", None, None, BATTERY_PARTS_PATH, (), "battery", "vehicle"),
+)
+_SEED_KEY_YEARS_RE = re.compile(r"_(\d{4})_(\d{4})$")
+
+
+def _vehicle_seed_ref(item: Dict[str, Any]) -> Dict[str, Any]:
+    """make/model/years of a vehicle-keyed seed item; years from the item or its key suffix."""
+    years = item.get("years")
+    span = None
+    if isinstance(years, list) and len(years) == 2 and all(as_int(y) is not None for y in years):
+        span = (as_int(years[0]), as_int(years[1]))
+    else:
+        m = _SEED_KEY_YEARS_RE.search(str(item.get("vehicle_key") or ""))
+        if m:
+            span = (int(m.group(1)), int(m.group(2)))
+    return {"vehicle_key": item.get("vehicle_key"), "make": item.get("make"), "model": item.get("model"), "years": span}
+
+
+def _wiper_matrix_parts(group: Dict[str, Any], matrix: Dict[str, Any]):
+    """Matrix alternatives for each wiper position, keyed like _hydrate_wiper does."""
+    for pos_name, pos in (group.get("positions") or {}).items():
+        spec = (pos or {}).get("spec") or {}
+        length, connector, blade_type = spec.get("length_in"), spec.get("connector_type"), spec.get("blade_type")
+        if not (length and connector and blade_type):
+            continue
+        for alt in matrix.get(f"{length}_{connector}_{blade_type}".lower()) or []:
+            if isinstance(alt, dict) and alt.get("brand"):
+                yield alt["brand"], alt.get("part_number") or alt.get("sku"), "alternative", pos_name, None
+
+
+def _build_part_index(snap) -> PartIndex:
+    """Every part number in the groups and seeds, with the engine codes / vehicle seed items
+    each listing applies to (groups reach those through the seed items pointing at them)."""
+    index = PartIndex()
+    matrix = (snap.docs.get(WIPER_MATRIX_PATH.name) or {}).get("items") or {}
+    for category, groups_path, container, seed_path, group_fields, inline_field, keyed_by in PART_SOURCES:
+        targets: Dict[str, Dict[str, list]] = {}
+        inline = []
+        for item in (snap.docs.get(seed_path.name) or {}).get("items", []) or []:
+            if not isinstance(item, dict):
+                continue
+            target = item.get("engine_code") if keyed_by == "engine" else _vehicle_seed_ref(item)
+            if not target:
+                continue
+            group_key = next((str(item[f]).strip() for f in group_fields if isinstance(item.get(f), str) and item[f].strip()), None)
+            if group_key:
+                slot = targets.setdefault(group_key, {"engine_codes": [], "vehicle_seeds": []})
+                slot["engine_codes" if keyed_by == "engine" else "vehicle_seeds"].append(target)
+            elif inline_field and item.get(inline_field):
+                inline.append((item[inline_field], target))
+
+        def add(parts, group, engine_codes, vehicle_seeds):
+            for brand, pn, role, position, selector in parts:
+                index.add(
+                    brand,
+                    pn,
+                    {
+                        "category": category,
+                        "group": group,
+                        "role": role,
+                        "position": position,
+                        "selector": selector,
+                        "engine_codes": engine_codes,
+                        "vehicle_seeds": vehicle_seeds,
+                    },
+                )
+
+        if groups_path is not None:
+            doc = snap.docs.get(groups_path.name) or {}
+            groups = doc.get(container) if container else doc
+            for group_key, group in (groups or {}).items() if isinstance(groups, dict) else ():
+                if not isinstance(group, dict):
+                    continue
+                slot = targets.get(group_key) or {"engine_codes": [], "vehicle_seeds": []}
+                codes, seeds = tuple(slot["engine_codes"]), tuple(slot["vehicle_seeds"])
+                add(iter_parts(group), group_key, codes, seeds)
+                if category == "wiper":
+                    add(_wiper_matrix_parts(group, matrix), group_key, codes, seeds)
+        for blob, target in inline:
+            codes, seeds = ((target,), ()) if keyed_by == "engine" else ((), (target,))
+            add(iter_parts(blob), None, codes, seeds)
+    return index
+
+
+def _build_vehicles_by_key_base(snap) -> Dict[str, list]:
+    out: Dict[str, list] = {}
+    for v in (snap.docs.get("vehicles") or {}).get("vehicles", []):
+        if isinstance(v, dict):
+            out.setdefault(_vehicle_key_base(v), []).append(v)
+    return out
+
+
+@app.get("/parts/{brand}/{part_number}/fitment")
+def part_fitment(brand: str, part_number: str):
+    """Engines and catalog vehicles a filter / plug / wiper / battery part fits, e.g.
+    /parts/Fram/PH7317/fitment. Part numbers match ignoring dashes and case."""
+    index = SYNC_SOURCES.get().cached("part_index", _build_part_index)
+    entry = index.get(brand, part_number)
+    if entry is None:
+        return {
+            "status": "ERROR",
+            "error": "PART_NOT_FOUND",
+            "brand": brand,
+            "part_number": part_number,
+            "brands": index.brands_for(part_number),
+        }
+
+    snap = CATALOG.get()
+    fitment = snap.cached("engine_fitment", _build_engine_fitment)
+    by_key_base = snap.cached("vehicles_by_key_base", _build_vehicles_by_key_base)
+    engines_doc = snap.docs.get("engines") or {}
+
+    engines: Dict[str, set] = {}
+    vehicles: Dict[tuple, Dict[str, Any]] = {}
+
+    def add_vehicle(v_id, make, model, y0, y1, engine_label, category, engine_code=None):
+        out = vehicles.setdefault(
+            (v_id, y0, y1),
+            {
+                "vehicle_id": v_id,
+                "make": make,
+                "model": model,
+                "year_min": y0,
+                "year_max": y1,
+                "engine_label": engine_label,
+                "engine_codes": set(),
+                "categories": set(),
+            },
+        )
+        out["categories"].add(category)
+        if engine_code:
+            out["engine_codes"].add(engine_code)
+
+    usages = []
+    for u in entry["usages"]:
+        usages.append({k: u[k] for k in ("category", "group", "role", "position", "selector")})
+        for seed_code in u["engine_codes"]:
+            code = seed_code if seed_code in fitment else resolve_engine_code(seed_code)
+            engines.setdefault(code, set()).add(u["category"])
+            for fv in fitment.get(code, ()):
+                add_vehicle(fv["vehicle_id"], fv["make"], fv["model"], fv["year_min"], fv["year_max"], fv["engine_label"], u["category"], code)
+        for seed in u["vehicle_seeds"]:
+            for v in by_key_base.get(_vehicle_key_base(seed), ()):
+                y0, y1 = as_int(v.get("year_min")), as_int(v.get("year_max"))
+                if seed["years"] is not None and None not in (y0, y1):
+                    y0, y1 = max(y0, seed["years"][0]), min(y1, seed["years"][1])
+                    if y0 > y1:
+                        continue
+                add_vehicle(v.get("vehicle_id"), v.get("make"), v.get("model"), y0, y1, v.get("engine_label"), u["category"])
+
+    vehicle_list = sorted(vehicles.values(), key=lambda e: (norm(e["make"]), norm(e["model"]), e["year_min"] or 0, e["vehicle_id"] or ""))
+    for e in vehicle_list:
+        e["engine_codes"] = sorted(e["engine_codes"])
+        e["categories"] = sorted(e["categories"])
+    return {
+        "brand": entry["brand"],
+        "part_number": entry["part_number"],
+        "usages": usages,
+        "engines": [
+            {
+                "engine_code": code,
+                "engine_name": engine_display_name(code, engines_doc=engines_doc),
+                "categories": sorted(cats),
+            }
+            for code, cats in sorted(engines.items())
+        ],
+        "vehicle_count": len({e["vehicle_id"] for e in vehicle_list}),
+        "vehicles": vehicle_list,
+    }
+
+
+def _vin_hash(vin: str) -> str:
+    return hashlib.sha256(vin.encode("utf-8")).hexdigest()
+
+
+# Successful decodes are deterministic per VIN, so keep them in-process.
+VIN_DECODE_CACHE = TTLCache(
+    maxsize=int(os.getenv("VIN_DECODE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("VIN_DECODE_CACHE_TTL", "86400")),
+    stale_ttl=float(os.getenv("VIN_DECODE_STALE_TTL", "604800")),
+)
+
+# Known-good VIN used by the breaker's background probe while vPIC is considered down.
+NHTSA_PROBE_VIN = os.getenv("NHTSA_PROBE_VIN", "1HGCM82633A004352")
+
+
+def _nhtsa_probe() -> bool:
+    payload = nhtsa_client.get_json(nhtsa_client.decode_vin_url(NHTSA_PROBE_VIN))
+    return bool((payload or {}).get("Results"))
+
+
+# Opens after consecutive failures/slow calls; while open, decodes fail fast and serve stale cache.
+NHTSA_BREAKER = CircuitBreaker(
+    failure_threshold=int(os.getenv("NHTSA_BREAKER_FAILURES", "5")),
+    slow_call_s=float(os.getenv("NHTSA_BREAKER_SLOW_S", "4")),
+    open_s=float(os.getenv("NHTSA_BREAKER_OPEN_S", "30")),
+    probe=_nhtsa_probe,
+)
+
+
+def _stale_decode(vin: str, error: str) -> Dict[str, Any]:
+    stale = VIN_DECODE_CACHE.get_stale(vin)
+    if stale is not None:
+        return {**stale, "stale": True}
+    return {"ok": False, "error": error}
+
+
+# Concurrent decodes of the same VIN (multi-device scans, client retries) share one upstream call.
+# NHTSA_COALESCE_KEY=pattern widens that to VINs with the same decode pattern (pos 1-8 + 10-11).
+VIN_DECODE_FLIGHTS = SingleFlight()
+NHTSA_COALESCE_KEY = os.getenv("NHTSA_COALESCE_KEY", "vin").strip().lower()
+
+
+def _decode_flight_key(vin: str) -> str:
+    if NHTSA_COALESCE_KEY == "pattern":
+        return vin[:8] + vin[9:11]
+    return vin
+
+
+# vPIC row fields that describe the decoded VIN itself rather than its pattern.
+_VIN_SPECIFIC_RAW_FIELDS = ("VIN", "ErrorCode", "ErrorText", "AdditionalErrorText", "SuggestedVIN", "PossibleValues")
+
+
+def _flight_result(vin: str, leader_vin: str, decoded: Dict[str, Any]) -> Dict[str, Any]:
+    """A coalesced decode as seen by `vin`. With pattern coalescing, a follower gets the
+    leader's decode with the VIN-specific raw fields re-derived for its own VIN, and it
+    is not cached under that VIN (the next decode of it goes upstream)."""
+    if not decoded.get("ok"):
+        return _stale_decode(vin, decoded.get("error", "DECODE_FAILED"))
+    if leader_vin == vin:
+        return _cache_decoded(vin, decoded)
+    raw = {k: v for k, v in (decoded.get("raw") or {}).items() if k not in _VIN_SPECIFIC_RAW_FIELDS}
+    raw["VIN"] = vin
+    return {**decoded, "raw": raw}
+
+
+def _nhtsa_decode_vin(vin: str) -> Dict[str, Any]:
+    if requests is None:
+        return {"ok": False, "error": "requests_not_installed"}
+
+    cached = VIN_DECODE_CACHE.get(vin)
+    if cached is not None:
+        return cached
+    if not NHTSA_BREAKER.allow_request():
+        return _stale_decode(vin, "nhtsa_circuit_open")
+
+    leader_vin, decoded = VIN_DECODE_FLIGHTS.do(_decode_flight_key(vin), lambda: (vin, _nhtsa_fetch_decode(vin)))
+    return _flight_result(vin, leader_vin, decoded)
+
+
+def _nhtsa_fetch_decode(vin: str) -> Dict[str, Any]:
+    t0 = time.monotonic()
+    try:
+        payload = nhtsa_client.get_json_hedged(nhtsa_client.decode_vin_url(vin))
+    except Exception as e:
+        NHTSA_BREAKER.record(False, time.monotonic() - t0)
+        return {"ok": False, "error": f"nhtsa_request_failed:{type(e).__name__}"}
+
+    NHTSA_BREAKER.record(True, time.monotonic() - t0)
+    return _parse_nhtsa_payload(payload)
+
+
+async def _nhtsa_decode_vin_async(vin: str) -> Dict[str, Any]:
+    """Non-blocking twin of _nhtsa_decode_vin (bounded by NHTSA_MAX_INFLIGHT upstream calls)."""
+    cached = VIN_DECODE_CACHE.get(vin)
+    if cached is not None:
+        return cached
+    if not NHTSA_BREAKER.allow_request():
+        return _stale_decode(vin, "nhtsa_circuit_open")
+
+    async def fetch() -> tuple:
+        return vin, await _nhtsa_fetch_decode_async(vin)
+
+    leader_vin, decoded = await VIN_DECODE_FLIGHTS.do_async(_decode_flight_key(vin), fetch)
+    return _flight_result(vin, leader_vin, decoded)
+
+
+async def _nhtsa_fetch_decode_async(vin: str) -> Dict[str, Any]:
+    t0 = time.monotonic()
+    try:
+        payload = await nhtsa_client.get_json_hedged_async(nhtsa_client.decode_vin_url(vin))
+    except Exception as e:
+        NHTSA_BREAKER.record(False, time.monotonic() - t0)
+        return {"ok": False, "error": f"nhtsa_request_failed:{type(e).__name__}"}
+
+    NHTSA_BREAKER.record(True, time.monotonic() - t0)
+    return _parse_nhtsa_payload(payload)
+
+
+async def _nhtsa_decode_vins_async(vins: list[str]) -> tuple[Dict[str, Dict[str, Any]], int]:
+    """Decode many VINs: decode cache first, then DecodeVINValuesBatch for the rest.
+
+    Returns ({vin: decoded}, upstream_call_count). Chunks are fetched concurrently but
+    still go through the NHTSA_MAX_INFLIGHT semaphore.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    pending: list[str] = []
+    for vin in dict.fromkeys(vins):
+        cached = VIN_DECODE_CACHE.get(vin)
+        if cached is not None:
+            out[vin] = cached
+        else:
+            pending.append(vin)
+
+    size = nhtsa_client.BATCH_SIZE
+    chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+
+    async def _decode_chunk(chunk: list[str]) -> None:
+        if not NHTSA_BREAKER.allow_request():
+            for vin in chunk:
+                out[vin] = _stale_decode(vin, "nhtsa_circuit_open")
+            return
+        t0 = time.monotonic()
+        try:
+            payload = await nhtsa_client.request_json_async(
+                "POST", nhtsa_client.decode_batch_url(), data=nhtsa_client.decode_batch_form(chunk)
+            )
+        except Exception as e:
+            NHTSA_BREAKER.record(False, time.monotonic() - t0)
+            for vin in chunk:
+                out[vin] = _stale_decode(vin, f"nhtsa_request_failed:{type(e).__name__}")
+            return
+        NHTSA_BREAKER.record(True, time.monotonic() - t0)
+
+        rows = {str(r.get("VIN") or "").strip().upper(): r for r in ((payload or {}).get("Results") or []) if isinstance(r, dict)}
+        for vin in chunk:
+            row = rows.get(vin)
+            if row is None:
+                out[vin] = {"ok": False, "error": "nhtsa_batch_missing_row"}
+            else:
+                out[vin] = _cache_decoded(vin, _parse_nhtsa_row(row))
+
+    await asyncio.gather(*(_decode_chunk(c) for c in chunks))
+    return out, len(chunks)
+
+
+def _cache_decoded(vin: str, decoded: Dict[str, Any]) -> Dict[str, Any]:
+    if decoded.get("ok"):
+        VIN_DECODE_CACHE.set(vin, decoded)
+    return decoded
+
+
+def _parse_nhtsa_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    results = (payload or {}).get("Results") or []
+    return _parse_nhtsa_row(results[0] if results else {})
+
+
+def _parse_nhtsa_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    year = row.get("ModelYear") or row.get("Model Year") or row.get("modelyear")
+    make = row.get("Make")
+    model = row.get("Model")
+    trim = row.get("Trim") or row.get("Series") or row.get("Series2")
+
+    # Engine-related fields (best-effort; varies by VIN / manufacturer)
+    displacement_l = row.get("DisplacementL") or row.get("Displacement (L)")
+    cylinders = row.get("EngineCylinders") or row.get("Engine Cylinders")
+    fuel = row.get("FuelTypePrimary") or row.get("Fuel Type - Primary") or row.get("FuelType")
+    eng_model = row.get("EngineModel")
+    eng_conf = row.get("EngineConfiguration") or row.get("Engine Configuration")
+
+    def _as_float(x):
+        try:
+            return float(str(x).strip())
+        except Exception:
+            return None
+
+    return {
+        "ok": True,
+        "year": int(year) if str(year).isdigit() else None,
+        "make": make.strip() if isinstance(make, str) and make.strip() else None,
+        "model": model.strip() if isinstance(model, str) and model.strip() else None,
+        "trim": trim.strip() if isinstance(trim, str) and trim.strip() else None,
+
+        # Raw-ish strings for display / debugging
+        "engine": (str(eng_model).strip() if eng_model is not None and str(eng_model).strip() else None),
+
+        # Structured engine hints for matching
+        "engine_displacement_l": _as_float(displacement_l),
+        "engine_cylinders": int(cylinders) if str(cylinders).isdigit() else None,
+        "fuel_type": fuel.strip() if isinstance(fuel, str) and fuel.strip() else None,
+        "engine_configuration": eng_conf.strip() if isinstance(eng_conf, str) and eng_conf.strip() else None,
+
+        "raw": row,
+    }
+
+
+def _sqlite_upsert_rollup(signature: str, decoded: Dict[str, Any], status: str, seed_version: Optional[str], app_version: Optional[str]):
+    # IMPORTANT: We do NOT store the VIN (raw or hash) in SQLite.
+    # Queued only; ROLLUPS flushes in the background so requests never wait on SQLite.
+    ROLLUPS.record(signature, decoded, status, seed_version, app_version)
+
+
+def _signature_for(decoded: Dict[str, Any]) -> str:
+    return f"{decoded.get('year')}|{decoded.get('make')}|{decoded.get('model')}|{decoded.get('trim')}|{decoded.get('engine')}"
+
+
+def _parse_signature(signature: Any) -> Optional[Dict[str, Any]]:
+    """year/make/model of a "year|make|model|trim|engine" signature; None when malformed."""
+    parts = str(signature or "").split("|")
+    if len(parts) != 5:
+        return None
+    year = as_int(parts[0])
+    make, model = parts[1].strip(), parts[2].strip()
+    if year is None or not (1950 <= year <= 2100) or make in ("", "None") or model in ("", "None"):
+        return None
+    return {"year": year, "make": make, "model": model}
+
+
+# ---------------- Confirmed VIN mappings ----------------
+# signature -> {"vehicle_id", "engine_code", "count"}, loaded once from vin_confirmed_mappings and
+# kept in sync by /vin/confirm, so a signature users already disambiguated resolves directly.
+# Mappings are global, so one only overrides matching once VIN_CONFIRM_MIN_COUNT confirmations
+# agree on it (a different choice restarts the count).
+VIN_CONFIRM_MIN_COUNT = max(1, int(os.getenv("VIN_CONFIRM_MIN_COUNT", "2")))
+_CONFIRMED_MAPPINGS: Optional[Dict[str, Dict[str, Any]]] = None
+_CONFIRMED_LOCK = threading.Lock()
+
+
+def _confirmed_mappings() -> Dict[str, Dict[str, Any]]:
+    global _CONFIRMED_MAPPINGS
+    if _CONFIRMED_MAPPINGS is not None:
+        return _CONFIRMED_MAPPINGS
+    with _CONFIRMED_LOCK:
+        if _CONFIRMED_MAPPINGS is None:
+            _CONFIRMED_MAPPINGS = TELEMETRY.confirmed_mappings()
+    return _CONFIRMED_MAPPINGS
+
+
+def _sqlite_upsert_confirmed(signature: str, vehicle_id: str, engine_code: Optional[str]) -> int:
+    """Store the user's choice for a signature; returns how often it has been confirmed."""
+    count = TELEMETRY.upsert_confirmed(signature, vehicle_id, engine_code)
+    mappings = _confirmed_mappings()
+    with _CONFIRMED_LOCK:
+        mappings[signature] = {"vehicle_id": vehicle_id, "engine_code": engine_code, "count": count}
+    return count
+
+
+def _fits_decode(vehicle: Dict[str, Any], year: Optional[int], make: Any) -> bool:
+    y0, y1 = as_int(vehicle.get("year_min")), as_int(vehicle.get("year_max"))
+    return year is not None and y0 is not None and y1 is not None and y0 <= year <= y1 and norm(vehicle.get("make")) == norm(make)
+
+
+def _vehicle_by_id(vehicle_id: Any) -> Optional[Dict[str, Any]]:
+    by_id = CATALOG.get().cached(
+        "vehicles_by_id",
+        lambda snap: {
+            v.get("vehicle_id"): v
+            for v in reversed((snap.docs.get("vehicles") or {}).get("vehicles", []))  # first row wins
+            if isinstance(v, dict)
+        },
+    )
+    return by_id.get(vehicle_id)
+
+
+def _canonical_engine_codes(vehicle: Dict[str, Any], year: Optional[int]) -> list[str]:
+    return ENGINE_RESOLVER.resolve_many(
+        vehicle.get("engine_codes") or [], year=year, make=vehicle.get("make"), model=vehicle.get("model")
+    )
+
+def _body_style_from_raw(raw):
+    v = " ".join([
+        str(raw.get("BodyCabType") or ""),
+        str(raw.get("BodyClass") or "")
+    ]).lower()
+    
+    # trucks
+    if any(k in v for k in ["crew", "double"]):
+        return "crew_cab"
+    if any(k in v for k in ["extended", "quad", "king", "access", "super"]):
+        return "extended_cab"
+    if any(k in v for k in ["regular", "standard"]):
+        return "regular_cab"
+
+    # suvs / crossovers
+    if any(k in v for k in ["suv", "sport utility"]):
+        return "suv"
+    if "crossover" in v:
+        return "crossover"
+    
+    # cars
+    if "sedan" in v:
+        return "sedan"
+    if "coupe" in v:
+        return "coupe"
+    if "hatchback" in v:
+        return "hatchback"
+    if "wagon" in v:
+        return "wagon"
+    
+    # vans
+    if any(k in v for k in ["minivan", "van"]):
+        return "minivan"
+
+    return None
+
+
+def _vin_precheck(vin: str) -> Optional[Dict[str, Any]]:
+    """Reject empty/malformed VINs locally so they never cost an NHTSA round-trip."""
+    if not vin:
+        return {"status": "ERROR", "error": "VIN_REQUIRED"}
+    err = validate_vin(vin)
+    if err:
+        return {"status": "ERROR", "error": err, "vin_hash": _vin_hash(vin), "decoded": {}}
+    return None
+
+
+def vin_resolve(payload: Dict[str, Any]):
+    vin = str(payload.get("vin", "")).strip().upper()
+    rejected = _vin_precheck(vin)
+    if rejected:
+        return rejected
+
+    return _resolve_decoded(vin, _nhtsa_decode_vin(vin), payload)
+
+
+@app.post("/vin/resolve")
+async def vin_resolve_async(payload: Dict[str, Any] = Body(...)):
+    """Async /vin/resolve: the NHTSA wait happens on the event loop instead of pinning a
+    threadpool thread, so a slow vPIC can't starve the catalog/oil endpoints. Catalog
+    matching and the SQLite rollup still run in the threadpool (short, blocking work).
+
+    Statuses: RESOLVED, AMBIGUOUS (vehicle_candidates or engine_choices), UNSUPPORTED,
+    ERROR (incl. VIN_INVALID_LENGTH / VIN_INVALID_CHARACTERS / VIN_CHECK_DIGIT_MISMATCH,
+    checked before any vPIC call; VIN_ENFORCE_CHECK_DIGIT=0 accepts bad check digits) and
+    PARTIAL: vPIC unavailable, "decoded" has the year/make read from the VIN itself
+    (source "local", model None) and "models" lists the catalog models to pick from.
+    """
+    vin = str(payload.get("vin", "")).strip().upper()
+    rejected = _vin_precheck(vin)
+    if rejected:
+        return rejected
+
+    decoded = await _nhtsa_decode_vin_async(vin)
+    return await run_in_threadpool(_resolve_decoded, vin, decoded, payload)
+
+
+@app.get("/vin/stats")
+def vin_stats():
+    """Counters for the VIN decode path (cache, request coalescing, upstream client)."""
+    return {
+        "decode_cache": VIN_DECODE_CACHE.stats(),
+        "coalescing": {"key": NHTSA_COALESCE_KEY, **VIN_DECODE_FLIGHTS.stats()},
+        "circuit_breaker": NHTSA_BREAKER.stats(),
+        "hedging": nhtsa_client.HEDGER.stats(),
+        "catalog": CATALOG.stats(),
+        "autopick_lru": AUTOPICK_LRU.stats(),
+        "engine_resolver": ENGINE_RESOLVER.stats(),
+        "telemetry": ROLLUPS.stats(),
+        "upstream": {
+            "pool_size": nhtsa_client.POOL_SIZE,
+            "max_inflight": nhtsa_client.MAX_INFLIGHT,
+            "connect_timeout_s": nhtsa_client.CONNECT_TIMEOUT,
+            "read_timeout_s": nhtsa_client.READ_TIMEOUT,
+            "max_retries": nhtsa_client.MAX_RETRIES,
+        },
+    }
+
+
+# ---------------- Resolution telemetry (reads precomputed aggregates) ----------------
+
+TELEMETRY_STATUSES = ("UNSUPPORTED", "AMBIGUOUS", "RESOLVED")
+
+
+def _telemetry_status(status: Optional[str]) -> Optional[str]:
+    s = str(status or "").strip().upper()
+    return s if s in TELEMETRY_STATUSES else None
+
+
+@app.get("/telemetry/top")
+def telemetry_top(status: str = "UNSUPPORTED", limit: int = 20):
+    """Most frequent (year, make, model, trim, engine) signatures for one status, to prioritize seed work.
+
+    Counts lag live traffic by at most one write-behind flush (TELEMETRY_FLUSH_MS).
+    """
+    st = _telemetry_status(status)
+    if st is None:
+        return {"status": "ERROR", "error": "INVALID_STATUS", "allowed": list(TELEMETRY_STATUSES)}
+    limit = max(1, min(int(limit), 500))
+    return {"resolution_status": st, "limit": limit, "items": TELEMETRY.top_signatures(st, limit)}
+
+
+@app.get("/telemetry/status_mix")
+def telemetry_status_mix(days: int = 30):
+    """Per-day resolution status counts (UTC days) for the last `days` days."""
+    days = max(1, min(int(days), 3660))
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+    return {"since": since, "days": TELEMETRY.status_mix(since)}
+
+
+@app.get("/telemetry/versions")
+def telemetry_versions(status: Optional[str] = None):
+    """Resolution counts by seed_version / app_version (optionally for one status)."""
+    st = _telemetry_status(status) if status else None
+    if status and st is None:
+        return {"status": "ERROR", "error": "INVALID_STATUS", "allowed": list(TELEMETRY_STATUSES)}
+    return {"resolution_status": st, "items": TELEMETRY.version_breakdown(st)}
+
+
+@app.get("/telemetry/monthly")
+def telemetry_monthly(status: Optional[str] = None):
+    """Per-month resolution counts (from the daily status aggregate, so retention doesn't drop them)."""
+    st = _telemetry_status(status) if status else None
+    if status and st is None:
+        return {"status": "ERROR", "error": "INVALID_STATUS", "allowed": list(TELEMETRY_STATUSES)}
+    return {"resolution_status": st, "months": TELEMETRY.monthly_totals(st)}
+
+
+@app.get("/vin/decision_table")
+def vin_decision_table(year: int, make: str, model: str):
+    """Enumerate the VIN auto-pick outcomes for one (year, make, model), for QA.
+
+    Each row is a hint combination (engine model / displacement / cylinders / fuel as a
+    vPIC decode would supply them; null = not decoded) and what /vin/resolve would do.
+    """
+    table = _autopick_table(year, make, model)
+    rows = []
+    for (engine_model, disp, cyl, fuel), outcome in table.outcomes():
+        row: Dict[str, Any] = {
+            "hints": {"engine": engine_model, "engine_displacement_l": disp, "engine_cylinders": cyl, "fuel_type": fuel or None},
+        }
+        if outcome is None:
+            row["status"] = "UNSUPPORTED"
+        elif outcome["kind"] == "vehicles":
+            row["status"] = "AMBIGUOUS"
+            row["vehicle_ids"] = [c.get("vehicle_id") for c in outcome["candidates"]]
+        elif outcome["kind"] == "engines":
+            row["status"] = "AMBIGUOUS"
+            row["vehicle_id"] = outcome["vehicle"].get("vehicle_id")
+            row["engine_codes"] = [c.get("engine_code") for c in outcome["engine_choices"]]
+        else:
+            row["status"] = "RESOLVED"
+            row["vehicle_id"] = outcome["vehicle"].get("vehicle_id")
+            row["engine_code"] = outcome["engine_code"]
+        rows.append(row)
+
+    statuses: Dict[str, int] = {}
+    for r in rows:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    return {
+        "query": {"year": year, "make": make, "model": model},
+        "vehicle_ids": [v.get("vehicle_id") for v in table.vehicles],
+        "count": len(rows),
+        "statuses": statuses,
+        "outcomes": rows,
+    }
+
+
+@app.post("/vin/confirm")
+def vin_confirm(payload: Dict[str, Any] = Body(...)):
+    """Record the vehicle/engine the user picked after an AMBIGUOUS /vin/resolve.
+
+    Body: {"signature": ... (from the AMBIGUOUS response) | "vin": ..., "vehicle_id": ..., "engine_code": ...}
+    engine_code may be omitted when the vehicle has a single engine. The vehicle must be one
+    the signature's year/make/model matches in the catalog. Once VIN_CONFIRM_MIN_COUNT
+    confirmations agree ("active"), resolves with the same decode signature return RESOLVED
+    (resolved_via="confirmed") without matching.
+    """
+    signature = payload.get("signature")
+    if not signature:
+        vin = str(payload.get("vin", "")).strip().upper()
+        if not vin:
+            return {"status": "ERROR", "error": "SIGNATURE_OR_VIN_REQUIRED"}
+        rejected = _vin_precheck(vin)
+        if rejected:
+            return rejected
+        decoded = _nhtsa_decode_vin(vin)
+        if not decoded.get("ok"):
+            return {"status": "ERROR", "error": decoded.get("error", "DECODE_FAILED")}
+        signature = _signature_for(decoded)
+
+    parsed = _parse_signature(signature)
+    if parsed is None:
+        return {"status": "ERROR", "error": "INVALID_SIGNATURE", "signature": signature}
+
+    vehicle = _vehicle_by_id(payload.get("vehicle_id"))
+    if vehicle is None:
+        return {"status": "ERROR", "error": "UNKNOWN_VEHICLE_ID", "vehicle_id": payload.get("vehicle_id")}
+
+    # Only a vehicle /vin/resolve could have offered for this decode may be confirmed.
+    year = parsed["year"]
+    candidates = _autopick_table(year, parsed["make"], parsed["model"]).vehicles
+    if not _fits_decode(vehicle, year, parsed["make"]) or all(v.get("vehicle_id") != vehicle["vehicle_id"] for v in candidates):
+        return {
+            "status": "ERROR",
+            "error": "VEHICLE_NOT_A_CANDIDATE",
+            "signature": signature,
+            "vehicle_id": vehicle["vehicle_id"],
+        }
+
+    engine_codes = _canonical_engine_codes(vehicle, year)
+    engine_code = payload.get("engine_code")
+    if engine_code:
+        engine_code = resolve_engine_code(
+            engine_code, vehicle.get("engine_label"), year=year, make=vehicle.get("make"), model=vehicle.get("model")
+        )
+        if engine_code not in engine_codes:
+            return {"status": "ERROR", "error": "ENGINE_NOT_IN_VEHICLE", "engine_codes": engine_codes}
+    elif len(engine_codes) == 1:
+        engine_code = engine_codes[0]
+    elif engine_codes:
+        return {"status": "ERROR", "error": "ENGINE_CODE_REQUIRED", "engine_codes": engine_codes}
+
+    count = _sqlite_upsert_confirmed(str(signature), vehicle["vehicle_id"], engine_code)
+    return {
+        "status": "OK",
+        "signature": signature,
+        "vehicle_id": vehicle["vehicle_id"],
+        "engine_code": engine_code,
+        "count": count,
+        "active": count >= VIN_CONFIRM_MIN_COUNT,
+    }
+
+
+VIN_BATCH_MAX = int(os.getenv("VIN_BATCH_MAX", "500"))
+
+
+@app.post("/vin/resolve_batch")
+async def vin_resolve_batch(payload: Dict[str, Any] = Body(...)):
+    """Resolve up to VIN_BATCH_MAX VINs in one call (fleet onboarding).
+
+    Body: {"vins": [...], "seed_version": ..., "app_version": ...}
+    Decodes go through the decode cache, then NHTSA DecodeVINValuesBatch (50 VINs per
+    upstream call). Each VIN then runs the same catalog match / engine pick as
+    /vin/resolve; results keep request order and carry their own status.
+    """
+    vins = payload.get("vins")
+    if not isinstance(vins, list) or not vins:
+        return {"status": "ERROR", "error": "VINS_REQUIRED"}
+    if len(vins) > VIN_BATCH_MAX:
+        return {"status": "ERROR", "error": "TOO_MANY_VINS", "max": VIN_BATCH_MAX}
+
+    vins_n = [str(v or "").strip().upper() for v in vins]
+    decoded_by_vin, upstream_calls = await _nhtsa_decode_vins_async([v for v in vins_n if not _vin_precheck(v)])
+    results = await run_in_threadpool(_resolve_batch, vins_n, decoded_by_vin, payload)
+
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r.get("status")] = statuses.get(r.get("status"), 0) + 1
+
+    return {
+        "status": "OK",
+        "count": len(results),
+        "upstream_calls": upstream_calls,
+        "statuses": statuses,
+        "results": results,
+    }
+
+
+def _resolve_batch(vins: list[str], decoded_by_vin: Dict[str, Dict[str, Any]], payload: Dict[str, Any]) -> list[Dict[str, Any]]:
+    results = []
+    for i, vin in enumerate(vins):
+        rejected = _vin_precheck(vin)
+        if rejected:
+            results.append({"index": i, **rejected})
+            continue
+        r = _resolve_decoded(vin, decoded_by_vin.get(vin) or {"ok": False, "error": "DECODE_FAILED"}, payload)
+        results.append({"index": i, **r})
+    return results
+
+
+def _resolve_decoded(vin: str, decoded: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything vin_resolve does after the NHTSA decode: catalog match, engine pick, rollup."""
+    out = _match_decoded(vin, decoded, payload)
+    if decoded.get("stale"):
+        # served from the decode cache while vPIC is failing / circuit is open
+        out["stale"] = True
+    return out
+
+
+def _match_decoded(vin: str, decoded: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    seed_version = payload.get("seed_version")
+    app_version = payload.get("app_version")
+
+    vin_hash = _vin_hash(vin)
+
+    vin_attrs = {
+    "body_style": _body_style_from_raw(decoded.get("raw", {}))
+}
+    
+    local = decode_vin_local(vin)
+
+    if not decoded.get("ok"):
+        # NHTSA unavailable: the VIN itself still tells us year + make, enough to jump the
+        # manual picker straight to model selection.
+        if local.get("year") and local.get("make"):
+            return {
+                "status": "PARTIAL",
+                "vin_hash": vin_hash,
+                "error": decoded.get("error", "DECODE_FAILED"),
+                "decoded": {"year": local["year"], "make": local["make"], "model": None, "source": "local"},
+                "models": get_models(local["year"], local["make"]),
+            }
         return {"status": "ERROR", "error": decoded.get("error", "DECODE_FAILED")}
 
-    year = decoded.get("year")
-    make = decoded.get("make")
+    year = decoded.get("year") or local.get("year")
+    make = decoded.get("make") or local.get("make")
     model = decoded.get("model")
+    if (year, make) != (decoded.get("year"), decoded.get("make")):
+        # filled in from the VIN itself: key the signature, confirmed mappings and telemetry
+        # on the year/make actually matched
+        decoded = {**decoded, "year": year, "make": make}
 
     signature = _signature_for(decoded)
 
@@ -1392,216 +3031,84 @@ def vin_resolve(payload: Dict[str, Any] = Body(...)):
             },
         }
 
-    # 1) Exact match
-    matches = _search_impl(year, make, model)
-
-    # 2) Fuzzy match (punctuation + family models)
-    if not matches:
-        matches = _fuzzy_model_candidates(year, make, model)
+    # 0) The user already picked a vehicle/engine for this exact decode
+    confirmed = _confirmed_mappings().get(signature)
+    if confirmed:
+        out = _resolve_confirmed(confirmed, decoded, year, make, model, vin_hash, vin_attrs)
+        if out is not None:
+            _sqlite_upsert_rollup(signature, decoded, "RESOLVED", seed_version, app_version)
+            return out
+
+    # Vehicle auto-pick + engine pick, probed from the per-(year, make, model) decision table
+    table = _autopick_table(year, make, model)
+    outcome = table.decide(decoded)
+    # catalog names used when the decoded make/model only matched after typo correction
+    corrected = {"corrected": dict(table.corrected)} if table.corrected else {}
+
+    decoded_out = {
+        "year": year,
+        "make": make,
+        "model": model,
+        "trim": decoded.get("trim"),
+        "engine": decoded.get("engine"),
+        "engine_displacement_l": decoded.get("engine_displacement_l"),
+        "engine_cylinders": decoded.get("engine_cylinders"),
+        "fuel_type": decoded.get("fuel_type"),
+    }
 
-    if not matches:
+    if outcome is None:
+        # Model not in the catalog, but the decoded specs may still pin down the engine
+        # (enough for oil / filter lookups by engine code).
+        # Still a catalog gap: telemetry records UNSUPPORTED so /telemetry/top and status_mix
+        # keep showing it; the engine choices only go to the client.
+        match_scope, engine_choices = _engine_match_fallback(year, make, decoded)
+        if engine_choices:
+            _sqlite_upsert_rollup(signature, decoded, "UNSUPPORTED", seed_version, app_version)
+            return {
+                "status": "AMBIGUOUS",
+                "vin_hash": vin_hash,
+                "signature": signature,
+                "decoded": decoded_out,
+                "matched_via": "engine_spec",
+                "engine_match_scope": match_scope,
+                "warning": ENGINE_SPEC_ONLY_WARNING,
+                "vehicle": None,
+                "engine_choices": engine_choices,
+                "suggestions": _catalog_suggestions(year, make, model),
+            }
         _sqlite_upsert_rollup(signature, decoded, "UNSUPPORTED", seed_version, app_version)
         return {
             "status": "UNSUPPORTED",
             "vin_hash": vin_hash,
-            "decoded": {
-                "year": year,
-                "make": make,
-                "model": model,
-                "trim": decoded.get("trim"),
-                "engine": decoded.get("engine"),
-                "engine_displacement_l": decoded.get("engine_displacement_l"),
-                "engine_cylinders": decoded.get("engine_cylinders"),
-                "fuel_type": decoded.get("fuel_type"),
-            },
+            "decoded": decoded_out,
+            "suggestions": _catalog_suggestions(year, make, model),
         }
 
-    # If multiple possible canonical vehicles, try to auto-pick using VIN engine hints; otherwise ask user to choose.
-    if len(matches) > 1:
-        # --- AUTO-PICK best vehicle match using VIN engine hints (GLOBAL) ---
-        hint_disp = decoded.get("engine_displacement_l")
-        hint_engine_model = decoded.get("engine")  # e.g., "L59"
-
-        # 1) If VIN gave an engine model, try map -> canonical engine code and pick a vehicle that contains it.
-        hint_engine_code = None
-        if hint_engine_model:
-            hint_engine_code = resolve_engine_code(
-                hint_engine_model,
-                None,
-                year=year,
-                make=make,
-                model=model,
-            )
-
-        if hint_engine_code:
-            by_engine_code = []
-            for v in matches:
-                if not isinstance(v, dict):
-                    continue
-                lbl = v.get("engine_label")
-                v_eng = [
-                    resolve_engine_code(c, lbl, year=year, make=v.get("make"), model=v.get("model"))
-                    for c in (v.get("engine_codes") or [])
-                    if c
-                ]
-                if hint_engine_code in v_eng:
-                    by_engine_code.append(v)
-            if len(by_engine_code) == 1:
-                matches = by_engine_code
-
-        # 2) If still multiple, use displacement vs engine_label (e.g., 5.3 matches "5.3L V8")
-        if len(matches) > 1 and hint_disp:
-            disp_str = str(hint_disp)
-            by_disp = [
-                v for v in matches
-                if isinstance(v, dict) and disp_str in str(v.get("engine_label", ""))
-            ]
-            if len(by_disp) == 1:
-                matches = by_disp
-        # --- END AUTO-PICK ---
-
-    # If still multiple possible canonical vehicles, ask user to choose (keep list short)
-    if len(matches) > 1:
+    # Still multiple possible canonical vehicles: ask the user to choose
+    if outcome["kind"] == "vehicles":
         _sqlite_upsert_rollup(signature, decoded, "AMBIGUOUS", seed_version, app_version)
-        engines_doc = load_json(DATA / "engines.json")
-        candidates = []
-        for v in matches[:8]:
-            if not isinstance(v, dict):
-                continue
-            # Normalize engine codes for downstream seed lookups
-            lbl = v.get("engine_label")
-            v_eng = [
-                resolve_engine_code(c, lbl, year=year, make=v.get("make"), model=v.get("model"))
-                for c in (v.get("engine_codes") or [])
-                if c
-            ]
-            candidates.append(
-                {
-                    "vehicle_id": v.get("vehicle_id"),
-                    "make": v.get("make"),
-                    "model": v.get("model"),
-                    "year_min": v.get("year_min"),
-                    "year_max": v.get("year_max"),
-                    "engine_label": v.get("engine_label"),
-                    "engine_codes": v_eng,
-                    "engine_names": [engine_display_name(ec, vehicle_engine_label=v.get("engine_label"), engines_doc=engines_doc) for ec in v_eng],
-                }
-            )
         return {
             "status": "AMBIGUOUS",
             "vin_hash": vin_hash,
-            "decoded": {
-                "year": year,
-                "make": make,
-                "model": model,
-                "trim": decoded.get("trim"),
-                "engine": decoded.get("engine"),
-                "engine_displacement_l": decoded.get("engine_displacement_l"),
-                "engine_cylinders": decoded.get("engine_cylinders"),
-                "fuel_type": decoded.get("fuel_type"),
-            },
+            "signature": signature,
+            "decoded": decoded_out,
+            **corrected,
             "vehicle_candidates": _dedupe_candidates(
-                candidates, year=decoded.get("year") if isinstance(decoded, dict) else None
+                copy.deepcopy(outcome["candidates"]), year=decoded.get("year") if isinstance(decoded, dict) else None
             ),
         }
 
-    vehicle = matches[0]
-
-    # Normalize engine codes to canonical codes so seeds can be queried reliably.
-    lbl = vehicle.get("engine_label") if isinstance(vehicle, dict) else None
-    engine_codes = [
-        resolve_engine_code(
-            c,
-            lbl,
-            year=year,
-            make=vehicle.get("make") if isinstance(vehicle, dict) else None,
-            model=vehicle.get("model") if isinstance(vehicle, dict) else None,
-        )
-        for c in ((vehicle.get("engine_codes") or []) if isinstance(vehicle, dict) else [])
-        if c
-    ]
-
-    engines_doc = load_json(DATA / "engines.json")
-
-    # --- Prefer explicit VIN EngineModel (e.g., "L59") when it maps to a canonical code we support ---
-    engine_code: Optional[str] = None
-    raw_engine_model = decoded.get("engine")
-    if raw_engine_model:
-        model_hint = resolve_engine_code(
-            raw_engine_model,
-            lbl,
-            year=year,
-            make=vehicle.get("make") if isinstance(vehicle, dict) else None,
-            model=vehicle.get("model") if isinstance(vehicle, dict) else None,
-        )
-        if model_hint in engine_codes:
-            engine_code = model_hint
-
-    # If not set yet, try to auto-select an engine if VIN decode gives strong hints.
-    if engine_code is None:
-        hint_disp = decoded.get("engine_displacement_l")
-        hint_cyl = decoded.get("engine_cylinders")
-        hint_fuel = norm(decoded.get("fuel_type"))
-
-        def _engine_score(code: str) -> int:
-            e = engines_doc.get(code) or {}
-            score = 0
-            if hint_disp is not None and isinstance(e.get("displacement_l"), (int, float)):
-                if abs(float(e["displacement_l"]) - float(hint_disp)) <= 0.15:
-                    score += 10
-            if hint_cyl is not None and as_int(e.get("cylinders")) == hint_cyl:
-                score += 7
-            if hint_fuel and norm(e.get("fuel_type")) == hint_fuel:
-                score += 4
-            return score
-
-        if len(engine_codes) == 1:
-            engine_code = engine_codes[0]
-        elif len(engine_codes) > 1:
-            scored = [(_engine_score(c), c) for c in engine_codes]
-            scored.sort(reverse=True)
-            # Only auto-pick if it's clearly better than the rest
-            if scored and scored[0][0] >= 10 and (len(scored) == 1 or scored[0][0] >= scored[1][0] + 5):
-                engine_code = scored[0][1]
-
-    # If still ambiguous, return engine choices (with friendly names)
-    if len(engine_codes) > 1 and engine_code is None:
+    # One vehicle, several engines and no clear winner: return engine choices
+    if outcome["kind"] == "engines":
         _sqlite_upsert_rollup(signature, decoded, "AMBIGUOUS", seed_version, app_version)
-        engine_choices = []
-        for c in engine_codes:
-            e = engines_doc.get(c) or {}
-            engine_choices.append(
-                {
-                    "engine_code": c,
-                    "engine_name": engine_display_name(c, vehicle_engine_label=vehicle.get("engine_label") if isinstance(vehicle, dict) else None, engines_doc=engines_doc),
-                    "displacement_l": e.get("displacement_l"),
-                    "cylinders": e.get("cylinders"),
-                    "fuel_type": e.get("fuel_type"),
-                }
-            )
         return {
             "status": "AMBIGUOUS",
             "vin_hash": vin_hash,
-            "decoded": {
-                "year": year,
-                "make": make,
-                "model": model,
-                "trim": decoded.get("trim"),
-                "engine": decoded.get("engine"),
-                "engine_displacement_l": decoded.get("engine_displacement_l"),
-                "engine_cylinders": decoded.get("engine_cylinders"),
-                "fuel_type": decoded.get("fuel_type"),
-            },
-            "vehicle": {
-                "vehicle_id": vehicle.get("vehicle_id"),
-                "make": vehicle.get("make"),
-                "model": vehicle.get("model"),
-                "year_min": vehicle.get("year_min"),
-                "year_max": vehicle.get("year_max"),
-                "engine_label": vehicle.get("engine_label"),
-                "engine_codes": engine_codes,
-            },
-            "engine_choices": engine_choices,
+            "signature": signature,
+            "decoded": decoded_out,
+            **corrected,
+            "vehicle": copy.deepcopy(outcome["vehicle"]),
+            "engine_choices": copy.deepcopy(outcome["engine_choices"]),
         }
 
     _sqlite_upsert_rollup(signature, decoded, "RESOLVED", seed_version, app_version)
@@ -1609,6 +3116,40 @@ def vin_resolve(payload: Dict[str, Any] = Body(...)):
     return {
         "status": "RESOLVED",
         "vin_hash": vin_hash,
+        "decoded": decoded_out,
+        **corrected,
+        "vehicle": copy.deepcopy(outcome["vehicle"]),
+        "engine_code": outcome["engine_code"],
+        "vin_attrs": vin_attrs,
+    }
+
+def _resolve_confirmed(
+    confirmed: Dict[str, Any],
+    decoded: Dict[str, Any],
+    year: Any,
+    make: Any,
+    model: Any,
+    vin_hash: str,
+    vin_attrs: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """RESOLVED response from a confirmed mapping; None if it isn't confirmed often enough,
+    or the catalog no longer has it for this year/make."""
+    if int(confirmed.get("count") or 0) < VIN_CONFIRM_MIN_COUNT:
+        return None
+    vehicle = _vehicle_by_id(confirmed.get("vehicle_id"))
+    if vehicle is None or not _fits_decode(vehicle, as_int(year), make):
+        return None
+    engine_codes = _canonical_engine_codes(vehicle, year)
+    engine_code = confirmed.get("engine_code")
+    if engine_code not in engine_codes:
+        if len(engine_codes) != 1:
+            return None
+        engine_code = engine_codes[0]
+
+    return {
+        "status": "RESOLVED",
+        "resolved_via": "confirmed",
+        "vin_hash": vin_hash,
         "decoded": {
             "year": year,
             "make": make,
@@ -1840,8 +3381,26 @@ def oil_change_by_engine(
     }
 
 
+COVERAGE_FIELDS = (
+    "vehicles_engine_codes",
+    "oil_specs_engine_codes",
+    "oil_capacity_engine_codes",
+    "oil_parts_engine_codes",
+    "present_engine_codes",
+    "missing_engine_codes",
+    "missing_engine_codes_list",
+)
+
+
 @app.get("/oil-change/coverage/missing-engine-codes")
-def coverage():
+def coverage(limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Engine codes in the catalog without a full oil seed. `limit`/`cursor` page through
+    missing_engine_codes_list; `fields=missing_engine_codes` returns just the counts asked for."""
+    try:
+        wanted = paging.parse_fields(fields, COVERAGE_FIELDS)
+    except paging.PagingError as e:
+        return e.as_dict()
+
     vehicles_doc, _, oil_specs, oil_capacity, oil_parts, _, _ = reload_all()
 
     vehicle_codes = set()
@@ -1857,12 +3416,22 @@ def coverage():
     present = vehicle_codes & spec_codes & cap_codes & part_codes
     missing = vehicle_codes - present
 
-    return {
+    out = {
         "vehicles_engine_codes": len(vehicle_codes),
         "oil_specs_engine_codes": len(spec_codes),
         "oil_capacity_engine_codes": len(cap_codes),
         "oil_parts_engine_codes": len(part_codes),
         "present_engine_codes": len(present),
         "missing_engine_codes": len(missing),
-        "missing_engine_codes_list": sorted(missing),
     }
+    if wanted is None or "missing_engine_codes_list" in wanted:
+        listed = _name_page(sorted(missing), limit, cursor, paging.scope_of("coverage"))
+        if isinstance(listed, dict):
+            if listed.get("status") == "ERROR":
+                return listed
+            out["next_cursor"] = listed["next_cursor"]
+            listed = listed["items"]
+        out["missing_engine_codes_list"] = listed
+    if wanted is not None:
+        out = {k: v for k, v in out.items() if k in wanted or k == "next_cursor"}
+    return out
@@ -0,0 +1,116 @@
+"""Consecutive-failure circuit breaker with a background recovery probe.
+
+closed     -> calls go through; failures and slow calls are counted
+open       -> calls are rejected immediately (callers serve stale data instead)
+half_open  -> cooldown elapsed; one background probe runs, real calls stay rejected
+              until it succeeds (closed) or fails (open again). Without a probe, one
+              live call is let through as the trial instead, and the record() of that
+              call decides (another trial is admitted if it never reports back).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        slow_call_s: float = 4.0,
+        open_s: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.slow_call_s = float(slow_call_s)
+        self.open_s = float(open_s)
+        self.probe = probe
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.rejected = 0
+        self.probes = 0
+        self._trial_at: Optional[float] = None  # live trial call in flight (no probe)
+
+    def allow_request(self) -> bool:
+        start_probe = False
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - (self.opened_at or 0) >= self.open_s:
+                self.state = HALF_OPEN
+                start_probe = self.probe is not None
+            if self.state == HALF_OPEN and self.probe is None:
+                if self._trial_at is None or now - self._trial_at >= self.open_s:
+                    self._trial_at = now
+                    self.probes += 1
+                    return True
+            self.rejected += 1
+        if start_probe:
+            threading.Thread(target=self._run_probe, name="circuit-probe", daemon=True).start()
+        return False
+
+    def record(self, ok: bool, latency_s: float) -> None:
+        """Record a finished upstream call. Slow successes count as failures."""
+        if ok and latency_s <= self.slow_call_s:
+            with self._lock:
+                self.consecutive_failures = 0
+                if self.state == HALF_OPEN and self._trial_at is not None:
+                    self._close()
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN and self._trial_at is not None:
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._trial_at = None
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def _run_probe(self) -> None:
+        t0 = time.monotonic()
+        try:
+            ok = bool(self.probe())
+        except Exception:
+            ok = False
+        ok = ok and (time.monotonic() - t0) <= self.slow_call_s
+        with self._lock:
+            self.probes += 1
+            if ok:
+                self._close()
+            else:
+                self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "open_for_s": round(time.monotonic() - self.opened_at, 3) if self.opened_at else None,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "probes": self.probes,
+                "failure_threshold": self.failure_threshold,
+                "slow_call_s": self.slow_call_s,
+                "open_s": self.open_s,
+            }
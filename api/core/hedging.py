@@ -0,0 +1,244 @@
+"""Hedged requests for tail latency.
+
+If the first attempt hasn't answered within the observed latency percentile, a second
+identical attempt is fired and whichever finishes first (successfully) wins. A token
+bucket caps hedges to a fraction of total requests so an upstream slowdown can't turn
+into a load doubling.
+
+Sync attempts run on a small worker pool but never queue there: when every worker is
+busy the call runs unhedged on the caller's thread, and the hedge delay is timed from
+when a worker actually starts the first attempt, so pool waits don't read as upstream
+latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies (seconds) with percentile lookup."""
+
+    def __init__(self, window: int = 512, min_samples: int = 50):
+        self.min_samples = int(min_samples)
+        self._samples: deque[float] = deque(maxlen=int(window))
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float) -> None:
+        with self._lock:
+            self._samples.append(float(latency_s))
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th percentile, or None until min_samples have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+        return ordered[idx]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return {"count": 0}
+
+        def _p(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] * 1000, 2)
+
+        return {"count": len(ordered), "p50_ms": _p(50), "p90_ms": _p(90), "p99_ms": _p(99)}
+
+
+class HedgeBudget:
+    """Each request earns `ratio` tokens (capped at `burst`); each hedge spends one."""
+
+    def __init__(self, ratio: float = 0.05, burst: float = 10.0):
+        self.ratio = float(ratio)
+        self.burst = float(burst)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class Hedger:
+    def __init__(
+        self,
+        *,
+        enabled: bool = False,
+        percentile: float = 95.0,
+        min_delay_s: float = 0.05,
+        max_ratio: float = 0.05,
+        latency: Optional[LatencyTracker] = None,
+        max_workers: int = 16,
+    ):
+        self.enabled = enabled
+        self.percentile = float(percentile)
+        self.min_delay_s = float(min_delay_s)
+        self.latency = latency or LatencyTracker()
+        self.budget = HedgeBudget(ratio=max_ratio)
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._busy = 0  # pool workers running an attempt
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.pool_full = 0
+
+    def delay_s(self) -> Optional[float]:
+        p = self.latency.percentile(self.percentile)
+        return None if p is None else max(self.min_delay_s, p)
+
+    def _start(self) -> Optional[float]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.requests += 1
+        self.budget.on_request()
+        return self.delay_s()
+
+    def _should_hedge(self) -> bool:
+        if self.budget.try_acquire():
+            with self._lock:
+                self.hedges += 1
+            return True
+        with self._lock:
+            self.budget_denied += 1
+        return False
+
+    def _won_by_hedge(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def _reserve(self) -> bool:
+        """Claim an idle pool worker; False (nothing is queued) when all of them are busy."""
+        with self._lock:
+            if self._busy >= self._max_workers:
+                self.pool_full += 1
+                return False
+            self._busy += 1
+            return True
+
+    def _submit(self, fn: Callable[[], Any]) -> Future:
+        """Run fn on a worker claimed with _reserve()."""
+        try:
+            future = self._pool().submit(fn)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Optional[Future] = None) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        delay = self._start()
+        if delay is None:
+            return fn()
+
+        started: list[float] = []
+        ready = threading.Event()
+
+        def attempt() -> Any:
+            started.append(time.monotonic())
+            ready.set()
+            return fn()
+
+        if not self._reserve():
+            return fn()
+        first = self._submit(attempt)
+        while not ready.wait(delay) and not first.done():
+            pass  # not picked up by a worker yet
+        remaining = started[0] + delay - time.monotonic() if started else 0.0
+        done, _ = wait([first], timeout=max(0.0, remaining))
+        if done or not self._reserve():
+            return first.result()
+        if not self._should_hedge():
+            self._release()
+            return first.result()
+        second = self._submit(fn)
+
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    if f is second:
+                        self._won_by_hedge()
+                    return f.result()
+                error = f.exception()
+        raise error  # both attempts failed
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self._start()
+        if delay is None:
+            return await fn()
+
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not self._should_hedge():
+            return await first
+
+        second = asyncio.ensure_future(fn())
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        if t is second:
+                            self._won_by_hedge()
+                        return t.result()
+                    error = t.exception()
+            raise error  # both attempts failed
+        finally:
+            for t in pending:
+                t.cancel()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {
+                "enabled": self.enabled,
+                "percentile": self.percentile,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+                "pool_full": self.pool_full,
+                "max_ratio": self.budget.ratio,
+            }
+        delay = self.delay_s()
+        out["delay_ms"] = round(delay * 1000, 2) if delay is not None else None
+        out["latency"] = self.latency.stats()
+        return out
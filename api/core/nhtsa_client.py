@@ -0,0 +1,257 @@
+"""Shared HTTP client for the NHTSA vPIC API.
+
+One pooled keep-alive session is reused by every decode call so VIN lookups
+stop paying DNS + TCP + TLS setup per request. Tunables come from env vars:
+
+  NHTSA_BASE_URL         vPIC API root (default https://vpic.nhtsa.dot.gov/api/vehicles)
+  NHTSA_POOL_SIZE        max pooled connections to vPIC (default 16)
+  NHTSA_CONNECT_TIMEOUT  seconds to establish a connection (default 3.05)
+  NHTSA_READ_TIMEOUT     seconds to wait for a response (default 8)
+  NHTSA_MAX_RETRIES      retries for idempotent failures (default 2)
+  NHTSA_BACKOFF          base backoff in seconds between retries (default 0.25)
+  NHTSA_BACKOFF_JITTER   max random jitter added to each backoff (default 0.25)
+  NHTSA_MAX_INFLIGHT     max concurrent upstream calls from the async path (default 8)
+  NHTSA_HEDGE            1 to enable hedged decode requests (default off)
+  NHTSA_HEDGE_PERCENTILE observed latency percentile that triggers a hedge (default 95)
+  NHTSA_HEDGE_MAX_RATIO  max hedges as a fraction of requests (default 0.05)
+  NHTSA_HEDGE_MIN_DELAY_MS  floor for the hedge delay (default 50)
+
+The async path (get_json_async) uses httpx when installed and otherwise runs the
+pooled session in a worker thread; either way a semaphore bounds in-flight calls.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import anyio
+
+from api.core.hedging import Hedger, LatencyTracker
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except Exception:  # pragma: no cover
+    requests = None
+
+try:
+    import httpx
+except Exception:  # pragma: no cover
+    httpx = None
+
+
+# Point at Scripts/vpic_stub_server.py (e.g. http://127.0.0.1:8090/api/vehicles) for offline runs.
+NHTSA_BASE_URL = os.getenv("NHTSA_BASE_URL", "https://vpic.nhtsa.dot.gov/api/vehicles").rstrip("/")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+POOL_SIZE = _env_int("NHTSA_POOL_SIZE", 16)
+CONNECT_TIMEOUT = _env_float("NHTSA_CONNECT_TIMEOUT", 3.05)
+READ_TIMEOUT = _env_float("NHTSA_READ_TIMEOUT", 8.0)
+MAX_RETRIES = _env_int("NHTSA_MAX_RETRIES", 2)
+BACKOFF = _env_float("NHTSA_BACKOFF", 0.25)
+BACKOFF_JITTER = _env_float("NHTSA_BACKOFF_JITTER", 0.25)
+MAX_INFLIGHT = _env_int("NHTSA_MAX_INFLIGHT", 8)
+
+# Every successful upstream call feeds the latency window; the hedger derives its delay from it.
+LATENCY = LatencyTracker()
+HEDGER = Hedger(
+    enabled=os.getenv("NHTSA_HEDGE", "0") in {"1", "true", "True"},
+    percentile=_env_float("NHTSA_HEDGE_PERCENTILE", 95.0),
+    max_ratio=_env_float("NHTSA_HEDGE_MAX_RATIO", 0.05),
+    min_delay_s=_env_float("NHTSA_HEDGE_MIN_DELAY_MS", 50.0) / 1000.0,
+    latency=LATENCY,
+    max_workers=POOL_SIZE,
+)
+
+# vPIC answers 429 when throttling and 5xx during incidents; all safe to retry for GETs.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Async client + semaphore per event loop (both are bound to the loop that created them).
+# Each loop also holds a suspended _client_closer: asyncio finalizes pending async
+# generators when a loop shuts down (asyncio.run, TestClient portals, uvicorn), so a
+# loop's client is closed on that loop instead of leaking its pool when the loop changes.
+_async_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+
+def _build_session(pool_size: int = POOL_SIZE) -> "requests.Session":
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        # vPIC POSTs (DecodeVINValuesBatch) are read-only lookups: retry them like GETs,
+        # as request_json_async does.
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+    return s
+
+
+def get_session() -> "requests.Session":
+    """Return the process-wide pooled session (created lazily, thread-safe)."""
+    global _session
+    if requests is None:
+        raise RuntimeError("requests_not_installed")
+    s = _session
+    if s is not None:
+        return s
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        s, _session = _session, None
+    if s is not None:
+        s.close()
+    HEDGER.shutdown()
+
+
+def request_json(method: str, url: str, *, data: Optional[Dict[str, Any]] = None, timeout: Optional[tuple[float, float]] = None) -> Dict[str, Any]:
+    """Send a vPIC request through the pooled session and return the decoded JSON body.
+
+    Raises on transport errors and non-2xx responses (after retries), so callers can keep
+    their existing `except Exception` error mapping.
+    """
+    t0 = time.monotonic()
+    r = get_session().request(method, url, data=data, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+    r.raise_for_status()
+    body = r.json()
+    LATENCY.record(time.monotonic() - t0)
+    return body
+
+
+def get_json(url: str, *, timeout: Optional[tuple[float, float]] = None) -> Dict[str, Any]:
+    return request_json("GET", url, timeout=timeout)
+
+
+def get_json_hedged(url: str) -> Dict[str, Any]:
+    """get_json with an optional hedge (NHTSA_HEDGE); only for idempotent lookups."""
+    return HEDGER.call(lambda: get_json(url))
+
+
+def decode_vin_url(vin: str) -> str:
+    return f"{NHTSA_BASE_URL}/DecodeVinValuesExtended/{vin}?format=json"
+
+
+# vPIC accepts at most 50 VINs per DecodeVINValuesBatch call.
+BATCH_SIZE = min(50, max(1, _env_int("NHTSA_BATCH_SIZE", 50)))
+
+
+def decode_batch_url() -> str:
+    return f"{NHTSA_BASE_URL}/DecodeVINValuesBatch/"
+
+
+def decode_batch_form(vins: list[str]) -> Dict[str, str]:
+    return {"format": "json", "data": ";".join(vins)}
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Same schedule urllib3 uses for the sync session: factor * 2^n plus jitter.
+    return BACKOFF * (2 ** attempt) + random.uniform(0, BACKOFF_JITTER)
+
+
+async def _client_closer(loop: asyncio.AbstractEventLoop, client: Any) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        _async_states.pop(loop, None)
+        await client.aclose()
+
+
+async def _async_state():
+    loop = asyncio.get_running_loop()
+    state = _async_states.get(loop)
+    if state is not None:
+        return state[0], state[1]
+    sem = asyncio.Semaphore(MAX_INFLIGHT)
+    client = closer = None
+    if httpx is not None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            headers={"Accept": "application/json"},
+        )
+        closer = _client_closer(loop, client)
+        await closer.__anext__()
+    _async_states[loop] = (client, sem, closer)
+    return client, sem
+
+
+async def request_json_async(method: str, url: str, *, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async counterpart of request_json: same retry/backoff policy, bounded by MAX_INFLIGHT.
+
+    All vPIC calls are read-only lookups, so POSTs (batch decode) are retried like GETs.
+    """
+    client, sem = await _async_state()
+    async with sem:
+        if client is None:
+            return await anyio.to_thread.run_sync(lambda: request_json(method, url, data=data))
+
+        attempt = 0
+        t0 = time.monotonic()
+        while True:
+            try:
+                r = await client.request(method, url, data=data)
+                if r.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    raise httpx.HTTPStatusError("retryable status", request=r.request, response=r)
+                r.raise_for_status()
+                body = r.json()
+                LATENCY.record(time.monotonic() - t0)
+                return body
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt >= MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_backoff_delay(attempt))
+                attempt += 1
+
+
+async def get_json_async(url: str) -> Dict[str, Any]:
+    return await request_json_async("GET", url)
+
+
+async def get_json_hedged_async(url: str) -> Dict[str, Any]:
+    return await HEDGER.call_async(lambda: get_json_async(url))
+
+
+async def aclose_async_client() -> None:
+    """Close the running loop's client now (app shutdown) rather than when the loop ends."""
+    state = _async_states.pop(asyncio.get_running_loop(), None)
+    if state is not None and state[2] is not None:
+        await state[2].aclose()
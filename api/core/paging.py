@@ -0,0 +1,121 @@
+"""Cursor pagination and sparse fieldsets (?fields=) for list endpoints.
+
+A cursor is opaque to clients: urlsafe base64 of the next offset, the catalog generation
+and a hash of the listing it belongs to (endpoint + query). It only continues that
+listing on that generation; after a data reload clients restart from the first page.
+
+Projection happens while encoding: each record is written to JSON with just the
+requested fields, so catalog rows shared through the snapshot are never copied and
+computed fields (canonical engine codes, ...) are only computed when asked for.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from starlette.responses import Response
+
+Getter = Callable[[Any], Any]
+
+
+class PagingError(ValueError):
+    def __init__(self, code: str, **detail: Any):
+        super().__init__(code)
+        self.code = code
+        self.detail = detail
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"status": "ERROR", "error": self.code, **self.detail}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def scope_of(*parts: Any) -> str:
+    return hashlib.sha1(_dumps(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(offset: int, generation: int, scope: str) -> str:
+    raw = _dumps({"o": offset, "g": generation, "s": scope}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], generation: int, scope: str) -> int:
+    """Offset encoded in `cursor` (0 when absent)."""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(data["o"])
+    except Exception:
+        raise PagingError("INVALID_CURSOR")
+    if data.get("s") != scope or offset < 0:
+        raise PagingError("INVALID_CURSOR")
+    if data.get("g") != generation:
+        raise PagingError("CURSOR_EXPIRED", hint="catalog changed; restart from the first page")
+    return offset
+
+
+def page(total: int, offset: int, limit: int, generation: int, scope: str) -> Tuple[int, int, Optional[str]]:
+    """(start, end, next_cursor) of one page."""
+    start = min(offset, total)
+    end = min(start + max(1, limit), total)
+    return start, end, (encode_cursor(end, generation, scope) if end < total else None)
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """?fields=a,b -> ("a", "b"); None when not given (= every field)."""
+    if fields is None or not fields.strip():
+        return None
+    wanted = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in allowed]
+    if unknown:
+        raise PagingError("UNKNOWN_FIELDS", unknown=unknown, allowed=list(allowed))
+    return wanted
+
+
+class RecordEncoder:
+    """Writes records as JSON objects holding only the selected fields.
+
+    getters maps computed fields to functions of the record; every other field is
+    record.get(field). With fields=None each record keeps its own keys (plus `extra`).
+    """
+
+    def __init__(self, fields: Optional[Sequence[str]], getters: Optional[Dict[str, Getter]] = None, extra: Sequence[str] = ()):
+        self.fields = tuple(fields) if fields is not None else None
+        self.getters = dict(getters or {})
+        self.extra = tuple(extra)
+        self._keys: Dict[str, str] = {}
+
+    def _key(self, field: str) -> str:
+        k = self._keys.get(field)
+        if k is None:
+            k = self._keys[field] = _dumps(field)
+        return k
+
+    def encode(self, record: Any) -> str:
+        fields = self.fields if self.fields is not None else tuple(record) + self.extra
+        parts = []
+        for f in fields:
+            getter = self.getters.get(f)
+            value = getter(record) if getter is not None else record.get(f)
+            parts.append(self._key(f) + ":" + _dumps(value))
+        return "{" + ",".join(parts) + "}"
+
+    def encode_list(self, records: Iterable[Any]) -> Tuple[str, Optional[str]]:
+        """(JSON array, first element's JSON or None)."""
+        encoded = [self.encode(r) for r in records]
+        return "[" + ",".join(encoded) + "]", (encoded[0] if encoded else None)
+
+
+def json_response(envelope: Dict[str, Any], fragments: Optional[Dict[str, Optional[str]]] = None) -> Response:
+    """envelope plus pre-encoded JSON fragments as top-level keys (None -> null)."""
+    body = _dumps(envelope)
+    if fragments:
+        extra = ",".join(_dumps(k) + ":" + (v if v is not None else "null") for k, v in fragments.items())
+        body = body[:-1] + ("," if envelope else "") + extra + "}"
+    return Response(content=body.encode("utf-8"), media_type="application/json")
@@ -0,0 +1,602 @@
+"""SQLite store for VIN resolution telemetry (Maintenance/Data/vin_events.db).
+
+The schema is created once (at app startup, or lazily on first use) and the database runs
+in WAL mode with synchronous=NORMAL, so readers never block the writer and a commit does
+not wait for an fsync. Each thread keeps its own connection; every rollup is a single
+INSERT ... ON CONFLICT DO UPDATE. No VIN (raw or hashed) is ever stored here.
+
+Request handlers don't write directly: RollupWriter batches increments in memory and
+flushes them from a background thread. Each flush also feeds monthly partition tables
+(vin_events_YYYYMM); apply_retention() folds expired months into vin_events_summary and
+maintain() runs incremental VACUUM / ANALYZE (see Scripts/telemetry_maintenance.py).
+"""
+from __future__ import annotations
+
+import atexit
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS vin_resolution_events (
+        signature TEXT PRIMARY KEY,
+        year INTEGER,
+        make TEXT,
+        model TEXT,
+        trim TEXT,
+        engine TEXT,
+        resolution_status TEXT,
+        count INTEGER,
+        first_seen_at TEXT,
+        last_seen_at TEXT,
+        seed_version TEXT,
+        app_version TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS vin_confirmed_mappings (
+        signature TEXT PRIMARY KEY,
+        confirmed_vehicle_id TEXT,
+        confirmed_engine_code TEXT,
+        count INTEGER,
+        last_seen_at TEXT
+    )""",
+    # Aggregates below are maintained incrementally by upsert_rollups(), so the
+    # /telemetry endpoints read a handful of indexed rows instead of scanning events.
+    """CREATE TABLE IF NOT EXISTS vin_signature_status_counts (
+        signature TEXT NOT NULL,
+        resolution_status TEXT NOT NULL,
+        year INTEGER,
+        make TEXT,
+        model TEXT,
+        engine TEXT,
+        count INTEGER NOT NULL DEFAULT 0,
+        last_seen_at TEXT,
+        PRIMARY KEY (signature, resolution_status)
+    )""",
+    """CREATE TABLE IF NOT EXISTS vin_status_daily (
+        day TEXT NOT NULL,
+        resolution_status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, resolution_status)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS vin_version_counts (
+        seed_version TEXT NOT NULL,
+        app_version TEXT NOT NULL,
+        resolution_status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        last_seen_at TEXT,
+        PRIMARY KEY (seed_version, app_version, resolution_status)
+    ) WITHOUT ROWID""",
+    # Monthly partitions (vin_events_YYYYMM) that age out of retention are rolled up here.
+    """CREATE TABLE IF NOT EXISTS vin_events_summary (
+        month TEXT NOT NULL,
+        resolution_status TEXT NOT NULL,
+        year INTEGER NOT NULL DEFAULT 0,
+        make TEXT NOT NULL DEFAULT '',
+        model TEXT NOT NULL DEFAULT '',
+        signatures INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, resolution_status, year, make, model)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_events_status_count ON vin_resolution_events (resolution_status, count DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_events_ymm ON vin_resolution_events (year, make, model)",
+    "CREATE INDEX IF NOT EXISTS ix_sig_status_count ON vin_signature_status_counts (resolution_status, count DESC)",
+)
+
+# One-time seed of the per-status aggregates from rollups written before they existed
+# (older rows only know their latest status; daily buckets can't be reconstructed).
+_BACKFILL = (
+    """INSERT OR IGNORE INTO vin_signature_status_counts
+           (signature, resolution_status, year, make, model, engine, count, last_seen_at)
+       SELECT signature, resolution_status, year, make, model, engine, COALESCE(count, 0), last_seen_at
+       FROM vin_resolution_events WHERE resolution_status IS NOT NULL""",
+    """INSERT INTO vin_version_counts (seed_version, app_version, resolution_status, count, last_seen_at)
+       SELECT COALESCE(seed_version, ''), COALESCE(app_version, ''), resolution_status, SUM(COALESCE(count, 0)), MAX(last_seen_at)
+       FROM vin_resolution_events WHERE resolution_status IS NOT NULL
+       GROUP BY 1, 2, 3
+       ON CONFLICT DO NOTHING""",
+)
+
+_UPSERT_ROLLUP = """
+    INSERT INTO vin_resolution_events
+        (signature, year, make, model, trim, engine, resolution_status, count,
+         first_seen_at, last_seen_at, seed_version, app_version)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(signature) DO UPDATE SET
+        count = COALESCE(count, 0) + excluded.count,
+        last_seen_at = excluded.last_seen_at,
+        resolution_status = excluded.resolution_status,
+        seed_version = COALESCE(excluded.seed_version, seed_version),
+        app_version = COALESCE(excluded.app_version, app_version)
+"""
+
+_UPSERT_SIGNATURE_STATUS = """
+    INSERT INTO vin_signature_status_counts
+        (signature, resolution_status, year, make, model, engine, count, last_seen_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(signature, resolution_status) DO UPDATE SET
+        count = count + excluded.count,
+        last_seen_at = excluded.last_seen_at
+"""
+
+_UPSERT_DAILY = """
+    INSERT INTO vin_status_daily (day, resolution_status, count) VALUES (?, ?, ?)
+    ON CONFLICT(day, resolution_status) DO UPDATE SET count = count + excluded.count
+"""
+
+_UPSERT_VERSION = """
+    INSERT INTO vin_version_counts (seed_version, app_version, resolution_status, count, last_seen_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(seed_version, app_version, resolution_status) DO UPDATE SET
+        count = count + excluded.count,
+        last_seen_at = MAX(last_seen_at, excluded.last_seen_at)
+"""
+
+_PARTITION_RE = re.compile(r"^vin_events_(\d{6})$")
+
+_PARTITION_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        signature TEXT NOT NULL,
+        resolution_status TEXT NOT NULL,
+        year INTEGER,
+        make TEXT,
+        model TEXT,
+        count INTEGER NOT NULL DEFAULT 0,
+        first_seen_at TEXT,
+        last_seen_at TEXT,
+        PRIMARY KEY (signature, resolution_status)
+    ) WITHOUT ROWID
+"""
+
+_UPSERT_PARTITION = """
+    INSERT INTO {table} (signature, resolution_status, year, make, model, count, first_seen_at, last_seen_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(signature, resolution_status) DO UPDATE SET
+        count = count + excluded.count,
+        last_seen_at = excluded.last_seen_at
+"""
+
+
+def partition_table(month: str) -> str:
+    """'2025-03' -> 'vin_events_202503' (validated: the name is interpolated into SQL)."""
+    table = "vin_events_" + month.replace("-", "")
+    if not _PARTITION_RE.match(table):
+        raise ValueError(f"bad partition month: {month!r}")
+    return table
+
+
+def _month_add(month: str, delta: int) -> str:
+    y, m = int(month[:4]), int(month[5:7])
+    idx = y * 12 + (m - 1) + delta
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+_UPSERT_CONFIRMED = """
+    INSERT INTO vin_confirmed_mappings
+        (signature, confirmed_vehicle_id, confirmed_engine_code, count, last_seen_at)
+    VALUES (?, ?, ?, 1, ?)
+    ON CONFLICT(signature) DO UPDATE SET
+        -- a different choice starts its own tally instead of inheriting the old one's
+        count = CASE
+            WHEN confirmed_vehicle_id IS excluded.confirmed_vehicle_id
+             AND confirmed_engine_code IS excluded.confirmed_engine_code
+            THEN COALESCE(count, 0) + 1 ELSE 1 END,
+        confirmed_vehicle_id = excluded.confirmed_vehicle_id,
+        confirmed_engine_code = excluded.confirmed_engine_code,
+        last_seen_at = excluded.last_seen_at
+"""
+
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class TelemetryStore:
+    def __init__(self, path: Path, *, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+        self._ready = False
+        self._partitions: set = set()
+
+    def init_schema(self) -> None:
+        """Create the folder, switch to WAL and create tables. Safe to call repeatedly."""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout_ms / 1000.0)
+            try:
+                # Only takes effect on a new (empty) db; older files are converted by
+                # Scripts/telemetry_maintenance.py --convert.
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("PRAGMA journal_mode=WAL")  # persistent: stored in the db file
+                fresh = not conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'vin_signature_status_counts'"
+                ).fetchone()
+                for ddl in SCHEMA:
+                    conn.execute(ddl)
+                if fresh:
+                    for sql in _BACKFILL:
+                        conn.execute(sql)
+                conn.commit()
+                self._partitions = {
+                    name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    if _PARTITION_RE.match(name)
+                }
+            finally:
+                conn.close()
+            self._ready = True
+
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; one statement = one transaction)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.init_schema()
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=self.busy_timeout_ms / 1000.0,
+                isolation_level=None,
+                check_same_thread=False,  # only so close() can run from the shutdown thread
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def upsert_rollup(
+        self,
+        signature: str,
+        decoded: Dict[str, Any],
+        status: str,
+        seed_version: Optional[str],
+        app_version: Optional[str],
+        *,
+        count: int = 1,
+        seen_at: Optional[str] = None,
+    ) -> None:
+        now = seen_at or utc_now_iso()
+        self.conn().execute(
+            _UPSERT_ROLLUP,
+            (
+                signature,
+                decoded.get("year"),
+                decoded.get("make"),
+                decoded.get("model"),
+                decoded.get("trim"),
+                decoded.get("engine"),
+                status,
+                int(count),
+                now,
+                now,
+                seed_version,
+                app_version,
+            ),
+        )
+
+    def upsert_rollups(self, rows: List[tuple]) -> None:
+        """Apply many pre-aggregated rollups in one transaction.
+
+        rows: (signature, year, make, model, trim, engine, status, count, first_seen_at,
+        last_seen_at, seed_version, app_version), oldest last_seen_at first.
+        """
+        daily: Dict[tuple, int] = {}
+        versions: Dict[tuple, list] = {}
+        monthly: Dict[str, list] = {}
+        for r in rows:
+            monthly.setdefault(partition_table(r[9][:7]), []).append((r[0], r[6], r[1], r[2], r[3], r[7], r[8], r[9]))
+            status, count, last_seen = r[6], r[7], r[9]
+            key = (last_seen[:10], status)
+            daily[key] = daily.get(key, 0) + count
+            vkey = (r[10] or "", r[11] or "", status)
+            agg = versions.setdefault(vkey, [0, last_seen])
+            agg[0] += count
+            agg[1] = max(agg[1], last_seen)
+
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT_ROLLUP, rows)
+            conn.executemany(_UPSERT_SIGNATURE_STATUS, [(r[0], r[6], r[1], r[2], r[3], r[5], r[7], r[9]) for r in rows])
+            conn.executemany(_UPSERT_DAILY, [(day, status, n) for (day, status), n in daily.items()])
+            conn.executemany(_UPSERT_VERSION, [(sv, av, st, n, seen) for (sv, av, st), (n, seen) in versions.items()])
+            for table, part_rows in monthly.items():
+                if table not in self._partitions:
+                    conn.execute(_PARTITION_DDL.format(table=table))
+                conn.executemany(_UPSERT_PARTITION.format(table=table), part_rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._partitions.update(monthly)
+
+    def upsert_confirmed(self, signature: str, vehicle_id: str, engine_code: Optional[str]) -> int:
+        """Store the user's choice for a signature; returns how often it has been confirmed."""
+        conn = self.conn()
+        conn.execute(_UPSERT_CONFIRMED, (signature, vehicle_id, engine_code, utc_now_iso()))
+        row = conn.execute("SELECT count FROM vin_confirmed_mappings WHERE signature = ?", (signature,)).fetchone()
+        return int(row[0]) if row else 1
+
+    def confirmed_mappings(self) -> Dict[str, Dict[str, Any]]:
+        rows = self.conn().execute(
+            "SELECT signature, confirmed_vehicle_id, confirmed_engine_code, count FROM vin_confirmed_mappings"
+        ).fetchall()
+        return {
+            sig: {"vehicle_id": vehicle_id, "engine_code": engine_code, "count": int(count or 0)}
+            for sig, vehicle_id, engine_code, count in rows
+            if sig and vehicle_id
+        }
+
+    # ---- aggregate queries (each one an index range scan) ----
+
+    def top_signatures(self, status: str, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self.conn().execute(
+            """SELECT signature, year, make, model, engine, count, last_seen_at
+               FROM vin_signature_status_counts
+               WHERE resolution_status = ?
+               ORDER BY count DESC
+               LIMIT ?""",
+            (status, int(limit)),
+        ).fetchall()
+        keys = ("signature", "year", "make", "model", "engine", "count", "last_seen_at")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def status_mix(self, since_day: str, until_day: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self.conn().execute(
+            """SELECT day, resolution_status, count FROM vin_status_daily
+               WHERE day >= ? AND day <= ?
+               ORDER BY day""",
+            (since_day, until_day or "9999-12-31"),
+        ).fetchall()
+        out: List[Dict[str, Any]] = []
+        for day, status, count in rows:
+            if not out or out[-1]["day"] != day:
+                out.append({"day": day, "total": 0, "statuses": {}})
+            out[-1]["statuses"][status] = count
+            out[-1]["total"] += count
+        return out
+
+    def version_breakdown(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT seed_version, app_version, resolution_status, count, last_seen_at FROM vin_version_counts"
+        args: tuple = ()
+        if status:
+            sql += " WHERE resolution_status = ?"
+            args = (status,)
+        rows = self.conn().execute(sql + " ORDER BY count DESC", args).fetchall()
+        return [
+            {"seed_version": sv or None, "app_version": av or None, "status": st, "count": n, "last_seen_at": seen}
+            for sv, av, st, n, seen in rows
+        ]
+
+    def partitions(self) -> List[str]:
+        rows = self.conn().execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'vin_events_%'")
+        return sorted(name for (name,) in rows if _PARTITION_RE.match(name))
+
+    def monthly_totals(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-month counts, summed from the daily status aggregate (a few hundred rows a
+        year; unlike the partitions, it is never dropped by retention)."""
+        where, args = (" WHERE resolution_status = ?", (status,)) if status else ("", ())
+        totals: Dict[str, Dict[str, int]] = {}
+        for month, st, n in self.conn().execute(
+            "SELECT substr(day, 1, 7), resolution_status, SUM(count) FROM vin_status_daily" + where + " GROUP BY 1, 2", args
+        ):
+            totals.setdefault(month, {})[st] = n
+        return [{"month": m, "statuses": totals[m], "total": sum(totals[m].values())} for m in sorted(totals)]
+
+    def apply_retention(self, keep_months: int, *, now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Roll partitions older than keep_months into vin_events_summary and drop them.
+
+        Rollup/aggregate rows whose signature hasn't been seen since the cutoff are deleted
+        too; their counts live on in the summary. Daily and version aggregates are tiny and
+        kept as they are.
+        """
+        keep_months = max(1, int(keep_months))
+        current = (now or datetime.now(timezone.utc)).strftime("%Y-%m")
+        cutoff_month = _month_add(current, -(keep_months - 1))
+        cutoff_ts = cutoff_month + "-01"
+        expired = [t for t in self.partitions() if t < partition_table(cutoff_month)]
+        out: Dict[str, Any] = {"cutoff": cutoff_ts, "rolled_up": expired, "deleted_rollups": 0, "dry_run": dry_run}
+        if dry_run:
+            return out
+
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in expired:
+                m = _PARTITION_RE.match(table).group(1)
+                conn.execute(
+                    f"""INSERT INTO vin_events_summary
+                            (month, resolution_status, year, make, model, signatures, count)
+                        SELECT ?, resolution_status, COALESCE(year, 0), COALESCE(make, ''), COALESCE(model, ''), COUNT(*), SUM(count)
+                        FROM {table} GROUP BY 2, 3, 4, 5
+                        ON CONFLICT(month, resolution_status, year, make, model) DO UPDATE SET
+                            signatures = signatures + excluded.signatures,
+                            count = count + excluded.count""",
+                    (f"{m[:4]}-{m[4:]}",),
+                )
+                conn.execute(f"DROP TABLE {table}")
+            out["deleted_rollups"] = conn.execute(
+                "DELETE FROM vin_resolution_events WHERE last_seen_at < ?", (cutoff_ts,)
+            ).rowcount
+            conn.execute("DELETE FROM vin_signature_status_counts WHERE last_seen_at < ?", (cutoff_ts,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._partitions.difference_update(expired)
+        return out
+
+    def maintain(self, *, vacuum_pages: int = 0, convert: bool = False) -> Dict[str, Any]:
+        """Incremental VACUUM + planner stats. convert=True rewrites a pre-existing file once
+        (full VACUUM) so that incremental vacuum becomes available."""
+        conn = self.conn()
+        out: Dict[str, Any] = {}
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 2 and convert:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            out["converted"] = True
+        out["auto_vacuum"] = {0: "none", 1: "full", 2: "incremental"}.get(mode, mode)
+
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if mode == 2:
+            # executescript steps the pragma to completion; execute() would free a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});" if vacuum_pages else "PRAGMA incremental_vacuum;")
+        out["freelist_pages"] = {"before": free_before, "after": conn.execute("PRAGMA freelist_count").fetchone()[0]}
+
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        out["wal_checkpoint"] = list(conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone())
+        out["page_count"] = conn.execute("PRAGMA page_count").fetchone()[0]
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+class RollupWriter:
+    """Write-behind queue for rollups: requests only touch an in-memory dict.
+
+    Increments are aggregated per (signature, status, seed/app version). A daemon thread
+    flushes them in one transaction every flush_ms, or sooner once flush_events increments
+    are pending. At most max_pending distinct keys are held; increments for new keys beyond
+    that are dropped and counted. stop() (app shutdown / interpreter exit) flushes whatever
+    is left.
+    """
+
+    def __init__(self, store: TelemetryStore, *, flush_ms: int = 1000, flush_events: int = 500, max_pending: int = 10000):
+        self.store = store
+        self.flush_s = max(0.01, flush_ms / 1000.0)
+        self.flush_events = max(1, int(flush_events))
+        self.max_pending = max(1, int(max_pending))
+
+        self._cond = threading.Condition()
+        self._pending: Dict[tuple, list] = {}
+        self._pending_events = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._atexit = False
+
+        self.recorded = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self.last_flush_ms: Optional[float] = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+            self._thread.start()
+            register, self._atexit = not self._atexit, True
+        if register:  # once per writer, however often it is stopped and restarted
+            atexit.register(self.stop)
+
+    def record(
+        self,
+        signature: str,
+        decoded: Dict[str, Any],
+        status: str,
+        seed_version: Optional[str],
+        app_version: Optional[str],
+    ) -> bool:
+        """Queue one increment; returns False if it was dropped (queue full)."""
+        if self._thread is None:
+            self.start()
+        now = utc_now_iso()
+        key = (signature, status, seed_version, app_version)
+        with self._cond:
+            row = self._pending.get(key)
+            if row is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return False
+                self._pending[key] = [
+                    signature, decoded.get("year"), decoded.get("make"), decoded.get("model"),
+                    decoded.get("trim"), decoded.get("engine"), status, 1, now, now, seed_version, app_version,
+                ]
+            else:
+                row[7] += 1
+                row[9] = now
+            self.recorded += 1
+            self._pending_events += 1
+            if self._pending_events >= self.flush_events:
+                self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and self._pending_events < self.flush_events:
+                    self._cond.wait(self.flush_s)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written."""
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            self._pending_events = 0
+        if not batch:
+            return 0
+        rows = sorted((tuple(r) for r in batch.values()), key=lambda r: r[9])
+        t0 = time.perf_counter()
+        try:
+            self.store.upsert_rollups(rows)
+        except Exception:
+            with self._cond:
+                self.flush_errors += 1
+                self.dropped += sum(r[7] for r in rows)
+            return 0
+        with self._cond:
+            self.flushes += 1
+            self.flushed_rows += len(rows)
+            self.last_flush_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return len(rows)
+
+    def stop(self) -> None:
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout=10)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "running": self._thread is not None,
+                "pending_keys": len(self._pending),
+                "pending_events": self._pending_events,
+                "recorded": self.recorded,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "flush_errors": self.flush_errors,
+                "last_flush_ms": self.last_flush_ms,
+                "flush_ms": round(self.flush_s * 1000),
+                "flush_events": self.flush_events,
+                "max_pending": self.max_pending,
+            }
@@ -0,0 +1,61 @@
+"""Small thread-safe TTL + LRU cache used for in-process memoization (e.g. VIN decodes).
+
+Expired entries are kept for `stale_ttl` more seconds so callers can fall back to them
+(get_stale) when the source of truth is unavailable.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400.0, stale_ttl: float = 0.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Return the value even if expired, as long as it is within stale_ttl."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] + self.stale_ttl <= now:
+                return None
+            self.stale_hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl_s": self.ttl, "stale_ttl_s": self.stale_ttl,
+                    "hits": self.hits, "misses": self.misses, "stale_hits": self.stale_hits}
@@ -10,6 +10,7 @@ SEEDS = ROOT / "Maintenance" / "Seeds"
 
 VEHICLES_PATH = DATA / "vehicles.json"
 ENGINES_PATH = DATA / "engines.json"
+WMI_PATH = DATA / "wmi_makes.json"
 
 OIL_SPECS_PATH = SEEDS / "oil_specs_seed.json"
 OIL_CAPACITY_PATH = SEEDS / "oil_capacity_seed.json"
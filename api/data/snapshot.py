@@ -0,0 +1,81 @@
+"""In-process snapshot of catalog files, invalidated when a file's mtime/size changes.
+
+Structures derived from the catalog (lookup tables, indexes) hang off the snapshot via
+cached(name, builder), so they are built once per generation and dropped automatically
+when the underlying JSON is edited.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from api.data.loaders import load_optional
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class SnapshotState:
+    """One immutable generation of the loaded files plus its derived-structure cache."""
+
+    def __init__(self, generation: int, stamps: Dict[str, Any], docs: Dict[str, Dict[str, Any]]):
+        self.generation = generation
+        self.stamps = stamps
+        self.docs = docs
+        self._derived: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, name: Hashable, builder: Callable[["SnapshotState"], Any]) -> Any:
+        """Return builder(self), computed at most once per name for this generation."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        value = builder(self)
+        with self._lock:
+            return self._derived.setdefault(name, value)
+
+    def __len__(self) -> int:
+        return len(self._derived)
+
+
+class Snapshot:
+    def __init__(self, paths: Dict[str, Path]):
+        self.paths = dict(paths)
+        self._state: Optional[SnapshotState] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _stamps(self) -> Dict[str, Any]:
+        return {name: _stamp(p) for name, p in self.paths.items()}
+
+    def get(self) -> SnapshotState:
+        """Current generation; reloads every file if any of them changed on disk."""
+        stamps = self._stamps()
+        state = self._state
+        if state is not None and state.stamps == stamps:
+            return state
+        with self._lock:
+            state = self._state
+            if state is not None and state.stamps == stamps:
+                return state
+            docs = {name: load_optional(p) for name, p in self.paths.items()}
+            gen = (state.generation + 1) if state is not None else 1
+            self._state = SnapshotState(gen, stamps, docs)
+            self.reloads += 1
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "generation": state.generation if state else 0,
+            "reloads": self.reloads,
+            "derived_entries": len(state) if state else 0,
+        }
@@ -0,0 +1,155 @@
+"""Per-record content hashes for delta sync of the catalog and seeds.
+
+A manifest maps collection -> record key -> content hash; its version is a hash of the
+whole manifest, so the same data always gets the same version, across restarts and
+hosts. Clients send back the version they hold, and diff() against the remembered
+manifest for that version tells which records were added, changed or removed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+Hashes = Dict[str, Dict[str, str]]  # collection -> key -> content hash
+
+
+def record_hash(record: Any) -> str:
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def keyed_records(doc: Any, container: Optional[str], key_fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """key -> record for one seed/catalog document.
+
+    container None means the document itself is the collection. key_fields None means the
+    collection is a dict already keyed by id; otherwise it is a list and each record's key
+    joins those fields ("audi_a4|[2009, 2016]"). Records sharing a key are told apart by
+    their content hash ("audi_a4|[2009, 2016]#<hash>"), not their position, so deleting or
+    reordering one of them doesn't rename the others; identical copies add "~2", "~3".
+    """
+    coll = doc.get(container) if (container and isinstance(doc, dict)) else doc
+    out: Dict[str, Any] = {}
+    if key_fields is None:
+        if isinstance(coll, dict):
+            for k, rec in coll.items():
+                if isinstance(rec, (dict, list)):
+                    out[str(k)] = rec
+        return out
+    if not isinstance(coll, list):
+        return out
+    keyed = [
+        (
+            "|".join(
+                v if isinstance(v, str) else json.dumps(v, separators=(", ", ":"))
+                for v in (rec.get(f) for f in key_fields)
+            ),
+            rec,
+        )
+        for rec in coll
+        if isinstance(rec, dict)
+    ]
+    repeated = Counter(key for key, _ in keyed)
+    for key, rec in keyed:
+        if repeated[key] > 1:
+            key = base = f"{key}#{record_hash(rec)}"
+            n = 2
+            while key in out:
+                key = f"{base}~{n}"
+                n += 1
+        out[key] = rec
+    return out
+
+
+def manifest_version(hashes: Hashes) -> str:
+    h = hashlib.sha256()
+    for name in sorted(hashes):
+        h.update(name.encode("utf-8") + b"\0")
+        for key in sorted(hashes[name]):
+            h.update(key.encode("utf-8") + b"\1" + hashes[name][key].encode("ascii") + b"\2")
+    return h.hexdigest()[:16]
+
+
+def diff(old: Hashes, new: Hashes) -> Dict[str, Dict[str, list]]:
+    """collection -> {"added", "changed", "removed"} record keys; unchanged collections omitted."""
+    out: Dict[str, Dict[str, list]] = {}
+    for name in sorted(set(old) | set(new)):
+        before, after = old.get(name, {}), new.get(name, {})
+        added = sorted(k for k in after if k not in before)
+        changed = sorted(k for k in after if k in before and before[k] != after[k])
+        removed = sorted(k for k in before if k not in after)
+        if added or changed or removed:
+            out[name] = {"added": added, "changed": changed, "removed": removed}
+    return out
+
+
+class ManifestHistory:
+    """Recent manifests by version, in memory and (optionally) as JSON files in `directory`
+    so deltas keep working across restarts. Only the newest `keep` are retained."""
+
+    def __init__(self, directory: Optional[Path] = None, keep: int = 20):
+        self.directory = Path(directory) if directory else None
+        self.keep = max(1, int(keep))
+        self._mem: "OrderedDict[str, Hashes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, version: str) -> Optional[Path]:
+        if self.directory is None or not version.isalnum():
+            return None
+        return self.directory / f"{version}.json"
+
+    def remember(self, version: str, hashes: Hashes) -> None:
+        with self._lock:
+            if version in self._mem:
+                self._mem.move_to_end(version)
+                return
+            self._mem[version] = hashes
+            while len(self._mem) > self.keep:
+                self._mem.popitem(last=False)
+        path = self._path(version)
+        if path is None or path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(hashes, f, separators=(",", ":"))
+            os.replace(tmp, path)
+            self._prune()
+        except OSError:
+            pass  # deltas then only cover versions seen by this process
+
+    def _prune(self) -> None:
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in files[self.keep:]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    def get(self, version: str) -> Optional[Hashes]:
+        with self._lock:
+            hashes = self._mem.get(version)
+        if hashes is not None:
+            return hashes
+        path = self._path(version)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                hashes = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._mem[version] = hashes
+            while len(self._mem) > self.keep:
+                self._mem.popitem(last=False)
+        return hashes
+
+    def versions(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(self._mem)
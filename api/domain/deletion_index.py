@@ -0,0 +1,77 @@
+"""Symmetric-deletion index for edit-distance ("did you mean") lookups over short names.
+
+Every indexed word is stored under each string obtained by deleting up to
+max_distance characters from it. Two words within distance d share at least one such
+deletion, so a query generates its own deletions, probes the dict, and only verifies
+the few candidates that come back; cost depends on the query length, not the index size.
+Distance is optimal string alignment (Levenshtein + adjacent transposition), so
+"Silverdo", "Camery" and "Acrod" are all one edit away from the catalog name.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def edit_distance(a: str, b: str, max_dist: Optional[int] = None) -> int:
+    """OSA distance; returns max_dist + 1 as soon as the result is known to exceed max_dist."""
+    if a == b:
+        return 0
+    if max_dist is not None and abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        ca = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+        if max_dist is not None and min(cur) > max_dist:
+            return max_dist + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+class DeletionIndex:
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max(0, int(max_distance))
+        self._by_delete: Dict[str, Set[str]] = {}
+        self._words: Set[str] = set()
+
+    def add(self, word: str) -> None:
+        if not word or word in self._words:
+            return
+        self._words.add(word)
+        for d in _deletes(word, self.max_distance):
+            self._by_delete.setdefault(d, set()).add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def search(self, word: str, max_dist: Optional[int] = None) -> List[Tuple[int, str]]:
+        """All (distance, word) within max_dist (<= max_distance), closest first."""
+        if not word:
+            return []
+        max_dist = self.max_distance if max_dist is None else min(int(max_dist), self.max_distance)
+        candidates: Set[str] = set()
+        for d in _deletes(word, max_dist):
+            candidates |= self._by_delete.get(d, set())
+        out = []
+        for cand in candidates:
+            dist = edit_distance(word, cand, max_dist)
+            if dist <= max_dist:
+                out.append((dist, cand))
+        out.sort()
+        return out
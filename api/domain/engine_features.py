@@ -0,0 +1,156 @@
+"""Engine feature table for spec-similarity matching ("which engine is a 5.3L V8 gas?").
+
+engines.json is flattened once into columns (displacement, cylinders, fuel, aspiration,
+layout); match() scores every candidate row at once with array arithmetic. Lower
+distance is better: 0 means every given hint agrees, and roughly one point is one
+"small" disagreement (0.1 L of displacement, an unknown field, ...).
+Requires numpy; without it the table can't be built (NUMPY_AVAILABLE is False).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+UNKNOWN = -1
+FUELS = {"gasoline": 0, "diesel": 1, "electric": 2}
+ASPIRATIONS = {"na": 0, "turbo": 1, "supercharged": 2}
+LAYOUTS = {"i": 0, "v": 1, "w": 2, "h": 3}
+
+# Penalties (distance units)
+DISP_PER_LITER = 10.0  # 0.1 L off = 1
+DISP_MAX = 10.0
+CYL_MISMATCH = 4.0
+FUEL_MISMATCH = 3.0
+ASP_MISMATCH = 2.0
+LAYOUT_MISMATCH = 1.5
+MISSING = 1.0  # engine lacks the field the hint talks about
+
+
+def _text(s: Any) -> str:
+    return " ".join(str(s or "").split()).casefold()
+
+
+def fuel_code(s: Any) -> int:
+    t = _text(s)
+    if "diesel" in t:
+        return FUELS["diesel"]
+    if "electric" in t and "hybrid" not in t:
+        return FUELS["electric"]
+    if "gas" in t or "flex" in t or "ethanol" in t or "hybrid" in t:
+        return FUELS["gasoline"]
+    return UNKNOWN
+
+
+def aspiration_code(s: Any) -> int:
+    t = _text(s)
+    if "turbo" in t:
+        return ASPIRATIONS["turbo"]
+    if "super" in t:
+        return ASPIRATIONS["supercharged"]
+    if t in ("na", "n/a", "naturally aspirated", "natural"):
+        return ASPIRATIONS["na"]
+    return UNKNOWN
+
+
+def layout_code(s: Any) -> int:
+    """Engine layout letter: "V8" / "V-Shaped" -> v, "I4" / "In-Line" -> i, "H6" / "Flat" -> h."""
+    t = _text(s)
+    if not t:
+        return UNKNOWN
+    if t.startswith(("in-line", "inline", "straight")):
+        return LAYOUTS["i"]
+    if t.startswith(("flat", "horizontal", "boxer")):
+        return LAYOUTS["h"]
+    return LAYOUTS.get(t[0], UNKNOWN)
+
+
+def _float(x: Any) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class EngineFeatureTable:
+    def __init__(self, engines_doc: Dict[str, Any]):
+        if np is None:
+            raise RuntimeError("numpy is required for EngineFeatureTable")
+        self.codes: List[str] = sorted(c for c, e in (engines_doc or {}).items() if isinstance(e, dict))
+        self.row: Dict[str, int] = {c: i for i, c in enumerate(self.codes)}
+        rows = [engines_doc[c] for c in self.codes]
+        self.displacement = np.array([_float(e.get("displacement_l")) for e in rows], dtype=np.float64)
+        cyl = np.array([_float(e.get("cylinders")) for e in rows], dtype=np.float64)
+        cyl[cyl <= 0] = np.nan  # rotaries / electric list 0
+        self.cylinders = cyl
+        self.fuel = np.array([fuel_code(e.get("fuel_type")) for e in rows], dtype=np.int8)
+        self.aspiration = np.array([aspiration_code(e.get("aspiration")) for e in rows], dtype=np.int8)
+        self.layout = np.array([layout_code(e.get("configuration")) for e in rows], dtype=np.int8)
+        self.make = [_text(e.get("make")) for e in rows]
+        self.family = [_text(e.get("family")) for e in rows]
+        self._by_make: Dict[str, List[int]] = {}  # make or family -> rows
+        for i in range(len(rows)):
+            for key in dict.fromkeys((self.make[i], self.family[i])):
+                if key:
+                    self._by_make.setdefault(key, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def all_rows(self):
+        return np.arange(len(self.codes), dtype=np.int64)
+
+    def rows_for(self, codes: Iterable[str]):
+        """Sorted row indices of the given engine codes (unknown codes skipped)."""
+        return np.array(sorted({self.row[c] for c in codes if c in self.row}), dtype=np.int64)
+
+    def rows_for_make(self, make: str):
+        """Rows whose engines.json make or family is `make` (e.g. "GM", "Ford")."""
+        return np.array(self._by_make.get(_text(make), ()), dtype=np.int64)
+
+    def distances(
+        self,
+        rows,
+        *,
+        displacement_l: Optional[float] = None,
+        cylinders: Optional[int] = None,
+        fuel_type: Optional[str] = None,
+        aspiration: Optional[str] = None,
+        configuration: Optional[str] = None,
+    ):
+        """Distance of every row in `rows` to the hints (hints that are None are ignored)."""
+        dist = np.zeros(len(rows), dtype=np.float64)
+        if displacement_l is not None:
+            d = self.displacement[rows]
+            dist += np.where(np.isnan(d), MISSING, np.minimum(np.abs(d - float(displacement_l)) * DISP_PER_LITER, DISP_MAX))
+        if cylinders is not None:
+            c = self.cylinders[rows]
+            dist += np.where(np.isnan(c), MISSING, np.where(c == float(cylinders), 0.0, CYL_MISMATCH))
+        for hint, column, mismatch in (
+            (fuel_code(fuel_type) if fuel_type else UNKNOWN, self.fuel, FUEL_MISMATCH),
+            (aspiration_code(aspiration) if aspiration else UNKNOWN, self.aspiration, ASP_MISMATCH),
+            (layout_code(configuration) if configuration else UNKNOWN, self.layout, LAYOUT_MISMATCH),
+        ):
+            if hint == UNKNOWN:
+                continue
+            col = column[rows]
+            dist += np.where(col == UNKNOWN, MISSING, np.where(col == hint, 0.0, mismatch))
+        return dist
+
+    def match(self, rows, limit: int = 5, max_distance: Optional[float] = None, **hints: Any) -> List[Dict[str, Any]]:
+        """[{"engine_code", "distance"}] closest first (ties by code)."""
+        if len(rows) == 0:
+            return []
+        dist = self.distances(rows, **hints)
+        order = np.argsort(dist, kind="stable")  # rows are sorted by code already
+        if max_distance is not None:
+            order = order[dist[order] <= max_distance]
+        return [
+            {"engine_code": self.codes[int(rows[k])], "distance": round(float(dist[k]), 3)}
+            for k in order[: max(1, int(limit))]
+        ]
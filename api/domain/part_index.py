@@ -0,0 +1,93 @@
+"""Reverse index from part numbers to the groups and seed items that list them.
+
+Part numbers compare on their letters and digits, upper-cased ("15400-PLM-A02" ==
+"15400PLMA02"); brands on their lower-cased letters and digits ("NAPA Gold" == "napagold").
+Placeholders ("TBD", empty, OEM_VERIFIED sizes) are never indexed.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PLACEHOLDERS = {"", "TBD", "NA", "NONE", "NULL", "UNKNOWN"}
+# "OEM_VERIFIED" marks a verified size (wiper_group.json), not an orderable part
+PLACEHOLDER_BRANDS = {"", "tbd", "none", "null", "oemverified"}
+
+# (brand, part_number, role, position, selector)
+PartRef = Tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+
+def part_number_key(part_number: Any) -> str:
+    return re.sub(r"[^A-Z0-9]+", "", str(part_number or "").upper())
+
+
+def brand_key(brand: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "", str(brand or "").casefold())
+
+
+def iter_parts(node: Any, role: Optional[str] = None, position: Optional[str] = None, selector: Optional[str] = None) -> Iterator[PartRef]:
+    """Every {brand, part_number | sku} inside a group or seed blob.
+
+    role is the slot it sits in ("oem", "primary", "alternative"), position the wiper
+    position, selector the "attribute=value" of a selectors branch (None for fallback).
+    """
+    if isinstance(node, list):
+        for item in node:
+            yield from iter_parts(item, role, position, selector)
+        return
+    if not isinstance(node, dict):
+        return
+    pn = node.get("part_number") or node.get("sku")
+    if pn is not None and node.get("brand") is not None:
+        yield str(node["brand"]), str(pn), role, position, selector
+        return
+    if "oem_part_number" in node:  # flat seed rows (battery, headlight bulbs)
+        brand, pos = str(node.get("oem_brand") or ""), node.get("position") or position
+        yield brand, str(node.get("oem_part_number") or ""), "oem", pos, selector
+        if node.get("service_part_number"):
+            yield brand, str(node["service_part_number"]), "service", pos, selector
+        return
+    for key, value in node.items():
+        if key == "selectors" and isinstance(value, dict):
+            for attr, options in value.items():
+                for val, sub in (options or {}).items() if isinstance(options, dict) else ():
+                    yield from iter_parts(sub, role, position, f"{attr}={val}")
+        elif key == "positions" and isinstance(value, dict):
+            for pos, sub in value.items():
+                yield from iter_parts(sub, role, pos, selector)
+        elif key in ("oem", "primary"):
+            yield from iter_parts(value, key, position, selector)
+        elif key == "alternatives":
+            yield from iter_parts(value, "alternative", position, selector)
+        elif isinstance(value, (dict, list)):
+            yield from iter_parts(value, role, position, selector)
+
+
+class PartIndex:
+    """(brand key, part number key) -> {"brand", "part_number", "usages": [...]}."""
+
+    def __init__(self):
+        self._parts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._brands: Dict[str, List[str]] = {}  # part number key -> display brands
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    def add(self, brand: Any, part_number: Any, usage: Dict[str, Any]) -> bool:
+        pn = part_number_key(part_number)
+        b = brand_key(brand)
+        if pn in PLACEHOLDERS or b in PLACEHOLDER_BRANDS:
+            return False
+        entry = self._parts.get((b, pn))
+        if entry is None:
+            entry = self._parts[(b, pn)] = {"brand": str(brand).strip(), "part_number": str(part_number).strip(), "usages": []}
+            self._brands.setdefault(pn, []).append(entry["brand"])
+        entry["usages"].append(usage)
+        return True
+
+    def get(self, brand: Any, part_number: Any) -> Optional[Dict[str, Any]]:
+        return self._parts.get((brand_key(brand), part_number_key(part_number)))
+
+    def brands_for(self, part_number: Any) -> List[str]:
+        """Brands that list this part number (for "did you mean" on a brand miss)."""
+        return sorted(self._brands.get(part_number_key(part_number), ()), key=str.casefold)
@@ -0,0 +1,54 @@
+"""Prefix trie whose nodes carry their precomputed top-k completions.
+
+complete(prefix) walks len(prefix) nodes and returns the stored list, so lookups don't
+depend on how many names sit under the prefix.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.terminal: Dict[str, float] = {}  # value -> weight for keys ending here
+        self.top: List[str] = []
+
+
+class TopKTrie:
+    def __init__(self, k: int = 10):
+        self.k = max(1, int(k))
+        self._root = _Node()
+
+    def add(self, key: str, value: str, weight: float = 1.0) -> None:
+        """Index `value` under `key` (several keys may point at the same value)."""
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+        if node.terminal.get(value, float("-inf")) < weight:
+            node.terminal[value] = weight
+
+    def freeze(self) -> "TopKTrie":
+        """Compute every node's top-k (highest weight, then alphabetical); call after the last add()."""
+        self._fill(self._root)
+        return self
+
+    def _fill(self, node: _Node) -> Dict[str, float]:
+        best: Dict[str, float] = dict(node.terminal)
+        for child in node.children.values():
+            for value, w in self._fill(child).items():
+                if best.get(value, float("-inf")) < w:
+                    best[value] = w
+        ranked: List[Tuple[float, str]] = sorted(((-w, v) for v, w in best.items()))[: self.k]
+        node.top = [v for _, v in ranked]
+        return {v: -nw for nw, v in ranked}
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.top[: limit or self.k]
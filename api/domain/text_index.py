@@ -0,0 +1,110 @@
+"""Token + trigram inverted index for free-text catalog search ("2016 silverado 5.3").
+
+Text is split into letter runs, integers and decimals ("F-150" and "f150" both give
+"f", "150"; "5.3L V8" gives "5.3", "l", "v", "8"), so punctuation and spacing don't
+matter. A query token matches a document exactly, as a prefix of an indexed token
+(partial typing), or, failing both, through shared trigrams (small typos).
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+_TOKEN_RE = re.compile(r"\d+\.\d+|\d+|[^\W\d_]+")
+
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.5
+FUZZY_MIN_SIMILARITY = 0.45
+FUZZY_MIN_LEN = 4
+
+
+def tokenize(text: object) -> List[str]:
+    if text is None:
+        return []
+    return _TOKEN_RE.findall(str(text).casefold())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TokenIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._sorted: List[str] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}  # token -> size of its trigram set
+
+    def add(self, doc: Hashable, text: object, weight: float = 1.0) -> None:
+        for tok in tokenize(text):
+            posting = self._postings.setdefault(tok, {})
+            if posting.get(doc, 0.0) < weight:
+                posting[doc] = weight
+
+    def freeze(self) -> "TokenIndex":
+        """Build the prefix and trigram lookups; call once after the last add()."""
+        self._sorted = sorted(self._postings)
+        grams: Dict[str, Set[str]] = {}
+        counts: Dict[str, int] = {}
+        for tok in self._sorted:
+            if len(tok) >= FUZZY_MIN_LEN - 1 and not tok[0].isdigit():
+                tok_grams = _trigrams(tok)
+                counts[tok] = len(tok_grams)
+                for g in tok_grams:
+                    grams.setdefault(g, set()).add(tok)
+        self._grams = grams
+        self._gram_counts = counts
+        return self
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def lookup(self, token: str) -> Dict[Hashable, float]:
+        """doc -> best weight for one query token (exact > prefix > trigram)."""
+        exact = self._postings.get(token)
+        if exact:
+            return exact
+
+        out: Dict[Hashable, float] = {}
+        if not token[0].isdigit() or "." not in token:
+            for k in range(bisect_left(self._sorted, token), len(self._sorted)):
+                cand = self._sorted[k]
+                if not cand.startswith(token):
+                    break
+                self._merge(out, self._postings[cand], PREFIX_FACTOR)
+        if out or len(token) < FUZZY_MIN_LEN or token[0].isdigit():
+            return out
+
+        want = _trigrams(token)
+        shared: Dict[str, int] = {}
+        for g in want:
+            for cand in self._grams.get(g, ()):
+                shared[cand] = shared.get(cand, 0) + 1
+        for cand, n in shared.items():
+            sim = n / float(len(want) + self._gram_counts[cand] - n)  # Jaccard over trigram sets
+            if sim >= FUZZY_MIN_SIMILARITY:
+                self._merge(out, self._postings[cand], FUZZY_FACTOR * sim)
+        return out
+
+    @staticmethod
+    def _merge(out: Dict[Hashable, float], posting: Dict[Hashable, float], factor: float) -> None:
+        for doc, w in posting.items():
+            w *= factor
+            if out.get(doc, 0.0) < w:
+                out[doc] = w
+
+    def search(self, tokens: Iterable[str]) -> List[Tuple[Hashable, int, float]]:
+        """(doc, tokens matched, score) for docs matching at least one token, best first.
+
+        Documents matching every token rank above partial matches.
+        """
+        matched: Dict[Hashable, int] = {}
+        score: Dict[Hashable, float] = {}
+        for tok in tokens:
+            for doc, w in self.lookup(tok).items():
+                matched[doc] = matched.get(doc, 0) + 1
+                score[doc] = score.get(doc, 0.0) + w
+        ranked = sorted(matched, key=lambda d: (-matched[d], -score[d]))
+        return [(d, matched[d], score[d]) for d in ranked]
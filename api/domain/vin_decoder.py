@@ -0,0 +1,95 @@
+"""Offline VIN checks: structure, check digit, model year (pos 10) and WMI make (pos 1-3).
+
+Used before any network call so malformed VINs never reach NHTSA, and so year/make
+are still known when vPIC is unavailable.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from api.data.paths import WMI_PATH
+
+VIN_LENGTH = 17
+VIN_ALPHABET = frozenset("0123456789ABCDEFGHJKLMNPRSTUVWXYZ")  # no I, O, Q
+
+# Position 9 is mandatory for vehicles sold in North America; set to 0 to accept imports without it.
+ENFORCE_CHECK_DIGIT = os.getenv("VIN_ENFORCE_CHECK_DIGIT", "1") not in {"0", "false", "False"}
+
+_TRANSLIT = {
+    **{str(d): d for d in range(10)},
+    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7, "H": 8,
+    "J": 1, "K": 2, "L": 3, "M": 4, "N": 5, "P": 7, "R": 9,
+    "S": 2, "T": 3, "U": 4, "V": 5, "W": 6, "X": 7, "Y": 8, "Z": 9,
+}
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Position 10 cycles every 30 years (no I, O, Q, U, Z, 0).
+_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+
+
+def check_digit(vin: str) -> str:
+    total = sum(_TRANSLIT[c] * w for c, w in zip(vin, _WEIGHTS))
+    r = total % 11
+    return "X" if r == 10 else str(r)
+
+
+def validate_vin(vin: str) -> Optional[str]:
+    """Return an error code for a structurally invalid VIN, or None when it looks valid."""
+    if len(vin) != VIN_LENGTH:
+        return "VIN_INVALID_LENGTH"
+    if any(c not in VIN_ALPHABET for c in vin):
+        return "VIN_INVALID_CHARACTERS"
+    if ENFORCE_CHECK_DIGIT and vin[8] != check_digit(vin):
+        return "VIN_CHECK_DIGIT_MISMATCH"
+    return None
+
+
+def model_year_candidates(vin: str) -> List[int]:
+    """All model years position 10 can mean, most likely first."""
+    if len(vin) < 10 or vin[9] not in _YEAR_CODES:
+        return []
+    base = 1980 + _YEAR_CODES.index(vin[9])
+    years = [base, base + 30]
+    # Since 2010, light vehicles use a letter in position 7 for the 2010-2039 cycle.
+    if vin[6].isalpha():
+        years.reverse()
+    latest = datetime.now(timezone.utc).year + 1
+    return [y for y in years if y <= latest] or years[:1]
+
+
+@lru_cache(maxsize=1)
+def _wmi_table() -> Dict[str, Any]:
+    try:
+        with open(WMI_PATH, "r", encoding="utf-8") as f:
+            return (json.load(f) or {}).get("wmi", {}) or {}
+    except Exception:
+        return {}
+
+
+def make_candidates(vin: str) -> List[str]:
+    hit = _wmi_table().get(vin[:3])
+    if isinstance(hit, str):
+        return [hit]
+    if isinstance(hit, list):
+        return [m for m in hit if isinstance(m, str)]
+    return []
+
+
+def decode_vin_local(vin: str) -> Dict[str, Any]:
+    """Best-effort offline decode. `make` is only set when the WMI names one make; `year`
+    is the position-7 pick (letter: 2010-2039 cycle, digit: 1980-2009), which is the
+    light-vehicle convention and so can be wrong for other VINs. `year_candidates`
+    always lists every year position 10 allows, most likely first."""
+    makes = make_candidates(vin)
+    years = model_year_candidates(vin)
+    return {
+        "wmi": vin[:3] or None,
+        "make": makes[0] if len(makes) == 1 else None,
+        "make_candidates": makes,
+        "year": years[0] if years else None,
+        "year_candidates": years,
+    }
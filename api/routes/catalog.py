@@ -28,14 +28,78 @@ def models(year: int, make: str):
     return app_monolith.models(year=year, make=make)
 
 
+@router.get("/autocomplete")
+def autocomplete(field: str, prefix: str = "", year: Optional[int] = None, make: Optional[str] = None, limit: int = 10):
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.autocomplete(field=field, prefix=prefix, year=year, make=make, limit=limit)
+
+
 @router.get("/vehicles/search")
 def vehicles_search(
     year: Optional[int] = None,
     make: Optional[str] = None,
     model: Optional[str] = None,
     q: Optional[str] = None,
+    limit: int = 20,
 ):
     """Manual search endpoint used by the Flutter flow."""
     from api import app_monolith  # type: ignore
 
-    return app_monolith.vehicles_search(year=year, make=make, model=model, q=q)
+    return app_monolith.vehicles_search(year=year, make=make, model=model, q=q, limit=limit)
+
+
+@router.get("/catalog/export")
+def catalog_export(
+    make: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    """NDJSON dump of the catalog for offline sync."""
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.catalog_export(make=make, year_from=year_from, year_to=year_to, fields=fields)
+
+
+@router.get("/sync")
+def sync(since: Optional[str] = None, collections: Optional[str] = None):
+    """Delta (or full) sync of catalog and seed records since a manifest version."""
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.sync(since=since, collections=collections)
+
+
+@router.get("/engines/match")
+def engines_match(
+    displacement_l: Optional[float] = None,
+    cylinders: Optional[int] = None,
+    fuel_type: Optional[str] = None,
+    aspiration: Optional[str] = None,
+    configuration: Optional[str] = None,
+    make: Optional[str] = None,
+    year: Optional[int] = None,
+    limit: int = 5,
+):
+    """Nearest canonical engine codes for decoded specs."""
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.engines_match(
+        displacement_l=displacement_l,
+        cylinders=cylinders,
+        fuel_type=fuel_type,
+        aspiration=aspiration,
+        configuration=configuration,
+        make=make,
+        year=year,
+        limit=limit,
+    )
+
+
+# Registered after /engines/match so the path parameter doesn't capture "match".
+@router.get("/engines/{code}")
+def engine_detail(code: str):
+    """Engine metadata, oil coverage and the vehicles fitted with it."""
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.engine_detail(code=code)
@@ -18,3 +18,10 @@ def maintenance_bundle(vehicle_id: str, year: int, engine_code: Optional[str] =
         year=year,
         engine_code=engine_code,
     )
+
+
+@router.get("/parts/{brand}/{part_number}/fitment")
+def part_fitment(brand: str, part_number: str):
+    """Engines and vehicles that use a filter / plug / wiper / battery part."""
+    from api import app_monolith  # type: ignore
+    return app_monolith.part_fitment(brand=brand, part_number=part_number)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/telemetry/top")
+def telemetry_top(status: str = "UNSUPPORTED", limit: int = 20):
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.telemetry_top(status=status, limit=limit)
+
+
+@router.get("/telemetry/status_mix")
+def telemetry_status_mix(days: int = 30):
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.telemetry_status_mix(days=days)
+
+
+@router.get("/telemetry/versions")
+def telemetry_versions(status: Optional[str] = None):
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.telemetry_versions(status=status)
+
+
+@router.get("/telemetry/monthly")
+def telemetry_monthly(status: Optional[str] = None):
+    from api import app_monolith  # type: ignore
+
+    return app_monolith.telemetry_monthly(status=status)
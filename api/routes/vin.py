@@ -6,11 +6,31 @@ from fastapi import APIRouter, Body
 router = APIRouter()
 
 @router.post("/vin/resolve")
-def vin_resolve(payload: Dict[str, Any] = Body(...)):
+async def vin_resolve(payload: Dict[str, Any] = Body(...)):
     from api import app_monolith  # type: ignore
-    return app_monolith.vin_resolve(payload)
+    return await app_monolith.vin_resolve_async(payload)
 
 @router.post("/vin/resolve_and_bundle")
-def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
+async def vin_resolve_and_bundle(payload: Dict[str, Any] = Body(...)):
     from api import app_monolith  # type: ignore
-    return app_monolith.vin_resolve_and_bundle(payload)
+    return await app_monolith.vin_resolve_and_bundle_async(payload)
+
+@router.post("/vin/resolve_batch")
+async def vin_resolve_batch(payload: Dict[str, Any] = Body(...)):
+    from api import app_monolith  # type: ignore
+    return await app_monolith.vin_resolve_batch(payload)
+
+@router.get("/vin/stats")
+def vin_stats():
+    from api import app_monolith  # type: ignore
+    return app_monolith.vin_stats()
+
+@router.post("/vin/confirm")
+def vin_confirm(payload: Dict[str, Any] = Body(...)):
+    from api import app_monolith  # type: ignore
+    return app_monolith.vin_confirm(payload)
+
+@router.get("/vin/decision_table")
+def vin_decision_table(year: int, make: str, model: str):
+    from api import app_monolith  # type: ignore
+    return app_monolith.vin_decision_table(year, make, model)
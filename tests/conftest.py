@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def monolith():
+    """The app module, with its rollup writer stopped once the session ends."""
+    from api import app_monolith
+
+    yield app_monolith
+    app_monolith.ROLLUPS.stop()
@@ -0,0 +1,201 @@
+"""VIN auto-pick decision tables vs the inline auto-pick vin_resolve used to run."""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import pytest
+
+from api.core.ttl_cache import TTLCache
+
+
+def _catalog_keys(m) -> list[tuple]:
+    keys = set()
+    for v in (m.CATALOG.get().docs.get("vehicles") or {}).get("vehicles", []):
+        y0, y1 = m.as_int(v.get("year_min")), m.as_int(v.get("year_max"))
+        if isinstance(v, dict) and y0 is not None and y1 is not None:
+            keys.update((y, v.get("make"), v.get("model")) for y in range(y0, y1 + 1))
+    return sorted(keys, key=str)
+
+
+def _inline_autopick(m, year: int, make: str, model: str, hints: tuple) -> Optional[Dict[str, Any]]:
+    """The auto-pick section of the original vin_resolve, reduced to the same outcome shape."""
+    engine_model, hint_disp, hint_cyl, hint_fuel = hints
+    engines_doc = m.CATALOG.get().docs.get("engines") or {}
+
+    def codes_of(v):
+        lbl = v.get("engine_label")
+        return [
+            m.resolve_engine_code(c, lbl, year=year, make=v.get("make"), model=v.get("model"))
+            for c in (v.get("engine_codes") or [])
+            if c
+        ]
+
+    def vehicle_out(v):
+        return {
+            "vehicle_id": v.get("vehicle_id"),
+            "make": v.get("make"),
+            "model": v.get("model"),
+            "year_min": v.get("year_min"),
+            "year_max": v.get("year_max"),
+            "engine_label": v.get("engine_label"),
+            "engine_codes": codes_of(v),
+        }
+
+    matches = m._search_impl(year, make, model) or m._fuzzy_model_candidates(year, make, model)
+    if not matches:
+        return None
+
+    if len(matches) > 1:
+        if engine_model:
+            hint_engine_code = m.resolve_engine_code(engine_model, None, year=year, make=make, model=model)
+            if hint_engine_code:
+                by_engine_code = [v for v in matches if isinstance(v, dict) and hint_engine_code in codes_of(v)]
+                if len(by_engine_code) == 1:
+                    matches = by_engine_code
+        if len(matches) > 1 and hint_disp:
+            by_disp = [v for v in matches if isinstance(v, dict) and str(hint_disp) in str(v.get("engine_label", ""))]
+            if len(by_disp) == 1:
+                matches = by_disp
+
+    if len(matches) > 1:
+        candidates = []
+        for v in matches[:8]:
+            if isinstance(v, dict):
+                out = vehicle_out(v)
+                out["engine_names"] = [
+                    m.engine_display_name(ec, vehicle_engine_label=v.get("engine_label"), engines_doc=engines_doc)
+                    for ec in out["engine_codes"]
+                ]
+                candidates.append(out)
+        return {"kind": "vehicles", "candidates": candidates}
+
+    vehicle = matches[0]
+    engine_codes = codes_of(vehicle)
+    engine_code = None
+    if engine_model:
+        model_hint = m.resolve_engine_code(
+            engine_model, vehicle.get("engine_label"), year=year, make=vehicle.get("make"), model=vehicle.get("model")
+        )
+        if model_hint in engine_codes:
+            engine_code = model_hint
+
+    if engine_code is None:
+        def score(code: str) -> int:
+            e = engines_doc.get(code) or {}
+            s = 0
+            if hint_disp is not None and isinstance(e.get("displacement_l"), (int, float)):
+                if abs(float(e["displacement_l"]) - float(hint_disp)) <= 0.15:
+                    s += 10
+            if hint_cyl is not None and m.as_int(e.get("cylinders")) == hint_cyl:
+                s += 7
+            if hint_fuel and m.norm(e.get("fuel_type")) == hint_fuel:
+                s += 4
+            return s
+
+        if len(engine_codes) == 1:
+            engine_code = engine_codes[0]
+        elif len(engine_codes) > 1:
+            scored = sorted(((score(c), c) for c in engine_codes), reverse=True)
+            if scored and scored[0][0] >= 10 and (len(scored) == 1 or scored[0][0] >= scored[1][0] + 5):
+                engine_code = scored[0][1]
+
+    if len(engine_codes) > 1 and engine_code is None:
+        choices = []
+        for c in engine_codes:
+            e = engines_doc.get(c) or {}
+            choices.append(
+                {
+                    "engine_code": c,
+                    "engine_name": m.engine_display_name(c, vehicle_engine_label=vehicle.get("engine_label"), engines_doc=engines_doc),
+                    "displacement_l": e.get("displacement_l"),
+                    "cylinders": e.get("cylinders"),
+                    "fuel_type": e.get("fuel_type"),
+                }
+            )
+        return {"kind": "engines", "vehicle": vehicle_out(vehicle), "engine_choices": choices}
+    return {"kind": "resolved", "vehicle": vehicle_out(vehicle), "engine_code": engine_code}
+
+
+def test_tables_match_inline_autopick(monolith):
+    m = monolith
+    checked = 0
+    for year, make, model in _catalog_keys(m):
+        table = m._autopick_table(year, make, model)
+        assert not table.corrected, (year, make, model)
+        for hints, outcome in table.outcomes():
+            assert outcome == _inline_autopick(m, year, make, model, hints), (year, make, model, hints)
+            checked += 1
+    assert checked > 0
+
+
+def test_decide_uses_decoded_hints(monolith):
+    m = monolith
+    year, make, model = next(k for k in _catalog_keys(m) if len(m._autopick_table(*k).vehicles) > 1)
+    table = m._autopick_table(year, make, model)
+    for hints, outcome in table.outcomes():
+        decoded = {"engine": hints[0], "engine_displacement_l": hints[1], "engine_cylinders": hints[2], "fuel_type": hints[3]}
+        assert table.decide(decoded) == outcome
+
+
+def _misspelled_model(m) -> tuple:
+    """A catalog (year, make, model) that resolves, plus a one-letter typo of its model
+    that the table corrects back to it."""
+    for year, make, model in _catalog_keys(m):
+        exact = m._autopick_table(year, make, model)
+        if len(exact.vehicles) != 1 or not any(o and o["kind"] == "resolved" for _, o in exact.outcomes()):
+            continue
+        name = str(model)
+        for i, ch in enumerate(name):
+            if i == 0 or not ch.isalpha():
+                continue
+            typo = name[:i] + name[i + 1:]
+            table = m._autopick_table(year, make, typo)
+            if table.corrected.get("model") and table.vehicles == exact.vehicles:
+                return year, make, model, typo
+    pytest.skip("no correctable model name in the catalog fixtures")
+
+
+def test_corrected_model_is_never_auto_resolved(monolith):
+    m = monolith
+    year, make, model, typo = _misspelled_model(m)
+    table = m._autopick_table(year, make, typo)
+    outcomes = [o for _, o in table.outcomes()]
+    assert outcomes and all(o is not None and o["kind"] == "vehicles" for o in outcomes)
+    assert outcomes[0]["candidates"][0]["vehicle_id"] == table.vehicles[0].get("vehicle_id")
+
+
+def test_memo_stops_growing_at_max(monolith, monkeypatch):
+    m = monolith
+    monkeypatch.setattr(m, "AUTOPICK_MEMO_MAX", 3)
+    year, make, model = _catalog_keys(m)[0]
+    table = m._AutoPickTable(year, m.norm(make), m.norm(model), m.CATALOG.get().docs.get("engines") or {})
+    hints = [(f"X{i}", None, None, "") for i in range(10)]
+    for h in hints:
+        assert table.probe(h) == table._decide(*h)
+    assert len(table._memo) == 3
+    # beyond the cap outcomes are still computed, just not memoized
+    assert table.probe(hints[-1]) == table._decide(*hints[-1])
+    assert len(table._memo) == 3
+
+
+def test_unlisted_models_go_through_bounded_lru(monolith, monkeypatch):
+    m = monolith
+    lru = TTLCache(maxsize=2, ttl=60)
+    monkeypatch.setattr(m, "AUTOPICK_LRU", lru)
+    year, make, model = _catalog_keys(m)[0]
+    snap = m.CATALOG.get()
+    m._autopick_table(year, make, "Warm Up")  # scope-level indexes are built once per snapshot
+    lru.clear()
+    before = len(snap)
+
+    tables = [m._autopick_table(year, make, f"No Such Model {i}") for i in range(3)]
+    assert len(snap) == before  # nothing cached on the snapshot for unlisted models
+    assert lru.stats()["size"] == 2
+    # the oldest entry was evicted, so asking again builds a fresh table
+    assert m._autopick_table(year, make, "No Such Model 0") is not tables[0]
+    assert m._autopick_table(year, make, "No Such Model 2") is tables[2]
+
+    # catalog models are cached on the snapshot, not in the LRU
+    table = m._autopick_table(year, make, model)
+    assert m._autopick_table(year, make, model) is table
+    assert lru.stats()["size"] == 2
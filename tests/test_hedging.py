@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api.core.hedging import HedgeBudget, Hedger, LatencyTracker
+
+
+def _hedger(delay_s: float = 0.02, **kw) -> Hedger:
+    latency = LatencyTracker(min_samples=1)
+    latency.record(delay_s)
+    kw.setdefault("max_ratio", 1.0)
+    return Hedger(enabled=True, percentile=95, min_delay_s=0.0, latency=latency, **kw)
+
+
+def _attempts(*behaviours):
+    """fn whose n-th call sleeps behaviours[n][0] then returns (or raises) behaviours[n][1]."""
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            n = len(calls)
+            calls.append(n)
+        sleep_s, outcome = behaviours[n]
+        time.sleep(sleep_s)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return fn, calls
+
+
+def test_budget_caps_hedges_at_ratio_and_burst():
+    budget = HedgeBudget(ratio=0.25, burst=2)
+    assert not budget.try_acquire()
+    for _ in range(4):
+        budget.on_request()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    for _ in range(100):
+        budget.on_request()
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_hedger_denies_hedges_beyond_budget():
+    h = _hedger(max_ratio=0.5)
+    fn, calls = _attempts(*[(0.06, "slow")] * 8)
+    for _ in range(4):
+        h.call(fn)
+    stats = h.stats()
+    assert stats["requests"] == 4
+    assert stats["hedges"] == 2 and stats["budget_denied"] == 2
+    assert len(calls) == 6
+    h.shutdown()
+
+
+def test_hedge_wins_when_first_attempt_is_slow():
+    h = _hedger()
+    fn, calls = _attempts((0.5, "first"), (0.0, "second"))
+    t0 = time.monotonic()
+    assert h.call(fn) == "second"
+    assert time.monotonic() - t0 < 0.4
+    assert h.stats()["hedge_wins"] == 1
+    h.shutdown()
+
+
+def test_failed_hedge_falls_back_to_first_attempt():
+    h = _hedger()
+    fn, _ = _attempts((0.1, "first"), (0.0, RuntimeError("hedge")))
+    assert h.call(fn) == "first"
+    assert h.stats()["hedge_wins"] == 0
+    h.shutdown()
+
+
+def test_both_attempts_failing_raises():
+    h = _hedger()
+    fn, calls = _attempts((0.05, RuntimeError("first")), (0.0, RuntimeError("second")))
+    with pytest.raises(RuntimeError):
+        h.call(fn)
+    assert len(calls) == 2
+    h.shutdown()
+
+
+def test_async_both_attempts_failing_raises():
+    h = _hedger()
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(h.call_async(fn))
+    assert h.stats()["hedges"] == 1
+
+
+def test_disabled_hedger_counts_nothing():
+    h = _hedger()
+    h.enabled = False
+    fn, calls = _attempts((0.05, "only"))
+    assert h.call(fn) == "only"
+    stats = h.stats()
+    assert stats["requests"] == 0 and stats["hedges"] == 0
+    assert not h.budget.try_acquire()
+
+
+def test_pool_waits_do_not_trigger_hedges():
+    """64 concurrent 20 ms calls against 16 workers: nothing queues behind the pool,
+    so the batch takes about one call and no hedges fire."""
+    h = _hedger(delay_s=0.02, max_workers=16)
+
+    def fn():
+        time.sleep(0.02)
+        return "ok"
+
+    with ThreadPoolExecutor(max_workers=64) as callers:
+        t0 = time.monotonic()
+        results = list(callers.map(lambda _: h.call(fn), range(64)))
+        elapsed = time.monotonic() - t0
+    assert results == ["ok"] * 64
+    stats = h.stats()
+    assert stats["pool_full"] >= 64 - 16
+    assert stats["hedges"] + stats["budget_denied"] <= 16
+    assert elapsed < 0.08
+    h.shutdown()
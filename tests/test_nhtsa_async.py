@@ -0,0 +1,82 @@
+"""Async vPIC path against the local stub server (Scripts/vpic_stub_server.py)."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.core import nhtsa_client
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Scripts"))
+from vpic_stub_server import FIXTURES_DIR, FixtureStore, VpicStubServer  # noqa: E402
+
+FIXTURE_VIN = "1HGCM82633A004352"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A vPIC stand-in on a free port; tests set srv.latency_ms as needed."""
+    srv = VpicStubServer(("127.0.0.1", 0), fixtures=FixtureStore(FIXTURES_DIR))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    host, port = srv.server_address[:2]
+    monkeypatch.setattr(nhtsa_client, "NHTSA_BASE_URL", f"http://{host}:{port}/api/vehicles")
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_slow_upstream_does_not_block_catalog_requests(monolith, stub):
+    m = monolith
+    stub.latency_ms = 1500
+    m.VIN_DECODE_CACHE.clear()
+    vin_result = {}
+
+    with TestClient(m.app) as client:
+        vin_call = threading.Thread(target=lambda: vin_result.update(client.post("/vin/resolve", json={"vin": FIXTURE_VIN}).json()))
+        vin_call.start()
+        deadline = time.monotonic() + 5
+        while stub.stats()["requests"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stub.stats()["requests"] == 1  # the decode is now waiting on vPIC
+
+        t0 = time.monotonic()
+        makes = client.get("/makes", params={"year": 2015})
+        elapsed = time.monotonic() - t0
+        assert makes.status_code == 200
+        assert elapsed < 0.75
+        assert vin_call.is_alive()
+
+        vin_call.join(timeout=10)
+    assert vin_result.get("status") not in (None, "ERROR"), vin_result
+
+
+def test_each_event_loop_closes_its_client(stub):
+    clients = []
+
+    async def decode():
+        clients.append((await nhtsa_client._async_state())[0])
+        return await nhtsa_client.get_json_async(nhtsa_client.decode_vin_url(FIXTURE_VIN))
+
+    for _ in range(3):
+        assert asyncio.run(decode())["Results"]
+
+    assert len({id(c) for c in clients}) == 3
+    assert all(c.is_closed for c in clients)
+    assert len(nhtsa_client._async_states) == 0
+
+
+def test_aclose_async_client_closes_the_running_loops_client(stub):
+    async def run():
+        client, _ = await nhtsa_client._async_state()
+        await nhtsa_client.get_json_async(nhtsa_client.decode_vin_url(FIXTURE_VIN))
+        await nhtsa_client.aclose_async_client()
+        return client, await nhtsa_client._async_state()
+
+    client, (fresh, _) = asyncio.run(run())
+    assert client.is_closed
+    assert fresh is not client and fresh.is_closed
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+
+from api.data import sync_manifest
+from api.data.snapshot import Snapshot
+
+KEY_FIELDS = ("vehicle_key", "years", "body_style")
+
+
+def _wiper(vehicle_key: str, driver: str) -> dict:
+    return {"vehicle_key": vehicle_key, "years": [2015, 2019], "body_style": None, "driver_in": driver}
+
+
+ITEMS = [
+    _wiper("honda_civic", "26"),
+    _wiper("honda_civic", "24"),
+    _wiper("honda_civic", "22"),
+    _wiper("toyota_camry", "26"),
+]
+
+
+def _keys(items: list) -> dict:
+    return sync_manifest.keyed_records({"items": items}, "items", KEY_FIELDS)
+
+
+def test_unique_keys_are_plain_and_duplicates_are_hashed():
+    keys = list(_keys(ITEMS))
+    assert keys[3] == "toyota_camry|[2015, 2019]|null"
+    assert all(k.startswith("honda_civic|[2015, 2019]|null#") for k in keys[:3])
+    assert len(set(keys)) == 4
+
+
+def test_duplicate_keys_survive_deletes_and_reorders():
+    before = _keys(ITEMS)
+    after_delete = _keys([ITEMS[0], ITEMS[2], ITEMS[3]])
+    assert set(before) - set(after_delete) == {list(before)[1]}
+    assert set(after_delete) <= set(before)
+    assert set(_keys(list(reversed(ITEMS)))) == set(before)
+
+
+def test_identical_copies_get_distinct_keys():
+    keys = _keys([ITEMS[0], dict(ITEMS[0]), ITEMS[1]])
+    assert len(keys) == 3
+    assert sum(k.endswith("~2") for k in keys) == 1
+
+
+def test_delta_sync_after_delete_returns_only_the_deleted_record(monolith, monkeypatch, tmp_path):
+    m = monolith
+    path = tmp_path / "wiper_seed.json"
+    path.write_text(json.dumps({"items": ITEMS}), encoding="utf-8")
+    monkeypatch.setattr(m, "SYNC_COLLECTIONS", {"wipers": (path, "items", KEY_FIELDS)})
+    monkeypatch.setattr(m, "SYNC_SOURCES", Snapshot({path.name: path}))
+    monkeypatch.setattr(m, "SYNC_HISTORY", sync_manifest.ManifestHistory(None))
+
+    full = json.loads(m.sync().body)
+    assert full["mode"] == "full" and len(full["collections"]["wipers"]) == 4
+    deleted_key = list(full["collections"]["wipers"])[1]
+
+    path.write_text(json.dumps({"items": [ITEMS[0], ITEMS[2], ITEMS[3]]}), encoding="utf-8")
+    delta = json.loads(m.sync(since=full["version"]).body)
+    assert delta["mode"] == "delta"
+    assert delta["changes"] == {"wipers": {"added": {}, "changed": {}, "removed": [deleted_key]}}
+
+    again = json.loads(m.sync(since=delta["version"]).body)
+    assert again["up_to_date"] is True
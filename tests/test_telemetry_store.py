@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from api.core import telemetry_store
+from api.core.telemetry_store import RollupWriter, TelemetryStore
+
+
+def _row(signature: str, status: str, count: int, seen: str) -> tuple:
+    return (signature, 2016, "Chevrolet", "Silverado 1500", None, "L83", status, count, seen, seen, "s1", "a1")
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = TelemetryStore(tmp_path / "vin_events.db")
+    s.init_schema()
+    s.upsert_rollups(
+        [
+            _row("sig-a", "RESOLVED", 3, "2025-01-10T08:00:00+00:00"),
+            _row("sig-b", "AMBIGUOUS", 2, "2025-01-20T08:00:00+00:00"),
+            _row("sig-c", "RESOLVED", 5, "2025-02-03T08:00:00+00:00"),
+            _row("sig-d", "UNSUPPORTED", 1, "2025-03-15T08:00:00+00:00"),
+        ]
+    )
+    yield s
+    s.close()
+
+
+def _count(store: TelemetryStore, sql: str) -> int:
+    return store.conn().execute(sql).fetchone()[0]
+
+
+def test_retention_rolls_expired_partitions_into_summary(store):
+    before = store.monthly_totals()
+    assert store.partitions() == ["vin_events_202501", "vin_events_202502", "vin_events_202503"]
+
+    out = store.apply_retention(2, now=datetime(2025, 3, 20, tzinfo=timezone.utc))
+
+    assert out["cutoff"] == "2025-02-01"
+    assert out["rolled_up"] == ["vin_events_202501"]
+    assert store.partitions() == ["vin_events_202502", "vin_events_202503"]
+    summary = store.conn().execute(
+        "SELECT month, resolution_status, signatures, count FROM vin_events_summary ORDER BY 2"
+    ).fetchall()
+    assert summary == [("2025-01", "AMBIGUOUS", 1, 2), ("2025-01", "RESOLVED", 1, 3)]
+    # rollups last seen before the cutoff are gone; their counts live on in the summary
+    assert out["deleted_rollups"] == 2
+    assert _count(store, "SELECT COUNT(*) FROM vin_resolution_events") == 2
+    assert _count(store, "SELECT COUNT(*) FROM vin_signature_status_counts") == 2
+    assert store.monthly_totals() == before
+
+
+def test_retention_dry_run_changes_nothing(store):
+    out = store.apply_retention(1, now=datetime(2025, 3, 20, tzinfo=timezone.utc), dry_run=True)
+    assert out["rolled_up"] == ["vin_events_202501", "vin_events_202502"]
+    assert len(store.partitions()) == 3
+    assert _count(store, "SELECT COUNT(*) FROM vin_events_summary") == 0
+
+
+def test_monthly_totals(store):
+    assert store.monthly_totals() == [
+        {"month": "2025-01", "statuses": {"AMBIGUOUS": 2, "RESOLVED": 3}, "total": 5},
+        {"month": "2025-02", "statuses": {"RESOLVED": 5}, "total": 5},
+        {"month": "2025-03", "statuses": {"UNSUPPORTED": 1}, "total": 1},
+    ]
+    assert [m["total"] for m in store.monthly_totals("RESOLVED")] == [3, 5]
+
+
+def test_writer_registers_one_exit_hook_across_restarts(store, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(telemetry_store.atexit, "register", hooks.append)
+    writer = RollupWriter(store, flush_ms=10)
+    for _ in range(3):
+        writer.start()
+        writer.record("sig-e", {"year": 2020, "make": "Ford", "model": "F-150"}, "RESOLVED", None, None)
+        writer.stop()
+    assert hooks == [writer.stop]
+    assert _count(store, "SELECT count FROM vin_resolution_events WHERE signature = 'sig-e'") == 3
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+
+
+def _body(response) -> dict:
+    return json.loads(response.body) if hasattr(response, "body") else response
+
+
+def _busiest_model(m) -> tuple:
+    """(year, make, model) with the most catalog rows."""
+    counts = Counter()
+    for v in (m.CATALOG.get().docs.get("vehicles") or {}).get("vehicles", []):
+        y0, y1 = m.as_int(v.get("year_min")), m.as_int(v.get("year_max"))
+        if y0 is not None and y1 is not None:
+            counts.update((y, v.get("make"), v.get("model")) for y in range(y0, y1 + 1))
+    return counts.most_common(1)[0][0]
+
+
+def test_compat_lookup_without_paging_returns_every_match(monolith, monkeypatch):
+    m = monolith
+    monkeypatch.setattr(m, "SEARCH_DEFAULT_LIMIT", 1)
+    year, make, model = _busiest_model(m)
+    matches = m._search_impl(year, make, model)
+    assert len(matches) > 1
+
+    body = _body(m.vehicles_search(year=year, make=make, model=model, compat=True))
+    assert set(body) == {"query", "count", "results", "vehicles", "vehicle"}
+    assert body["count"] == len(body["results"]) == len(matches)
+    assert [r["vehicle_id"] for r in body["results"]] == [v.get("vehicle_id") for v in matches]
+    assert body["vehicle"] == body["results"][0]
+
+
+def test_limit_cursor_or_compat_off_pages(monolith, monkeypatch):
+    m = monolith
+    monkeypatch.setattr(m, "SEARCH_DEFAULT_LIMIT", 1)
+    year, make, model = _busiest_model(m)
+    total = len(m._search_impl(year, make, model))
+
+    paged = _body(m.vehicles_search(year=year, make=make, model=model, limit=1, compat=True))
+    assert paged["total"] == total and paged["count"] == 1 and paged["next_cursor"]
+    rest = _body(m.vehicles_search(year=year, make=make, model=model, cursor=paged["next_cursor"], compat=True))
+    assert rest["results"][0]["vehicle_id"] != paged["results"][0]["vehicle_id"]
+
+    lean = _body(m.vehicles_search(year=year, make=make, model=model, compat=False))
+    assert lean["count"] == 1 and "vehicles" not in lean and lean["next_cursor"]
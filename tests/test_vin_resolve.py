@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from api.domain import vin_decoder
+
+FIXTURE_VIN = "1HGCM82633A004352"  # 2003 Honda Accord, check digit 3
+BAD_CHECK_DIGIT = FIXTURE_VIN[:8] + "4" + FIXTURE_VIN[9:]
+
+
+def test_check_digit_mismatch_is_rejected_by_default():
+    assert vin_decoder.validate_vin(FIXTURE_VIN) is None
+    assert vin_decoder.validate_vin(BAD_CHECK_DIGIT) == "VIN_CHECK_DIGIT_MISMATCH"
+
+
+def test_check_digit_enforcement_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(vin_decoder, "ENFORCE_CHECK_DIGIT", False)
+    assert vin_decoder.validate_vin(BAD_CHECK_DIGIT) is None
+    assert vin_decoder.validate_vin(FIXTURE_VIN[:16]) == "VIN_INVALID_LENGTH"
+
+
+def test_rejected_vin_never_reaches_nhtsa(monolith, monkeypatch):
+    m = monolith
+    calls = []
+    monkeypatch.setattr(m, "_nhtsa_decode_vin", calls.append)
+    out = m.vin_resolve({"vin": BAD_CHECK_DIGIT.lower()})
+    assert out["status"] == "ERROR" and out["error"] == "VIN_CHECK_DIGIT_MISMATCH"
+    assert calls == []
+
+
+def test_nhtsa_down_returns_partial_from_local_decode(monolith):
+    m = monolith
+    out = m._match_decoded(FIXTURE_VIN, {"ok": False, "error": "NHTSA_TIMEOUT"}, {})
+    assert out["status"] == "PARTIAL"
+    assert out["error"] == "NHTSA_TIMEOUT"
+    assert out["decoded"] == {"year": 2003, "make": "Honda", "model": None, "source": "local"}
+    assert out["models"] == m.get_models(2003, "Honda")
+    bundled = m._bundle_for_vin_result(out)
+    assert bundled["status"] == "PARTIAL" and bundled["bundle"] is None
+    assert bundled["models"] == out["models"] and bundled["decoded"] == out["decoded"]
+
+
+def test_signature_uses_the_locally_filled_year(monolith, monkeypatch):
+    m = monolith
+    recorded = []
+    monkeypatch.setattr(m, "_sqlite_upsert_rollup", lambda sig, decoded, status, *_: recorded.append((sig, decoded)))
+    decoded = {"ok": True, "year": None, "make": None, "model": "No Such Model", "trim": None, "engine": None, "raw": {}}
+    m._match_decoded(FIXTURE_VIN, decoded, {})
+    (signature, rolled_up), = recorded
+    assert signature == m._signature_for({"year": 2003, "make": "Honda", "model": "No Such Model"})
+    assert (rolled_up["year"], rolled_up["make"]) == (2003, "Honda")
@@ -0,0 +1,96 @@
+"""(year, make) index vs the full-catalog scans _search_impl/_fuzzy_model_candidates replaced."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import pytest
+
+
+@lru_cache(maxsize=None)
+def _scan_scope(m, year: int, make: str) -> list[dict]:
+    """The rows the original functions scanned: year in range and same make, catalog order."""
+    out = []
+    for v in (m.CATALOG.get().docs.get("vehicles") or {}).get("vehicles", []):
+        y0, y1 = m.as_int(v.get("year_min")), m.as_int(v.get("year_max"))
+        if y0 is None or y1 is None or not (y0 <= year <= y1):
+            continue
+        if m.norm(v.get("make")) == m.norm(make):
+            out.append(v)
+    return out
+
+
+def _old_search(m, rows: list[dict], model: str) -> list[dict]:
+    return [v for v in rows if m.norm(v.get("model")) == m.norm(model)]
+
+
+def _old_fuzzy(m, rows: list[dict], model: str, limit: int = 8) -> list[dict]:
+    want_norm = m.norm(model)
+    want_key = m._key_alnum(model)
+    scored = []
+    for v in rows:
+        cand_model = v.get("model") or ""
+        cand_norm = m.norm(cand_model)
+        cand_key = m._key_alnum(cand_model)
+        score = -1
+        if cand_norm == want_norm:
+            score = 1000
+        elif cand_key == want_key and want_key:
+            score = 900
+        elif cand_norm.startswith(want_norm) and want_norm:
+            score = 800
+        elif want_norm.startswith(cand_norm) and cand_norm:
+            score = 700
+        elif want_key and cand_key.startswith(want_key):
+            score = 650
+        elif want_key and want_key.startswith(cand_key) and cand_key:
+            score = 600
+        if score < 0:
+            continue
+        span = max(0, m.as_int(v.get("year_max")) - m.as_int(v.get("year_min")))
+        score += max(0, 50 - min(50, span))
+        scored.append((score, v))
+    scored.sort(key=lambda t: t[0], reverse=True)
+    return [v for _, v in scored[:limit]]
+
+
+# How a decoded model name can differ from the catalog's.
+QUERIES = {
+    "exact": lambda name: name,
+    "upper": lambda name: name.upper(),
+    "family": lambda name: name.split()[0],
+    "no_punctuation": lambda name: "".join(c for c in name if c.isalnum()),
+    "short_prefix": lambda name: name[:3],
+    "one_char": lambda name: name[:1],
+    "longer": lambda name: name + " Crew Cab",
+    "hyphenated": lambda name: name.replace(" ", "-"),
+    "empty": lambda name: "",
+    "key_prefix": lambda name: "".join(c for c in name if c.isalnum())[:-1],
+    "key_longer": lambda name: "".join(c for c in name if c.isalnum()) + "HD",
+    "spaced_key": lambda name: " ".join("".join(c for c in name if c.isalnum())[:4]),
+}
+
+
+@lru_cache(maxsize=None)
+def _scopes(m) -> tuple:
+    keys = set()
+    for v in (m.CATALOG.get().docs.get("vehicles") or {}).get("vehicles", []):
+        y0, y1 = m.as_int(v.get("year_min")), m.as_int(v.get("year_max"))
+        if y0 is not None and y1 is not None:
+            keys.update((y, v.get("make"), v.get("model") or "") for y in range(y0, y1 + 1))
+    return tuple(sorted(keys, key=str))
+
+
+@pytest.mark.parametrize("variant", sorted(QUERIES))
+def test_index_matches_full_scan(monolith, variant):
+    m = monolith
+    for year, make, name in _scopes(m):
+        model = QUERIES[variant](name)
+        rows = _scan_scope(m, year, make)
+        assert m._search_impl(year, make, model) == _old_search(m, rows, model), (year, make, model)
+        assert m._fuzzy_model_candidates(year, make, model) == _old_fuzzy(m, rows, model), (year, make, model)
+
+
+def test_unknown_scope_is_empty(monolith):
+    m = monolith
+    assert m._search_impl(1899, "Chevrolet", "Silverado") == []
+    assert m._fuzzy_model_candidates(2016, "No Such Make", "Silverado") == []